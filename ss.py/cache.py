@@ -0,0 +1,152 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# Columnar Cache of Cleaned Streams (Arrow/Feather, memory-mapped on re-runs)
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+
+import glob
+import hashlib
+import json
+import os
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from ingest import load_streams
+
+METADATA_KEY = b'uidai_cache'
+
+
+def file_digest(path, block_size=1 << 20):
+    """
+    SHA-256 of a file's content, read in 1 MB blocks.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def mapping_digest(*mappings):
+    """
+    Stable fingerprint of the lookup tables (e.g. state_mapping, district_mapping).
+    """
+    payload = json.dumps(mappings, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class StreamCache:
+    """
+    Stores cleaned, typed stream frames as uncompressed Arrow (Feather v2) files.
+    Entries are keyed by the ZIP's content hash plus the cleaning-code version and
+    the mapping tables, so a change to any of them makes the old entry stale.
+    Stale entries of a stream are deleted as soon as a newer key is requested.
+    An entry can carry a JSON summary of its frame (e.g. stats.summarize_stream) in a
+    side file, so statistics survive a cache hit without another pass over the rows.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def entry_key(self, zip_path, version, mappings=()):
+        code_digest = hashlib.sha256(f"{version}|{mapping_digest(*mappings)}".encode('utf-8')).hexdigest()
+        return f"{file_digest(zip_path)[:20]}-{code_digest[:12]}"
+
+    def entry_path(self, stream, key):
+        return os.path.join(self.cache_dir, f"{stream}--{key}.arrow")
+
+    def summary_path(self, stream, key):
+        return os.path.join(self.cache_dir, f"{stream}--{key}.summary.json")
+
+    def evict_stale(self, stream, key):
+        """
+        Deletes every cached entry (and summary) of `stream` whose key is not `key`.
+        """
+        keep = {os.path.abspath(self.entry_path(stream, key)), os.path.abspath(self.summary_path(stream, key))}
+        for path in glob.glob(os.path.join(self.cache_dir, f"{stream}--*")):
+            if os.path.abspath(path) not in keep and not path.endswith('.tmp'):
+                os.remove(path)
+                print(f"Evicted stale cache entry: {os.path.basename(path)}")
+
+    def load(self, stream, key):
+        """
+        Returns (frame, metadata) for a cached entry, or (None, None) on a miss.
+        The file is memory-mapped, so numeric columns are not re-parsed or copied up front.
+        """
+        path = self.entry_path(stream, key)
+        if not os.path.exists(path):
+            return None, None
+
+        table = feather.read_table(path, memory_map=True)
+        raw_meta = (table.schema.metadata or {}).get(METADATA_KEY, b'{}')
+        return table.to_pandas(split_blocks=True), json.loads(raw_meta)
+
+    def store(self, stream, key, df, metadata=None):
+        """
+        Writes a cleaned frame (plus optional JSON metadata) and evicts older entries.
+        """
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        schema_meta = dict(table.schema.metadata or {})
+        schema_meta[METADATA_KEY] = json.dumps(metadata or {}).encode('utf-8')
+        table = table.replace_schema_metadata(schema_meta)
+
+        # Write to a temporary file first so an interrupted run never leaves a broken entry
+        path = self.entry_path(stream, key)
+        feather.write_feather(table, path + '.tmp', compression='uncompressed')
+        os.replace(path + '.tmp', path)
+        self.evict_stale(stream, key)
+
+    def load_summary(self, stream, key):
+        path = self.summary_path(stream, key)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def store_summary(self, stream, key, summary):
+        path = self.summary_path(stream, key)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(summary, f)
+        os.replace(path + '.tmp', path)
+
+    def load_streams(self, sources, clean, version, mappings=(), max_workers=None, summarize=None):
+        """
+        Cached version of ingest.load_streams.
+        Hits are memory-mapped from disk; misses are loaded together in the process pool,
+        passed through `clean(stream, df, timings)` and written back to the cache.
+        `clean` returns (clean_df, metadata_dict).
+        With `summarize(stream, df)` (returning a JSON-ready dict), each entry's summary is
+        computed once when the entry is written and read back on hits; it is returned as
+        metadata[stream]['summary'].
+        Returns (frames, timings, metadata) where timings only covers streams that were re-read.
+        """
+        frames, metadata, missing, keys = {}, {}, {}, {}
+
+        for stream, zip_path in sources.items():
+            keys[stream] = self.entry_key(zip_path, version, mappings)
+            frame, meta = self.load(stream, keys[stream])
+            if frame is None:
+                self.evict_stale(stream, keys[stream])
+                missing[stream] = zip_path
+            else:
+                print(f"Cache hit: {stream} ({len(frame):,} rows, memory-mapped)")
+                frames[stream], metadata[stream] = frame, meta
+
+        timings = None
+        if missing:
+            raw_frames, timings = load_streams(missing, max_workers)
+            for stream in missing:
+                member_timings = timings[timings['stream'] == stream]
+                frames[stream], metadata[stream] = clean(stream, raw_frames.pop(stream), member_timings)
+                self.store(stream, keys[stream], frames[stream], metadata[stream])
+                print(f"Cached cleaned {stream} stream ({len(frames[stream]):,} rows)")
+
+        if summarize is not None:
+            for stream, key in keys.items():
+                summary = self.load_summary(stream, key)
+                if summary is None:
+                    summary = summarize(stream, frames[stream])
+                    self.store_summary(stream, key, summary)
+                metadata[stream] = dict(metadata[stream], summary=summary)
+
+        return frames, timings, metadata
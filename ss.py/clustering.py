@@ -0,0 +1,208 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# Clustering Subsystem: Full-Batch and Mini-Batch K-Means over Rollup Cells with Warm Starts
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+
+import time
+
+import numpy as np
+import pandas as pd
+
+INIT_SAMPLE = 10_000
+
+
+# 1. VECTORIZED GEOMETRY
+def squared_distances(X, centroids):
+    """
+    ||x - c||^2 for every row and centroid via ||x||^2 - 2 x.c + ||c||^2 (one matrix product).
+    """
+    distances = X @ centroids.T
+    distances *= -2
+    distances += np.einsum('ij,ij->i', X, X)[:, None]
+    distances += np.einsum('ij,ij->i', centroids, centroids)[None, :]
+    np.maximum(distances, 0, out=distances)
+    return distances
+
+
+def nearest(X, centroids):
+    """
+    (label, squared distance) of the closest centroid for every row.
+    """
+    distances = squared_distances(X, centroids)
+    labels = distances.argmin(axis=1)
+    return labels, distances[np.arange(len(X)), labels]
+
+
+def kmeans_plusplus(X, n_clusters, rng, weights=None):
+    """
+    k-means++ seeding: each next centroid is drawn with probability proportional to
+    (weighted) squared distance from the centroids chosen so far.
+    """
+    weights = np.ones(len(X)) if weights is None else weights
+    first = rng.choice(len(X), p=weights / weights.sum())
+    centroids = [X[first]]
+    closest = squared_distances(X, X[first][None, :])[:, 0]
+    for _ in range(1, n_clusters):
+        mass = closest * weights
+        pick = rng.choice(len(X), p=mass / mass.sum()) if mass.sum() > 0 else rng.integers(len(X))
+        centroids.append(X[pick])
+        np.minimum(closest, squared_distances(X, X[pick][None, :])[:, 0], out=closest)
+    return np.array(centroids, dtype=np.float64)
+
+
+def cube_features(cube, features, by=None):
+    """
+    Feature matrix (mean of each ratio per cell) and weights (rows per cell) of a rollup cube,
+    e.g. one point per pincode-day.
+    """
+    cells = cube.at(by)
+    X = cube.mean(features, by)
+    return X, cells.cells['n_rows'].to_numpy().astype(np.float64)
+
+
+# 2. K-MEANS
+class StreamingKMeans:
+    """
+    Weighted k-means in two modes:
+      - 'full': Lloyd iterations over every point (district-level data),
+      - 'minibatch': Sculley's mini-batch updates on random batches, for hundreds of
+        thousands of points (pincode-day cells); each centroid moves toward the batch
+        mean of its points with a learning rate of 1 / (weight it has absorbed so far).
+
+    `init` may be yesterday's centroids: fitting then warm-starts from them instead of
+    k-means++ seeding, and partial_fit() folds in a day of new points with one more step.
+    Every iteration is logged (seconds, inertia, centroid shift); see report(). Full mode stops
+    when the centroids move less than `tol` (relative to the data's variance), mini-batch mode
+    when the smoothed batch inertia has not improved for `patience` batches.
+    Inertia is the weighted sum of squared distances (per unit weight for mini-batches).
+    """
+
+    def __init__(self, n_clusters=3, mode='minibatch', batch_size=4096, max_iter=300, tol=1e-4,
+                 patience=10, seed=42, init=None):
+        if mode not in ('full', 'minibatch'):
+            raise ValueError(f"Unknown k-means mode '{mode}'")
+        self.n_clusters = n_clusters
+        self.mode = mode
+        self.batch_size = batch_size
+        self.max_iter = max_iter
+        self.tol = tol
+        self.patience = patience
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.centroids = None if init is None else np.array(init, dtype=np.float64)
+        self.counts = np.zeros(n_clusters)
+        self.history = []
+        self.inertia = None
+
+    def initialize(self, X, weights):
+        if self.centroids is not None:
+            if self.centroids.shape != (self.n_clusters, X.shape[1]):
+                raise ValueError(f"Warm-start centroids have shape {self.centroids.shape}, "
+                                 f"expected {(self.n_clusters, X.shape[1])}")
+            return
+        sample = self.rng.choice(len(X), size=min(len(X), INIT_SAMPLE), replace=False)
+        self.centroids = kmeans_plusplus(X[sample], self.n_clusters, self.rng, weights[sample])
+
+    def log(self, start, inertia, shift):
+        self.history.append({
+            'iteration': len(self.history) + 1, 'mode': self.mode, 'seconds': round(time.perf_counter() - start, 5),
+            'inertia': float(inertia), 'shift': float(shift),
+        })
+
+    # 1. STEPS
+    def lloyd_step(self, X, weights):
+        labels, dist = nearest(X, self.centroids)
+        mass = np.bincount(labels, weights=weights, minlength=self.n_clusters)
+        sums = np.column_stack([np.bincount(labels, weights=weights * X[:, j], minlength=self.n_clusters)
+                                for j in range(X.shape[1])])
+        moved = self.centroids.copy()
+        filled = mass > 0
+        # An empty cluster keeps its centroid
+        moved[filled] = sums[filled] / mass[filled, None]
+        shift = float(np.square(moved - self.centroids).sum())
+        self.centroids = moved
+        return float((dist * weights).sum()), shift
+
+    def minibatch_step(self, X, weights):
+        labels, dist = nearest(X, self.centroids)
+        mass = np.bincount(labels, weights=weights, minlength=self.n_clusters)
+        sums = np.column_stack([np.bincount(labels, weights=weights * X[:, j], minlength=self.n_clusters)
+                                for j in range(X.shape[1])])
+        self.counts += mass
+        filled = mass > 0
+        rate = np.zeros(self.n_clusters)
+        rate[filled] = mass[filled] / self.counts[filled]
+        target = self.centroids.copy()
+        target[filled] = sums[filled] / mass[filled, None]
+        moved = self.centroids + (target - self.centroids) * rate[:, None]
+        shift = float(np.square(moved - self.centroids).sum())
+        self.centroids = moved
+        return float((dist * weights).sum() / max(weights.sum(), 1e-12)), shift
+
+    # 2. FITTING
+    def fit(self, X, weights=None):
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        weights = np.ones(len(X)) if weights is None else np.asarray(weights, dtype=np.float64)
+        self.initialize(X, weights)
+        # Convergence threshold relative to the data's spread, as in sklearn
+        threshold = self.tol * float(np.mean(np.var(X, axis=0)))
+
+        if self.mode == 'full':
+            for _ in range(self.max_iter):
+                start = time.perf_counter()
+                inertia, shift = self.lloyd_step(X, weights)
+                self.log(start, inertia, shift)
+                if shift <= threshold:
+                    break
+        else:
+            # Single batches are noisy, so convergence is judged on an exponentially weighted
+            # average of the batch inertia: stop once it has not improved for `patience` batches
+            batch_size = min(self.batch_size, len(X))
+            alpha = min(2 * batch_size / (len(X) + 1), 1.0)
+            smoothed, best, stale = None, np.inf, 0
+            for _ in range(self.max_iter):
+                start = time.perf_counter()
+                batch = self.rng.integers(0, len(X), size=batch_size)
+                inertia, shift = self.minibatch_step(X[batch], weights[batch])
+                self.log(start, inertia, shift)
+                smoothed = inertia if smoothed is None else smoothed + (inertia - smoothed) * alpha
+                if smoothed < best:
+                    best, stale = smoothed, 0
+                else:
+                    stale += 1
+                    if stale >= self.patience:
+                        break
+
+        self.inertia = self.score(X, weights)
+        return self
+
+    def partial_fit(self, X, weights=None):
+        """
+        One mini-batch step on new points (e.g. today's pincode-day cells).
+        """
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        weights = np.ones(len(X)) if weights is None else np.asarray(weights, dtype=np.float64)
+        self.initialize(X, weights)
+        start = time.perf_counter()
+        inertia, shift = self.minibatch_step(X, weights)
+        self.log(start, inertia, shift)
+        return self
+
+    # 3. USING THE FIT
+    def predict(self, X):
+        return nearest(np.ascontiguousarray(X, dtype=np.float64), self.centroids)[0]
+
+    def transform(self, X):
+        """
+        Euclidean distance of every row to every centroid.
+        """
+        return np.sqrt(squared_distances(np.ascontiguousarray(X, dtype=np.float64), self.centroids))
+
+    def score(self, X, weights=None):
+        """
+        Weighted inertia of X under the current centroids.
+        """
+        _, dist = nearest(np.ascontiguousarray(X, dtype=np.float64), self.centroids)
+        return float(dist.sum() if weights is None else (dist * weights).sum())
+
+    def report(self):
+        return pd.DataFrame(self.history, columns=['iteration', 'mode', 'seconds', 'inertia', 'shift'])
@@ -0,0 +1,204 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# Derived-Column Graph: Lazy, Dependency-Tracked Columns of master_df
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+from metrics import METRICS, compute_metrics
+from scaling import RunningScaler
+
+
+class Node:
+    """
+    One derived column: `func(*input_arrays)` -> array.
+    Inputs are base columns of the frame or other nodes.
+    Nodes built from the metrics registry have func=None and are evaluated together
+    through metrics.compute_metrics (one fused pass for every stale metric).
+    """
+
+    def __init__(self, name, inputs, func=None, description=''):
+        self.name = name
+        self.inputs = list(inputs)
+        self.func = func
+        self.description = description
+
+    def __repr__(self):
+        return f"Node({self.name!r}, inputs={self.inputs})"
+
+
+def min_max(values):
+    """
+    Scales a float64 copy to [0, 1] like MinMaxScaler (a constant column maps to 0).
+    """
+    scaled = values.astype(np.float64, copy=True)
+    if not len(scaled):
+        return scaled
+    return RunningScaler('values').fit({'values': scaled}).transform(scaled, 'values')
+
+
+def weighted_score(mbu, sat, mbu_weight=40, sat_weight=60):
+    """
+    District Health Index: 40% normalized MBU compliance + 60% normalized saturation.
+    """
+    score = mbu * mbu_weight
+    score += sat * sat_weight
+    return score
+
+
+NODES = {}
+
+
+def register(node):
+    NODES[node.name] = node
+    return node
+
+
+# 1. METRIC NODES (totals and behavioral indices from metrics.METRICS)
+for metric in METRICS.values():
+    register(Node(metric.name, metric.inputs, description=metric.description))
+
+# 2. DISTRICT HEALTH INDEX (DHI)
+register(Node('norm_mbu', ['mbu_compliance'], min_max, 'MBU compliance scaled to [0, 1]'))
+register(Node('norm_sat', ['saturation_ratio'], min_max, 'Saturation ratio scaled to [0, 1]'))
+register(Node('health_score', ['norm_mbu', 'norm_sat'], weighted_score, '40/60 weighted DHI (0-100)'))
+
+
+class DerivedFrame:
+    """
+    Lazy view of the derived columns of a frame (normally master_df).
+    Nothing is computed up front: require() / [] materialize a column and everything it
+    depends on into the frame, and the result is reused until one of its inputs changes.
+
+    Every column has a version counter. An input "changes" when it is replaced through the
+    graph (derived['age_0_5'] = ...) or when invalidate() is called for it after any other
+    edit; every dependent column is then recomputed on its next access. Buffers are not
+    compared, since under Copy-on-Write pandas may share or copy them at will, so a column
+    written straight into the frame must be followed by invalidate(). A derived column
+    that the script sets itself (derived['health_score'] = ..., or one already in the frame)
+    is an override: it is kept, and its dependents follow it, until invalidate() drops it.
+    """
+
+    def __init__(self, df, nodes=None, dtype='float64'):
+        self.df = df
+        self.nodes = dict(NODES if nodes is None else nodes)
+        self.dtype = dtype
+        self.cache = {}       # name -> (input signature, serial)
+        self.versions = {}    # column -> replacement / invalidation counter
+        self.overrides = {name for name in self.nodes if name in df.columns}
+        self.evaluations = {}  # name -> how many times it was computed (for inspection)
+        self.serial = 0
+
+    # 1. DEPENDENCY BOOKKEEPING
+    def is_override(self, name):
+        return name in self.overrides and name in self.df.columns
+
+    def token(self, name):
+        """
+        Identity of a column's current content, used in the signatures of its dependents.
+        """
+        if name in self.nodes and not self.is_override(name):
+            return ('node', self.cache[name][1])
+        return ('column', self.versions.get(name, 0))
+
+    def order(self, names):
+        """
+        `names` plus their dependencies, each after everything it depends on.
+        """
+        ordered, seen = [], set()
+
+        def visit(name, path):
+            if name in seen or name not in self.nodes:
+                return
+            if name in path:
+                raise ValueError(f"Cycle in derived columns: {' -> '.join(path + [name])}")
+            for dep in self.nodes[name].inputs:
+                visit(dep, path + [name])
+            seen.add(name)
+            ordered.append(name)
+
+        for name in names:
+            if name not in self.nodes and name not in self.df.columns:
+                raise KeyError(f"'{name}' is neither a column nor a registered derived column")
+            visit(name, [])
+        return ordered
+
+    def is_fresh(self, name):
+        if self.is_override(name):
+            return True
+        entry = self.cache.get(name)
+        if entry is None or name not in self.df.columns:
+            return False
+        return entry[0] == tuple(self.token(dep) for dep in self.nodes[name].inputs)
+
+    # 2. MATERIALIZATION
+    def store(self, name, values):
+        self.df[name] = pd.Series(values, index=self.df.index, copy=False)
+        self.serial += 1
+        signature = tuple(self.token(dep) for dep in self.nodes[name].inputs)
+        self.cache[name] = (signature, self.serial)
+        self.evaluations[name] = self.evaluations.get(name, 0) + 1
+
+    def require(self, *names):
+        """
+        Makes sure the named derived columns exist and are current, computing only what is
+        missing or stale. Stale metrics are evaluated together in one fused pass.
+        Returns the frame so it can be used directly (e.g. data=derived.require('x')).
+        """
+        # A column is stale when its own cache entry is, or when anything it reads is stale:
+        # its cached signature still matches until that input has actually been recomputed
+        stale = []
+        for name in self.order(names):
+            if self.is_override(name):
+                continue
+            if not self.is_fresh(name) or any(dep in stale for dep in self.nodes[name].inputs):
+                stale.append(name)
+
+        # Metrics read only count columns and other metrics, so every stale one goes into the same fused pass
+        metric_batch = [name for name in stale if self.nodes[name].func is None]
+        if metric_batch:
+            results = compute_metrics(self.df, metric_batch, dtype=self.dtype)
+            for name in metric_batch:
+                self.store(name, results[name])
+        for name in stale:
+            node = self.nodes[name]
+            if node.func is not None:
+                self.store(name, node.func(*[self.df[dep].to_numpy() for dep in node.inputs]))
+        return self.df
+
+    def __getitem__(self, name):
+        self.require(name)
+        return self.df[name]
+
+    def __setitem__(self, name, values):
+        """
+        Replaces a column and bumps its version. Setting a derived column makes it an override.
+        """
+        self.df[name] = values
+        self.versions[name] = self.versions.get(name, 0) + 1
+        if name in self.nodes:
+            self.overrides.add(name)
+            self.cache.pop(name, None)
+
+    def invalidate(self, *names):
+        """
+        Marks columns as changed after an edit made outside the graph. For a derived column
+        this also drops a manual override, so the graph owns it again.
+        """
+        for name in names:
+            self.versions[name] = self.versions.get(name, 0) + 1
+            if name in self.nodes:
+                self.overrides.discard(name)
+                self.cache.pop(name, None)
+                if name in self.df.columns:
+                    del self.df[name]
+
+    def rebind(self, df):
+        """
+        Points the graph at a new frame (e.g. after a re-merge). Nothing computed for the old
+        frame is reused; derived columns the new frame already holds count as overrides.
+        """
+        self.df = df
+        self.cache.clear()
+        self.overrides = {name for name in self.nodes if name in df.columns}
+        return self
@@ -0,0 +1,303 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# Geographic Standardization Tables
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+
+# 1. STATE MAPPING DICTIONARY
+# This handles complex renames, historical names, and mergers (e.g., UT merger of 2020)
+state_mapping = {
+    # Union Territory Mergers & Variations
+    'Daman And Diu': 'Dadra and Nagar Haveli and Daman and Diu',
+    'Dadra & Nagar Haveli': 'Dadra and Nagar Haveli and Daman and Diu',
+    'Dadra And Nagar Haveli': 'Dadra and Nagar Haveli and Daman and Diu',
+    'Daman & Diu': 'Dadra and Nagar Haveli and Daman and Diu',
+    'Dadra & Nagar Haveli And Daman & Diu': 'Dadra and Nagar Haveli and Daman and Diu',
+    'The Dadra And Nagar Haveli And Daman And Diu': 'Dadra and Nagar Haveli and Daman and Diu',
+    
+    # Common State Name Typos & Historical Fixes
+    'Orissa': 'Odisha',
+    'Odisha': 'Odisha',
+    'Westbengal': 'West Bengal',
+    'West Bengli': 'West Bengal',
+    'West  Bengal': 'West Bengal',
+    'West Bangal': 'West Bengal',
+    'Tamilnadu': 'Tamil Nadu',
+    'Chhatisgarh': 'Chhattisgarh',
+    'Chattisgarh': 'Chhattisgarh',
+    'Uttaranchal': 'Uttarakhand',
+    'Pondicherry': 'Puducherry',
+    'Telengana': 'Telangana',
+    
+    # Symbols & Spacing Fixes
+    'Andaman & Nicobar Islands': 'Andaman and Nicobar Islands',
+    'Andaman And Nicobar Islands': 'Andaman and Nicobar Islands',
+    'Jammu & Kashmir': 'Jammu and Kashmir',
+    'Jammu And Kashmir': 'Jammu and Kashmir',
+    'Delhi (National Capital Territory)': 'Delhi',
+    'Nct Of Delhi': 'Delhi'
+}
+
+
+# 2. DISTRICT MAPPING DICTIONARY
+# This merges specific local areas/typos into the actual district names
+district_mapping = {
+    # Bangalore & Urban Transitions
+    'Puttenahalli': 'Bengaluru Urban',
+    'Bengaluru Urban': 'Bengaluru Urban',
+    'Bengaluru Rural': 'Bengaluru Rural',
+    'Bengaluru South': 'Bengaluru Urban',
+    
+    # Hyderabad & Telangana Fragmentation
+    'Balanagar': 'Hyderabad',
+    'Hanumakonda': 'Hanamkonda',
+    'Jangoan': 'Jangaon',
+    'Medchal-Malkajgiri': 'Medchal-Malkajgiri',
+    'Medchal?Malkajgiri': 'Medchal-Malkajgiri',
+    'Medchalâ\x88\x92Malkajgiri': 'Medchal-Malkajgiri',
+    
+    # Tamil Nadu & Andhra Updates
+    'Raja Annamalai Puram': 'Chennai',
+    'Madanapalle': 'Chittoor',
+    'Visakhapatanam': 'Visakhapatnam',
+    'Tuticorin': 'Thoothukkudi',
+    
+    # Cleaning Numeric/Non-District Garbage
+    '100000': 'Unknown',
+    'Near Meera Hospital': 'Unknown',
+    'Near Dhyana Ashram': 'Unknown',
+    'Kadiri Road': 'Unknown',
+    'Dist : Thane': 'Thane',
+    '?': 'Unknown',
+    
+    # West Bengal Specific Unification
+    'West Bengli': 'West Bengal',
+    'Naihati Anandabazar': 'North 24 Parganas',
+    'Domjur': 'Howrah',
+    'Dinajpur Uttar': 'Uttar Dinajpur',
+    'Dinajpur Dakshin': 'Dakshin Dinajpur',
+    'South 24 Pargana': 'South 24 Parganas',
+    
+    # Maharashtra & Chhattisgarh Formatting
+    'Manendragarhchirmiribharatpur': 'Manendragarh-Chirmiri-Bharatpur',
+    'Manendragarh–Chirmiri–Bharatpur': 'Manendragarh-Chirmiri-Bharatpur',
+    'Raigarh(Mh)': 'Raigarh',
+    'Ahilyanagar': 'Ahmednagar'
+}
+
+
+# 3. NON-DISTRICT GARBAGE
+# District labels containing any of these keywords are street/landmark addresses, not districts
+garbage_keywords = ['Near', 'Road', 'Hospital', 'Ashram', 'Lane', 'Cross']
+
+
+# 4. VECTORIZED LABEL NORMALIZER
+class LabelNormalizer:
+    """
+    Cleans geography labels once per distinct value and broadcasts the result
+    back to every row through categorical codes.
+    With ~68 raw states and ~1000 raw districts, the cost depends on the number of
+    distinct labels, not on the 2.3M rows. Cleaned labels are memoized across calls.
+    """
+
+    def __init__(self, mapping=None, garbage_keywords=None, garbage_label='Other'):
+        self.mapping = mapping or {}
+        self.garbage_keywords = garbage_keywords or []
+        self.garbage_label = garbage_label
+        self.memo = {}
+
+    def clean(self, label):
+        """
+        Strip + Title Case, then the mapping dictionary, then the garbage-keyword check.
+        """
+        if label not in self.memo:
+            text = str(label).strip().title()
+            text = self.mapping.get(text, text)
+            if any(keyword in text for keyword in self.garbage_keywords):
+                text = self.garbage_label
+            self.memo[label] = text
+        return self.memo[label]
+
+    def normalize(self, values):
+        """
+        Returns `values` as a cleaned categorical Series (same index and name).
+        """
+        if not isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype('category')
+
+        # Clean the distinct labels, then collapse labels that now coincide
+        cleaned = [self.clean(label) for label in values.cat.categories]
+        lookup, categories = pd.factorize(pd.Index(cleaned, dtype=object), sort=True)
+
+        codes = values.cat.codes.to_numpy()
+        new_codes = np.where(codes >= 0, lookup[codes], -1)
+        return pd.Series(
+            pd.Categorical.from_codes(new_codes, categories=categories),
+            index=values.index, name=values.name,
+        )
+
+
+# Ready-made normalizers for the pipeline
+title_normalizer = LabelNormalizer()
+state_normalizer = LabelNormalizer(state_mapping)
+district_normalizer = LabelNormalizer(district_mapping, garbage_keywords)
+
+
+# 5. PRE-MERGE STREAM NORMALIZATION
+def normalize_stream(df):
+    """
+    Applies the state and district normalizers to one raw stream (enrolment, demographic or biometric).
+    Runs before the master merge so that 'ODISHA' and 'Odisha' rows join on the same key.
+    """
+    return df.assign(
+        state=state_normalizer.normalize(df['state']),
+        district=district_normalizer.normalize(df['district']),
+    )
+
+
+# 6. PINCODE -> (STATE, DISTRICT) AUTHORITATIVE INDEX
+def label_ranks(labels):
+    """
+    Alphabetical rank of every label, indexed by the label's code.
+    """
+    ranks = np.empty(len(labels), dtype=np.int64)
+    ranks[np.argsort(np.array(labels, dtype=object), kind='stable')] = np.arange(len(labels))
+    return ranks
+
+
+class PincodeIndex:
+    """
+    Majority (state, district) label of every pincode, learned from all three streams.
+    Label tallies are kept as one sorted int64 array, so new data is folded in
+    incrementally instead of rebuilding from scratch. The majority table is a sorted
+    pincode array, so lookups are a vectorized binary search (O(log n) per row).
+    Unresolved labels ('Other', 'Unknown') never vote.
+    """
+
+    def __init__(self, unresolved_labels=('Other', 'Unknown')):
+        self.unresolved_labels = list(unresolved_labels)
+        self.states, self.districts = [], []
+        self.state_code, self.district_code = {}, {}
+        self.tally_keys = np.empty(0, dtype=np.int64)
+        self.tally_counts = np.empty(0, dtype=np.int64)
+        self.pincodes = np.empty(0, dtype=np.int64)
+        self.majority_state = np.empty(0, dtype=np.int64)
+        self.majority_district = np.empty(0, dtype=np.int64)
+
+    def label_codes(self, values, labels, codes):
+        """
+        Index codes of a categorical column, registering unseen labels (work is per category).
+        """
+        for label in values.cat.categories:
+            if label not in codes:
+                codes[label] = len(labels)
+                labels.append(label)
+        lookup = np.array([codes[label] for label in values.cat.categories], dtype=np.int64)
+        return lookup[values.cat.codes.to_numpy()]
+
+    def update(self, df):
+        """
+        Adds the label counts of a (normalized) stream frame and refreshes the majority table.
+        """
+        state = df['state'].astype('category')
+        district = df['district'].astype('category')
+        voting = (
+            ~np.isin(district.cat.categories, self.unresolved_labels)[district.cat.codes.to_numpy()]
+            & (state.cat.codes.to_numpy() >= 0) & (district.cat.codes.to_numpy() >= 0)
+        )
+
+        keys = (
+            (df['pincode'].to_numpy().astype(np.int64) << 32)
+            | (self.label_codes(state, self.states, self.state_code) << 16)
+            | self.label_codes(district, self.districts, self.district_code)
+        )[voting]
+
+        # Fold the new tallies into the existing sorted ones
+        new_keys, new_counts = np.unique(keys, return_counts=True)
+        merged_keys, inverse = np.unique(np.r_[self.tally_keys, new_keys], return_inverse=True)
+        self.tally_counts = np.bincount(inverse, weights=np.r_[self.tally_counts, new_counts]).astype(np.int64)
+        self.tally_keys = merged_keys
+        self.refresh_majority()
+        return self
+
+    def refresh_majority(self):
+        """
+        Picks the most frequent (state, district) per pincode.
+        Ties go to the alphabetically first (state, district) pair, so the winner does not
+        depend on the order in which frames (or partitions of them) were folded in.
+        """
+        pincode = self.tally_keys >> 32
+        state_rank = label_ranks(self.states)[(self.tally_keys >> 16) & 0xFFFF]
+        district_rank = label_ranks(self.districts)[self.tally_keys & 0xFFFF]
+        # Sort by pincode, then count descending; the first row of each pincode is its majority
+        order = np.lexsort((district_rank, state_rank, -self.tally_counts, pincode))
+        first = order[np.r_[True, pincode[order][1:] != pincode[order][:-1]]] if len(order) else order
+        winners = self.tally_keys[first]
+        self.pincodes = winners >> 32
+        self.majority_state = (winners >> 16) & 0xFFFF
+        self.majority_district = winners & 0xFFFF
+
+    def lookup(self, pincodes):
+        """
+        Majority state and district codes for an array of pincodes, plus a found mask.
+        """
+        pincodes = np.asarray(pincodes, dtype=np.int64)
+        pos = np.searchsorted(self.pincodes, pincodes)
+        pos = np.minimum(pos, max(len(self.pincodes) - 1, 0))
+        found = (self.pincodes[pos] == pincodes) if len(self.pincodes) else np.zeros(len(pincodes), dtype=bool)
+        return self.majority_state[pos], self.majority_district[pos], found
+
+    def repair(self, df):
+        """
+        Replaces the labels of mislabeled rows with their pincode's majority label, in bulk.
+        A row is mislabeled when its district is unresolved ('Other'/'Unknown') or its state
+        never wins any pincode (e.g. 'Darbhanga' or '100000' used as a state).
+        Returns (repaired_df, number_of_rows_repaired).
+        """
+        state = df['state'].astype('category')
+        district = df['district'].astype('category')
+        valid_states = {self.states[code] for code in np.unique(self.majority_state)}
+
+        bad_state = ~np.isin(state.cat.categories, list(valid_states))[state.cat.codes.to_numpy()]
+        bad_district = np.isin(district.cat.categories, self.unresolved_labels)[district.cat.codes.to_numpy()]
+        rows = np.flatnonzero(bad_state | bad_district)
+
+        new_state, new_district, found = self.lookup(df['pincode'].to_numpy()[rows])
+        rows = rows[found]
+        if len(rows) == 0:
+            return df, 0
+
+        def relabel(values, labels, new_codes):
+            # Re-code into the union of the column's own labels and the index labels
+            categories = pd.Index(values.cat.categories).append(pd.Index(labels)).unique()
+            old_codes = values.cat.codes.to_numpy()
+            codes = np.where(old_codes >= 0, categories.get_indexer(values.cat.categories)[old_codes], -1)
+            codes[rows] = categories.get_indexer(labels)[new_codes]
+            return pd.Series(pd.Categorical.from_codes(codes, categories=categories), index=values.index, name=values.name)
+
+        repaired = df.assign(
+            state=relabel(state, self.states, new_state[found]),
+            district=relabel(district, self.districts, new_district[found]),
+        )
+        return repaired, len(rows)
+
+    def save(self, path):
+        """
+        Stores the tallies and label lists so the next refresh can continue incrementally.
+        """
+        np.savez(path, tally_keys=self.tally_keys, tally_counts=self.tally_counts,
+                 states=np.array(self.states, dtype=object), districts=np.array(self.districts, dtype=object),
+                 unresolved=np.array(self.unresolved_labels, dtype=object))
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path, allow_pickle=True)
+        index = cls(unresolved_labels=list(data['unresolved']))
+        index.states, index.districts = list(data['states']), list(data['districts'])
+        index.state_code = {label: code for code, label in enumerate(index.states)}
+        index.district_code = {label: code for code, label in enumerate(index.districts)}
+        index.tally_keys, index.tally_counts = data['tally_keys'], data['tally_counts']
+        index.refresh_majority()
+        return index
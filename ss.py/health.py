@@ -0,0 +1,146 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# Health Score Engine: Outlier-Resistant DHI at the District Grain with Pluggable Normalizers
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+from rollup import DISTRICT_GRAIN, HEALTH_WEIGHTS
+from sketches import KLLSketch
+
+
+# 1. NORMALIZERS
+class Normalizer:
+    """
+    Maps one component's values to [0, 1] using only the component's quantile sketch.
+    Subclasses set `name` and define __call__(values).
+    """
+    name = None
+
+    def __init__(self, sketch, **options):
+        self.sketch = sketch
+
+
+NORMALIZERS = {}
+
+
+def register(cls):
+    NORMALIZERS[cls.name] = cls
+    return cls
+
+
+@register
+class MinMaxNormalizer(Normalizer):
+    """
+    The original scaling: (x - min) / (max - min). One extreme value squashes everything else.
+    """
+    name = 'minmax'
+
+    def __call__(self, values):
+        low, high = self.sketch.min, self.sketch.max
+        return (values - low) / (high - low) if high > low else np.zeros_like(values)
+
+
+@register
+class QuantileClipNormalizer(Normalizer):
+    """
+    Min-max between two quantiles (default 1st and 99th percentile); values beyond them are clipped.
+    """
+    name = 'quantile_clip'
+
+    def __init__(self, sketch, lower=0.01, upper=0.99, **options):
+        super().__init__(sketch)
+        self.low, self.high = sketch.quantile([lower, upper])
+
+    def __call__(self, values):
+        if self.high <= self.low:
+            return np.zeros_like(values)
+        return np.clip((values - self.low) / (self.high - self.low), 0.0, 1.0)
+
+
+@register
+class RankNormalizer(Normalizer):
+    """
+    Approximate percentile rank (share of values <= x): uniform scores whatever the distribution.
+    """
+    name = 'rank'
+
+    def __call__(self, values):
+        return self.sketch.rank(values)
+
+
+@register
+class LogNormalizer(Normalizer):
+    """
+    Min-max of log1p(x - min): compresses a long right tail while keeping the order and the extremes.
+    """
+    name = 'log'
+
+    def __call__(self, values):
+        low, high = self.sketch.min, self.sketch.max
+        if high <= low:
+            return np.zeros_like(values)
+        return np.log1p(np.maximum(values - low, 0.0)) / np.log1p(high - low)
+
+
+# 2. THE ENGINE
+class HealthScoreEngine:
+    """
+    District Health Index = sum of weight * normalized component (40 MBU compliance,
+    60 saturation by default, so scores run 0-100), computed at the district-aggregate grain.
+
+    Each component's distribution is held in a KLL sketch, so fitting is one pass with O(k)
+    memory and no sort of the full column: fit_cube() feeds the district means of a rollup
+    cube, and partial_fit() accepts any chunks of component values (e.g. per state or
+    per day), with merge() for sketches fitted elsewhere. The normalizer is picked by name
+    from NORMALIZERS ('quantile_clip', 'rank', 'log' or the original 'minmax'); extra keyword
+    options (e.g. lower=0.05, upper=0.95) are passed on to it.
+    """
+
+    def __init__(self, normalizer='quantile_clip', weights=HEALTH_WEIGHTS, grain=DISTRICT_GRAIN, k=200, **options):
+        if normalizer not in NORMALIZERS:
+            raise ValueError(f"Unknown normalizer '{normalizer}' (expected one of {sorted(NORMALIZERS)})")
+        self.normalizer = normalizer
+        self.weights = dict(weights)
+        self.grain = list(grain)
+        self.k = k
+        self.options = options
+        self.sketches = {name: KLLSketch(k) for name in self.weights}
+
+    def partial_fit(self, data):
+        for name, sketch in self.sketches.items():
+            sketch.update(np.asarray(data[name], dtype=np.float64))
+        return self
+
+    def merge(self, other):
+        for name, sketch in self.sketches.items():
+            sketch.merge(other.sketches[name])
+        return self
+
+    def fit_cube(self, cube, by=None):
+        """
+        (Re)fits the sketches on the component means of every group of the cube (districts by default).
+        """
+        self.sketches = {name: KLLSketch(self.k) for name in self.weights}
+        return self.partial_fit(cube.mean(list(self.weights), by or self.grain))
+
+    def normalizers(self):
+        return {name: NORMALIZERS[self.normalizer](sketch, **self.options) for name, sketch in self.sketches.items()}
+
+    def score(self, data):
+        """
+        Health score of every row of `data` (a frame or dict of component arrays).
+        """
+        normalizers = self.normalizers()
+        score = None
+        for name, weight in self.weights.items():
+            part = normalizers[name](np.asarray(data[name], dtype=np.float64)) * weight
+            score = part if score is None else score + part
+        return score
+
+    def score_cube(self, cube, by=None):
+        """
+        Health score per group of the cube, as a Series named 'health_score'.
+        """
+        means = cube.mean(list(self.weights), by or self.grain)
+        return pd.Series(self.score(means), index=means.index, name='health_score')
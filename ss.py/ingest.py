@@ -0,0 +1,304 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# Ingestion Engine: Streaming, Parallel ZIP Loading for the Aadhaar Streams
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+
+import os
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from geography import normalize_stream
+from merge import aggregate_collisions
+
+
+# 1. DECLARED SCHEMA FOR THE THREE STREAMS
+# Counts per pincode-day are small, so unsigned 16-bit integers are enough
+# (largest value seen so far is 16166 in demo_age_17_). Anything bigger fails
+# the overflow check in apply_schema instead of silently wrapping around.
+STREAM_SCHEMAS = {
+    'enrolment': {'age_0_5': 'uint16', 'age_5_17': 'uint16', 'age_18_greater': 'uint16'},
+    'demographic': {'demo_age_5_17': 'uint16', 'demo_age_17_': 'uint16'},
+    'biometric': {'bio_age_5_17': 'uint16', 'bio_age_17_': 'uint16'},
+}
+
+# Columns shared by every stream
+KEY_DTYPES = {'state': 'category', 'district': 'category', 'pincode': 'uint32'}
+DATE_FORMAT = '%d-%m-%Y'
+
+
+def list_csv_members(zip_path):
+    """
+    Returns the names of every CSV file stored inside the ZIP, in archive order.
+    """
+    with zipfile.ZipFile(zip_path, 'r') as z:
+        return [info.filename for info in z.infolist() if info.filename.endswith('.csv')]
+
+
+def parse_dates(values):
+    """
+    Parses dd-mm-YYYY strings once per distinct date instead of once per row.
+    Missing dates become NaT.
+    """
+    as_category = pd.Categorical(values)
+    parsed = pd.to_datetime(as_category.categories, format=DATE_FORMAT)
+    if not len(parsed):
+        return pd.DatetimeIndex([pd.NaT] * len(as_category))
+    # Code -1 marks a missing value; take() alone would wrap it around to the last date
+    return parsed.take(np.maximum(as_category.codes, 0)).where(as_category.codes >= 0)
+
+
+def integer_dtypes(stream):
+    """
+    Target dtypes of every integer column (counts and pincode) of a stream.
+    """
+    return dict(STREAM_SCHEMAS[stream], pincode=KEY_DTYPES['pincode'])
+
+
+def apply_schema(chunk, stream, member=''):
+    """
+    Narrows a freshly parsed chunk to the declared compact dtypes.
+    Raises OverflowError if a count or pincode does not fit its unsigned type.
+    """
+    for col, dtype in integer_dtypes(stream).items():
+        values = chunk[col].to_numpy()
+        limits = np.iinfo(dtype)
+        if len(values) and (values.min() < limits.min or values.max() > limits.max):
+            raise OverflowError(
+                f"{stream} {member}: '{col}' has values in [{values.min()}, {values.max()}], "
+                f"outside the {dtype} range of the schema"
+            )
+        chunk[col] = values.astype(dtype)
+
+    chunk['date'] = parse_dates(chunk['date'])
+    missing = chunk['date'].isna().to_numpy()
+    if missing.any():
+        # A row without a date has no place in any date-keyed merge or rollup
+        print(f"{stream} {member}: dropped {int(missing.sum()):,} rows without a date")
+        chunk = chunk.loc[~missing].reset_index(drop=True)
+    return chunk
+
+
+def read_member(zip_path, member, stream=None):
+    """
+    Decompresses and parses a single CSV member of the ZIP.
+    This runs inside a worker process, so each worker opens the archive itself
+    and only the parsed chunk travels back to the parent.
+    Known streams are typed with STREAM_SCHEMAS while parsing.
+    """
+    start = time.perf_counter()
+    with zipfile.ZipFile(zip_path, 'r') as z:
+        size_mb = z.getinfo(member).file_size / 1e6
+        with z.open(member) as f:
+            if stream in STREAM_SCHEMAS:
+                # Integers are parsed as int64 only long enough to be range-checked
+                dtypes = {col: 'int64' for col in integer_dtypes(stream)}
+                dtypes.update(state=KEY_DTYPES['state'], district=KEY_DTYPES['district'])
+                chunk = apply_schema(pd.read_csv(f, dtype=dtypes), stream, member)
+            else:
+                chunk = pd.read_csv(f)
+    seconds = time.perf_counter() - start
+
+    timing = {
+        'member': member,
+        'rows': len(chunk),
+        'size_mb': round(size_mb, 2),
+        'seconds': round(seconds, 3),
+        'rows_per_sec': int(len(chunk) / seconds) if seconds > 0 else 0,
+    }
+    return chunk, timing
+
+
+def iter_zip_chunks(sources, max_workers=None, max_pending=None):
+    """
+    Generator over the parsed CSV members of one or more ZIPs.
+    `sources` maps a stream name ('enrolment', 'demographic', ...) to its ZIP path.
+    Members of every ZIP share one process pool, so all streams load at the same time.
+    At most `max_pending` members (default: two per worker) are submitted or waiting to be
+    collected, and a finished future is dropped before its chunk is handed out, so only the
+    chunks the caller keeps stay in memory.
+    Yields (stream, member_position, chunk, timing) in completion order.
+    """
+    max_workers = max_workers or os.cpu_count()
+    max_pending = max_pending or 2 * max_workers
+    tasks = iter([(stream, zip_path, position, member)
+                  for stream, zip_path in sources.items()
+                  for position, member in enumerate(list_csv_members(zip_path))])
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {}
+
+        def submit_next():
+            for stream, zip_path, position, member in tasks:
+                futures[pool.submit(read_member, zip_path, member, stream)] = (stream, position)
+                return
+
+        for _ in range(max_pending):
+            submit_next()
+
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            while done:
+                future = done.pop()
+                stream, position = futures.pop(future)
+                chunk, timing = future.result()
+                del future
+                submit_next()
+                timing['stream'] = stream
+                print(f"Read {stream}: {timing['member']} ({timing['rows']:,} rows in {timing['seconds']:.2f}s)")
+                yield stream, position, chunk, timing
+                del chunk
+
+
+def concat_chunks(chunks, consume=False):
+    """
+    Combines typed chunks into one frame, one column at a time into a preallocated array.
+    The input frames are left untouched unless consume=True: then the caller hands the
+    chunks over, and each column is dropped from them as soon as it has been copied, so
+    peak memory stays near a single copy instead of every chunk plus the combined frame.
+    """
+    if not chunks:
+        return pd.DataFrame()
+
+    columns = list(chunks[0].columns)
+    total_rows = sum(len(chunk) for chunk in chunks)
+    combined = {}
+
+    for col in columns:
+        parts = [chunk.pop(col) if consume else chunk[col] for chunk in chunks]
+
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            if len({str(part.cat.categories.dtype) for part in parts}) > 1:
+                # Labels read back from Arrow files are strings, freshly cleaned ones may be objects
+                parts = [
+                    pd.Series(pd.Categorical.from_codes(part.cat.codes, pd.Index(part.cat.categories, dtype=object)))
+                    for part in parts
+                ]
+            combined[col] = pd.Series(union_categoricals(parts), name=col)
+        elif not all(isinstance(part.dtype, np.dtype) for part in parts):
+            # Extension dtypes (e.g. pandas strings) are combined one column at a time
+            combined[col] = pd.concat(parts, ignore_index=True)
+        else:
+            dtype = np.result_type(*[part.dtype for part in parts])
+            buffer = np.empty(total_rows, dtype=dtype)
+            offset = 0
+            for part in parts:
+                buffer[offset:offset + len(part)] = part.to_numpy()
+                offset += len(part)
+            combined[col] = buffer
+        del parts
+
+    # copy=False keeps each column as its own block instead of stacking them again
+    return pd.DataFrame(combined, columns=columns, copy=False)
+
+
+def load_streams(sources, max_workers=None):
+    """
+    Loads every stream in `sources` through the shared process pool.
+    Returns a dict of stream name -> DataFrame, and a per-member timing report.
+    Members are re-assembled in archive order so row order matches a serial read.
+    """
+    pending = {stream: {} for stream in sources}
+    timings = []
+
+    for stream, position, chunk, timing in iter_zip_chunks(sources, max_workers):
+        pending[stream][position] = chunk
+        timing['position'] = position
+        timings.append(timing)
+
+    frames = {}
+    for stream, by_position in pending.items():
+        ordered = [by_position.pop(position) for position in sorted(by_position)]
+        # The chunks belong to this function alone, so their columns can be released as they are copied
+        frames[stream] = concat_chunks(ordered, consume=True)
+
+    report = pd.DataFrame(timings, columns=['stream', 'position', 'member', 'rows', 'size_mb', 'seconds', 'rows_per_sec'])
+    report = report.sort_values(['stream', 'position']).reset_index(drop=True)
+    # Row offset of each member inside its combined stream (used for per-member reporting)
+    report['start_row'] = report.groupby('stream')['rows'].cumsum() - report['rows']
+    return frames, report
+
+
+def read_all_from_zip(zip_path, stream=None, max_workers=None):
+    """
+    Reads every CSV chunk of a single ZIP into one table (parallel drop-in for the old serial reader).
+    Pass `stream` ('enrolment', 'demographic' or 'biometric') to apply its compact schema.
+    """
+    frames, _ = load_streams({stream or 'data': zip_path}, max_workers)
+    return frames[stream or 'data']
+
+
+# 2. CLEANING STAGE (the part of the pipeline that the stream cache stores)
+# Bump CLEANING_VERSION whenever clean_stream changes what ends up in a cleaned frame,
+# so cached entries built by the old code are invalidated.
+CLEANING_VERSION = 3
+
+
+def row_fingerprints(df):
+    """
+    One 64-bit hash per row, built from the typed columns with vectorized hashing.
+    Categorical columns are hashed once per category and broadcast through their codes.
+    """
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def deduplicate(df, member_rows=None):
+    """
+    Removes exact duplicate rows using a single fingerprint pass.
+    The same fingerprints give the duplicate count and the rows to drop, so the data
+    is hashed once instead of once for duplicated().sum() and again for drop_duplicates().
+    `member_rows` (row count of each ZIP member, in order) splits the count by member.
+    Returns (clean_df, duplicates_per_member).
+    """
+    is_duplicate = pd.Series(row_fingerprints(df)).duplicated(keep='first').to_numpy()
+
+    if member_rows is None:
+        member_rows = [len(df)]
+    member_of_row = np.repeat(np.arange(len(member_rows)), member_rows)
+    per_member = np.bincount(member_of_row[is_duplicate], minlength=len(member_rows))
+
+    if is_duplicate.any():
+        df = df.loc[~is_duplicate].reset_index(drop=True)
+    return df, per_member
+
+
+def clean_stream(stream, df, timings=None):
+    """
+    Pre-merge cleaning of one freshly loaded stream:
+      1. remove exact duplicate rows (raw labels, one fingerprint pass),
+      2. normalize state/district labels (geography.normalize_stream),
+      3. sum the rows whose 4-key composite now collides, so keys are canonical and unique.
+    Returns (clean_df, metadata) where metadata records the raw row count, how many
+    duplicates came from each ZIP member (taken from the load timing report) and
+    how many rows were folded together after normalization.
+    """
+    raw_rows = len(df)
+    members = list(timings['member']) if timings is not None else ['all']
+    member_rows = list(timings['rows']) if timings is not None else None
+
+    df, per_member = deduplicate(df, member_rows)
+    unique_rows = len(df)
+    df = aggregate_collisions(normalize_stream(df))
+
+    return df, {
+        'stream': stream,
+        'raw_rows': raw_rows,
+        'duplicates': int(per_member.sum()),
+        'duplicates_by_member': {member: int(n) for member, n in zip(members, per_member)},
+        'collisions_merged': unique_rows - len(df),
+    }
+
+
+def duplicate_report(stream_meta):
+    """
+    Table of duplicate rows removed per stream and ZIP member.
+    """
+    rows = [
+        {'stream': stream, 'member': member, 'duplicates': n}
+        for stream, meta in stream_meta.items()
+        for member, n in meta.get('duplicates_by_member', {}).items()
+    ]
+    return pd.DataFrame(rows, columns=['stream', 'member', 'duplicates'])
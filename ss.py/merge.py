@@ -0,0 +1,239 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# Sort-Merge Join Engine for the 4-key Master Merge
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+
+import time
+
+import numpy as np
+import pandas as pd
+
+MERGE_KEYS = ['date', 'state', 'district', 'pincode']
+
+# Bit layout of the composite int64 key, most significant field first, so that
+# sorting the int64 keys sorts rows by (date, state, district, pincode)
+KEY_BITS = {'date': 16, 'state': 8, 'district': 12, 'pincode': 20}
+
+
+def shared_categories(frames, col):
+    """
+    Sorted union of the labels of `col` across all frames.
+    Sorting keeps the integer codes in the same order as the labels themselves.
+    """
+    labels = set()
+    for df in frames:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            labels.update(values.cat.categories)
+        else:
+            labels.update(values.unique())
+    return sorted(labels)
+
+
+def shared_codes(values, categories):
+    """
+    Codes of `values` in the shared category list. Categoricals are re-coded
+    through their (small) category list instead of hashing every row.
+    """
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype('category')
+    if (values.cat.codes.to_numpy() < 0).any():
+        raise ValueError(f"'{values.name}' has missing labels, which cannot be part of a merge key")
+    lookup = pd.Index(categories).get_indexer(values.cat.categories)
+    return lookup[values.cat.codes.to_numpy()]
+
+
+def check_width(name, codes):
+    limit = 1 << KEY_BITS[name]
+    if len(codes) and (codes.min() < 0 or codes.max() >= limit):
+        raise ValueError(f"'{name}' key field needs more than {KEY_BITS[name]} bits")
+
+
+def encode_keys(frames, keys=MERGE_KEYS):
+    """
+    Encodes the (date, state, district, pincode) key of every frame into one int64.
+    Returns (encoded_keys_per_frame, codebook) where the codebook decodes them back.
+    """
+    date_col, state_col, district_col, pincode_col = keys
+    codebook = {
+        'keys': list(keys),
+        'states': shared_categories(frames, state_col),
+        'districts': shared_categories(frames, district_col),
+        'date_dtype': frames[0][date_col].dtype,
+        'pincode_dtype': frames[0][pincode_col].dtype,
+    }
+    days = [df[date_col].to_numpy().astype('datetime64[D]').astype(np.int64) for df in frames]
+    codebook['date_base'] = min(int(d.min()) for d in days if len(d)) if any(len(d) for d in days) else 0
+
+    encoded = []
+    for df, day in zip(frames, days):
+        fields = {
+            'date': day - codebook['date_base'],
+            'state': shared_codes(df[state_col], codebook['states']).astype(np.int64),
+            'district': shared_codes(df[district_col], codebook['districts']).astype(np.int64),
+            'pincode': df[pincode_col].to_numpy().astype(np.int64),
+        }
+        key = np.zeros(len(df), dtype=np.int64)
+        for name, bits in KEY_BITS.items():
+            check_width(name, fields[name])
+            key = (key << bits) | fields[name]
+        encoded.append(key)
+    return encoded, codebook
+
+
+def decode_keys(encoded, codebook):
+    """
+    Turns encoded int64 keys back into the four key columns.
+    """
+    fields = {}
+    remaining = encoded
+    for name, bits in reversed(list(KEY_BITS.items())):
+        fields[name] = remaining & ((1 << bits) - 1)
+        remaining = remaining >> bits
+
+    date_col, state_col, district_col, pincode_col = codebook['keys']
+    days = (fields['date'] + codebook['date_base']).astype('datetime64[D]')
+    return {
+        date_col: days.astype(codebook['date_dtype']),
+        state_col: pd.Categorical.from_codes(fields['state'], categories=codebook['states']),
+        district_col: pd.Categorical.from_codes(fields['district'], categories=codebook['districts']),
+        pincode_col: fields['pincode'].astype(codebook['pincode_dtype']),
+    }
+
+
+def outer_join(frames, keys=MERGE_KEYS, count_dtype='uint32'):
+    """
+    Single-pass sort-merge FULL OUTER JOIN of any number of frames on the 4-key composite.
+    Produces the same rows as chaining pd.merge(..., how='outer') followed by fillna(0),
+    including the cartesian product when a key repeats inside a stream, but:
+      - keys are encoded to one int64 and sorted once across all frames,
+      - counts stay integer (widened to `count_dtype` so totals cannot wrap), missing -> 0.
+    """
+    encoded, codebook = encode_keys(frames, keys)
+    lengths = np.array([len(k) for k in encoded], dtype=np.int64)
+    n_streams = len(frames)
+
+    # 1. ONE STABLE SORT OVER ALL STREAMS
+    # Stability keeps equal keys grouped by stream (in input order) and by original row order.
+    all_keys = np.concatenate(encoded)
+    order = np.argsort(all_keys, kind='stable')
+    sorted_keys = all_keys[order]
+    stream_of = np.repeat(np.arange(n_streams), lengths)[order]
+    del all_keys
+
+    # 2. GROUP BOUNDARIES AND PER-STREAM MULTIPLICITY OF EVERY KEY
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    n_groups = len(starts)
+    group_of = np.repeat(np.arange(n_groups), np.diff(np.r_[starts, len(sorted_keys)]))
+    mult = np.bincount(group_of * n_streams + stream_of, minlength=n_groups * n_streams).reshape(n_groups, n_streams)
+    del group_of, stream_of
+
+    stream_offsets = np.r_[0, np.cumsum(lengths)[:-1]]
+    before = np.cumsum(mult, axis=1) - mult
+    unique_keys = mult.max(initial=0) <= 1
+
+    if unique_keys:
+        # Fast path: at most one row per key in every stream, so output row == key group
+        out_keys = sorted_keys[starts]
+    else:
+        # A stream without the key still contributes one (zero-filled) row, like an outer merge
+        width = np.maximum(mult, 1)
+        rows_per_group = width.prod(axis=1)
+        out_group = np.repeat(np.arange(n_groups), rows_per_group)
+        # Position of each output row inside its key group
+        within = np.arange(len(out_group)) - np.repeat(np.cumsum(rows_per_group) - rows_per_group, rows_per_group)
+        out_keys = sorted_keys[starts][out_group]
+
+    columns = decode_keys(out_keys, codebook)
+    n_out = len(out_keys)
+    del sorted_keys, out_keys
+
+    # 3. GATHER THE COUNT COLUMNS OF EVERY STREAM
+    for s, df in enumerate(frames):
+        if unique_keys:
+            present = mult[:, s] > 0
+            source = order[starts[present] + before[present, s]] - stream_offsets[s]
+        else:
+            inner = width[:, s + 1:].prod(axis=1)
+            pick = (within // inner[out_group]) % width[out_group, s]
+            present = mult[out_group, s] > 0
+            source = order[starts[out_group[present]] + before[out_group[present], s] + pick[present]] - stream_offsets[s]
+
+        for col in df.columns:
+            if col in keys:
+                continue
+            values = df[col].to_numpy()
+            dtype = np.promote_types(values.dtype, count_dtype) if values.dtype.kind in 'iub' else values.dtype
+            out = np.zeros(n_out, dtype=dtype)
+            out[present] = values[source]
+            columns[col] = out
+
+    return pd.DataFrame(columns, copy=False)
+
+
+def legacy_merge(frames, keys=MERGE_KEYS):
+    """
+    The original two-step pandas merge (kept for benchmarking and validation).
+    """
+    master = frames[0]
+    for df in frames[1:]:
+        master = pd.merge(master, df, on=keys, how='outer')
+    return master.fillna(0)
+
+
+def benchmark_merge(frames, keys=MERGE_KEYS):
+    """
+    Times the chained pd.merge + fillna(0) against outer_join and checks they agree.
+    """
+    start = time.perf_counter()
+    legacy = legacy_merge(frames, keys)
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    joined = outer_join(frames, keys)
+    join_seconds = time.perf_counter() - start
+
+    # Compare on a canonical row order with labels as plain strings
+    def canonical(df):
+        df = df.astype({keys[1]: str, keys[2]: str})
+        return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+    left, right = canonical(legacy), canonical(joined)
+    matches = left.shape == right.shape and all(
+        np.array_equal(left[col].to_numpy(), right[col].to_numpy()) for col in left.columns
+    )
+
+    report = {
+        'rows': len(joined),
+        'legacy_seconds': round(legacy_seconds, 3),
+        'sort_merge_seconds': round(join_seconds, 3),
+        'speedup': round(legacy_seconds / join_seconds, 2) if join_seconds > 0 else None,
+        'legacy_mb': round(float(legacy.memory_usage(deep=True).sum()) / 1e6, 1),
+        'sort_merge_mb': round(float(joined.memory_usage(deep=True).sum()) / 1e6, 1),
+        'identical': matches,
+    }
+    print(f"Merge benchmark: {report}")
+    return report
+
+
+def aggregate_collisions(df, keys=MERGE_KEYS, count_dtype='uint32'):
+    """
+    Sums the counts of rows that share the same 4-key composite, e.g. after
+    'ODISHA' and 'Odisha' were normalized to one label. Keys become unique per stream,
+    so the master merge is one-to-one. Row order follows first appearance of each key.
+    """
+    (encoded,), codebook = encode_keys([df], keys)
+    group, unique_keys = pd.factorize(encoded)
+    if len(unique_keys) == len(df):
+        # Same count dtype whether or not anything collided
+        return df.astype({col: count_dtype for col in df.columns if col not in keys})
+
+    columns = decode_keys(unique_keys, codebook)
+    for col in df.columns:
+        if col in keys:
+            continue
+        # bincount sums in float64, which is exact for integer totals far beyond uint32
+        sums = np.bincount(group, weights=df[col].to_numpy(), minlength=len(unique_keys))
+        if sums.max(initial=0) > np.iinfo(count_dtype).max:
+            raise OverflowError(f"'{col}' totals do not fit {count_dtype}")
+        columns[col] = sums.astype(count_dtype)
+    return pd.DataFrame(columns, copy=False)
@@ -0,0 +1,145 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# Metrics Engine: Declarative Registry + Fused, Blocked Evaluation of the Behavioral Indices
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+
+import numpy as np
+
+ENROL_COLS = ['age_0_5', 'age_5_17', 'age_18_greater']
+UPDATE_COLS = ['demo_age_5_17', 'demo_age_17_', 'bio_age_5_17', 'bio_age_17_']
+COUNT_COLS = ENROL_COLS + UPDATE_COLS
+
+# Rows per block of the fused pass: small enough that a block's inputs, scratch and
+# outputs stay in cache while every metric of that block is written.
+BLOCK_ROWS = 1 << 16
+
+
+class Metric:
+    """
+    One derived column, described declaratively instead of as pandas arithmetic.
+      - kind='total': sum of `terms` (count columns or other totals), stored as `count_dtype`.
+      - kind='ratio': sum(numerator) / (sum(denominator) + smoothing), stored as float.
+    Terms may name raw count columns or previously registered metrics.
+    """
+
+    def __init__(self, name, kind, terms=(), numerator=(), denominator=(), smoothing=1, description=''):
+        self.name = name
+        self.kind = kind
+        self.terms = list(terms)
+        self.numerator = list(numerator)
+        self.denominator = list(denominator)
+        self.smoothing = smoothing
+        self.description = description
+
+    @property
+    def inputs(self):
+        return self.terms + self.numerator + self.denominator
+
+    def __repr__(self):
+        return f"Metric({self.name!r}, kind={self.kind!r}, inputs={self.inputs})"
+
+
+METRICS = {}
+
+
+def register(metric):
+    """
+    Adds a metric to the registry. Its inputs must be count columns or metrics
+    registered before it, so registry order is always a valid evaluation order.
+    """
+    unknown = [col for col in metric.inputs if col not in COUNT_COLS and col not in METRICS]
+    if unknown:
+        raise ValueError(f"{metric.name}: unknown inputs {unknown}")
+    METRICS[metric.name] = metric
+    return metric
+
+
+# 1. RAW TOTALS
+register(Metric('total_enrol', 'total', terms=ENROL_COLS,
+                description='New enrolments across all age groups'))
+register(Metric('total_updates', 'total', terms=UPDATE_COLS,
+                description='Demographic + biometric updates'))
+register(Metric('total_activity', 'total', terms=['total_enrol', 'total_updates'],
+                description='Enrolments + updates'))
+
+# 2. BEHAVIORAL INDICES (+1 in every denominator prevents division by zero)
+register(Metric('mbu_compliance', 'ratio', numerator=['bio_age_5_17'], denominator=['age_5_17'],
+                description='School-age biometric updates per school-age enrolment'))
+register(Metric('saturation_ratio', 'ratio', numerator=['total_updates'], denominator=['total_activity'],
+                description='Share of activity that is maintenance rather than new enrolment'))
+register(Metric('mobility_index', 'ratio', numerator=['demo_age_17_'], denominator=['age_18_greater', 'demo_age_17_'],
+                description='Adult demographic updates relative to adult activity'))
+register(Metric('late_adopter_ratio', 'ratio', numerator=['age_18_greater'], denominator=['total_enrol'],
+                description='Adult enrolments as a share of all new enrolments'))
+
+
+def resolve(names=None):
+    """
+    The metrics needed to produce `names` (all registered metrics by default),
+    dependencies included, in evaluation order.
+    """
+    wanted = set(METRICS if names is None else names)
+    missing = wanted - set(METRICS)
+    if missing:
+        raise KeyError(f"Unregistered metrics: {sorted(missing)}")
+
+    # Walk the registry backwards so every dependency is seen after its consumer
+    for metric in reversed(list(METRICS.values())):
+        if metric.name in wanted:
+            wanted.update(col for col in metric.inputs if col in METRICS)
+    return [metric for name, metric in METRICS.items() if name in wanted]
+
+
+def compute_metrics(counts, names=None, dtype='float64', count_dtype='uint32', out=None, block_rows=BLOCK_ROWS):
+    """
+    Evaluates metrics over the count arrays in one fused pass.
+    `counts` maps count column -> 1-D array (a DataFrame works too).
+    Rows are processed in blocks; inside a block every total is summed once into an
+    int64 scratch buffer and reused by every ratio that needs it, and results are
+    written straight into the output arrays, so no full-length temporaries are created.
+    `dtype` is the float type of the ratios ('float32' halves their memory).
+    `out` may supply preallocated arrays (e.g. columns of a previous run) to write into.
+    Returns a dict of metric name -> array.
+    """
+    plan = resolve(names)
+    n_rows = len(counts[COUNT_COLS[0]])
+    arrays = {col: np.asarray(counts[col]) for col in {c for m in plan for c in m.inputs if c in COUNT_COLS}}
+
+    results = dict(out or {})
+    for metric in plan:
+        target = count_dtype if metric.kind == 'total' else dtype
+        if metric.name not in results or results[metric.name].shape != (n_rows,) or results[metric.name].dtype != target:
+            results[metric.name] = np.empty(n_rows, dtype=target)
+    total_limit = np.iinfo(count_dtype).max
+
+    block = min(block_rows, n_rows) or 1
+    scratch_int = {m.name: np.empty(block, dtype=np.int64) for m in plan if m.kind == 'total'}
+    num = np.empty(block, dtype=dtype)
+    den = np.empty(block, dtype=dtype)
+
+    for start in range(0, n_rows, block):
+        stop = min(start + block, n_rows)
+        size = stop - start
+        local = {col: values[start:stop] for col, values in arrays.items()}
+
+        for metric in plan:
+            if metric.kind == 'total':
+                acc = scratch_int[metric.name][:size]
+                acc[:] = local[metric.terms[0]]
+                for col in metric.terms[1:]:
+                    np.add(acc, local[col], out=acc)
+                if size and acc.max() > total_limit:
+                    raise OverflowError(f"'{metric.name}' does not fit {count_dtype}")
+                results[metric.name][start:stop] = acc
+                local[metric.name] = acc
+            else:
+                n, d = num[:size], den[:size]
+                n[:] = local[metric.numerator[0]]
+                for col in metric.numerator[1:]:
+                    np.add(n, local[col], out=n)
+                d[:] = local[metric.denominator[0]]
+                for col in metric.denominator[1:]:
+                    np.add(d, local[col], out=d)
+                np.add(d, metric.smoothing, out=d)
+                np.divide(n, d, out=results[metric.name][start:stop])
+
+    return results
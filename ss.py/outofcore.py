@@ -0,0 +1,270 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# Out-of-Core Pipeline: Pincode-Partitioned, Disk-Spilling Run Within a Memory Budget
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+
+import glob
+import math
+import os
+import shutil
+import time
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from geography import PincodeIndex, normalize_stream
+from ingest import STREAM_SCHEMAS, concat_chunks, deduplicate, iter_zip_chunks, list_csv_members
+from merge import MERGE_KEYS, aggregate_collisions, outer_join
+from rollup import DISTRICT_DAY_GRAIN, PINCODE_GRAIN, RollupCube
+from stats import SummaryStats
+
+# Peak working set of one partition relative to the CSV bytes it came from
+# (typed frames, fingerprints, the merge's int64 keys and sort order, rollup scratch).
+WORKING_SET_PER_CSV_BYTE = 1.5
+
+# Multiplicative hash of the pincode (Knuth), so neighbouring pincodes spread over partitions
+PINCODE_HASH = np.uint64(2654435761)
+
+
+# 1. PARTITION PLANNING
+def csv_bytes(zip_path):
+    """
+    Uncompressed size of every CSV member of a ZIP, in archive order.
+    """
+    members = set(list_csv_members(zip_path))
+    with zipfile.ZipFile(zip_path, 'r') as z:
+        return [info.file_size for info in z.infolist() if info.filename in members]
+
+
+def plan_partitions(sources, memory_budget_mb):
+    """
+    Number of pincode partitions so that one partition of all three streams, plus the
+    ZIP members being parsed, fits in the memory budget.
+    Ingestion keeps at most `max_workers` members pending (parsing or waiting to be
+    collected) plus the one being spilled, so that is what the budget is planned for.
+    Returns (n_partitions, max_workers).
+    """
+    budget = memory_budget_mb * 1e6
+    sizes = [size for zip_path in sources.values() for size in csv_bytes(zip_path)]
+    largest_member = max(sizes, default=0) * WORKING_SET_PER_CSV_BYTE
+
+    # Half the budget for members in flight during ingestion, half for one partition afterwards
+    in_flight = (budget / 2) // max(largest_member, 1)
+    max_workers = int(max(1, min(os.cpu_count(), in_flight - 1)))
+    n_partitions = max(1, math.ceil(sum(sizes) * WORKING_SET_PER_CSV_BYTE / (budget / 2)))
+    return n_partitions, max_workers
+
+
+def partition_of(pincodes, n_partitions):
+    """
+    Partition number of every row. All rows of a pincode land in the same partition, so
+    exact duplicates, the 4-key merge and the pincode-grain rollup never cross partitions.
+    """
+    hashed = (pincodes.astype(np.uint64) * PINCODE_HASH) & np.uint64(0xFFFFFFFF)
+    return (hashed % np.uint64(n_partitions)).astype(np.int64)
+
+
+def empty_stream(stream, reference, keys=MERGE_KEYS):
+    """
+    Zero-row frame with the key columns of `reference` and this stream's count columns,
+    for a stream that has no rows in a partition.
+    """
+    columns = {col: reference[col].iloc[:0] for col in keys}
+    columns.update({col: pd.Series([], dtype=dtype) for col, dtype in STREAM_SCHEMAS[stream].items()})
+    return pd.DataFrame(columns)
+
+
+# 2. SPILL FILES
+def spill(df, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    feather.write_feather(table, path + '.tmp', compression='uncompressed')
+    os.replace(path + '.tmp', path)
+
+
+def read_spilled(path):
+    """
+    Reads a spill file fully into memory (not memory-mapped, so it can be deleted right away).
+    """
+    return feather.read_table(path, memory_map=False).to_pandas(split_blocks=True)
+
+
+class OutOfCoreRun:
+    """
+    Runs ingestion -> dedup -> normalization -> pincode repair -> 4-key merge -> rollups
+    without ever holding more than one pincode partition of the data in memory.
+
+      Pass 0 (ingest):   ZIP members are parsed in the process pool as usual; every typed
+                         chunk is split by hash(pincode) and spilled to Arrow files.
+      Pass 1 (clean):    per partition and stream: fingerprint dedup, label normalization and
+                         collision folding (exactly clean_stream); the pincode index is
+                         tallied and the summary statistics (stats.py) fed across all
+                         partitions; cleaned partitions are spilled.
+      Pass 2 (merge):    per partition: repair with the global pincode index, fold collisions,
+                         sort-merge outer join of the three streams, rollup cells.
+                         Merged partitions are spilled as the out-of-core master_df.
+
+    Every step is partition-local because all rows of a pincode share a partition, except
+    the pincode index (a global tally, small) and the district-day rollup, whose partial
+    cells are combined exactly with RollupCube.combine. Results therefore equal the
+    in-memory path.
+
+    `normalizer` (e.g. geography.title_normalizer) is applied to the merged state/district
+    labels of every partition before the rollups, as dd.py does to master_df.
+    """
+
+    def __init__(self, sources, spill_dir, memory_budget_mb=2048, n_partitions=None, max_workers=None, normalizer=None):
+        self.sources = dict(sources)
+        self.spill_dir = spill_dir
+        self.memory_budget_mb = memory_budget_mb
+        planned_partitions, planned_workers = plan_partitions(self.sources, memory_budget_mb)
+        self.n_partitions = n_partitions or planned_partitions
+        self.max_workers = max_workers or planned_workers
+        self.normalizer = normalizer
+        self.pincode_index = PincodeIndex()
+        self.stream_meta = {}
+        self.summaries = {stream: SummaryStats() for stream in self.sources}
+        self.repaired = {stream: 0 for stream in self.sources}
+        self.timings = {}
+
+    def path(self, stage, stream, partition, part=None):
+        name = f"p{partition:04d}" if part is None else os.path.join(f"p{partition:04d}", f"{part:05d}")
+        return os.path.join(self.spill_dir, stage, stream, name + '.arrow')
+
+    # PASS 0
+    def ingest(self):
+        """
+        Parses every ZIP member and spills it split by pincode partition.
+        Returns {stream: member names in archive order} for the per-member duplicate report.
+        """
+        member_names = {stream: {} for stream in self.sources}
+        # One pending member per worker (not the default two), as plan_partitions budgets
+        chunks = iter_zip_chunks(self.sources, self.max_workers, max_pending=self.max_workers)
+        for stream, position, chunk, timing in chunks:
+            member_names[stream][position] = timing['member']
+
+            parts = partition_of(chunk['pincode'].to_numpy(), self.n_partitions)
+            order = np.argsort(parts, kind='stable')
+            bounds = np.searchsorted(parts[order], np.arange(self.n_partitions + 1))
+            for partition in range(self.n_partitions):
+                rows = order[bounds[partition]:bounds[partition + 1]]
+                if len(rows):
+                    piece = chunk.take(rows).reset_index(drop=True)
+                    spill(piece, self.path('raw', stream, partition, position))
+            del chunk
+
+        return {
+            stream: [member_names[stream][p] for p in sorted(member_names[stream])]
+            for stream in self.sources
+        }
+
+    # PASS 1
+    def clean(self, members):
+        """
+        clean_stream, partition by partition. Also tallies the global pincode index.
+        """
+        for stream in self.sources:
+            self.stream_meta[stream] = {
+                'stream': stream, 'raw_rows': 0, 'duplicates': 0,
+                'duplicates_by_member': {member: 0 for member in members[stream]}, 'collisions_merged': 0,
+            }
+
+        for partition in range(self.n_partitions):
+            for stream in self.sources:
+                paths = sorted(glob.glob(os.path.join(os.path.dirname(self.path('raw', stream, partition, 0)), '*.arrow')))
+                if not paths:
+                    continue
+                positions = [int(os.path.basename(p)[:-len('.arrow')]) for p in paths]
+                pieces = [read_spilled(p) for p in paths]
+                piece_rows = [len(piece) for piece in pieces]
+                # The spilled pieces are read only for this, so their columns are released as they are copied
+                df = concat_chunks(pieces, consume=True)
+                del pieces
+
+                meta = self.stream_meta[stream]
+                meta['raw_rows'] += len(df)
+                df, per_piece = deduplicate(df, piece_rows)
+                for position, n in zip(positions, per_piece):
+                    meta['duplicates_by_member'][members[stream][position]] += int(n)
+                meta['duplicates'] += int(per_piece.sum())
+
+                unique_rows = len(df)
+                df = aggregate_collisions(normalize_stream(df))
+                meta['collisions_merged'] += unique_rows - len(df)
+
+                self.pincode_index.update(df)
+                self.summaries[stream].update(df)
+                spill(df, self.path('clean', stream, partition))
+                del df
+                shutil.rmtree(os.path.dirname(paths[0]))
+
+    # PASS 2
+    def merge(self, keys=MERGE_KEYS):
+        """
+        Repair, merge and roll up every partition. Returns the two rollup cubes.
+        """
+        district_parts, pincode_parts = [], []
+        for partition in range(self.n_partitions):
+            frames = []
+            for stream in self.sources:
+                path = self.path('clean', stream, partition)
+                if os.path.exists(path):
+                    df, fixed = self.pincode_index.repair(read_spilled(path))
+                    self.repaired[stream] += fixed
+                    frames.append(aggregate_collisions(df))
+                    os.remove(path)
+                else:
+                    frames.append(None)
+
+            present = [df for df in frames if df is not None]
+            if not present:
+                continue
+            # A stream with no rows in this partition still contributes its (all-zero) columns
+            frames = [df if df is not None else empty_stream(stream, present[0], keys) for stream, df in zip(self.sources, frames)]
+
+            master_part = outer_join(frames, keys)
+            if self.normalizer is not None:
+                for col in (keys[1], keys[2]):
+                    master_part[col] = self.normalizer.normalize(master_part[col])
+            district_parts.append(RollupCube.build(master_part, DISTRICT_DAY_GRAIN))
+            pincode_parts.append(RollupCube.build(master_part, PINCODE_GRAIN))
+            spill(master_part, self.path('master', 'master', partition))
+            del master_part, frames
+
+        district_cube = RollupCube.combine(district_parts, DISTRICT_DAY_GRAIN)
+        pincode_cube = RollupCube.combine(pincode_parts, PINCODE_GRAIN)
+        return district_cube, pincode_cube
+
+    def run(self):
+        """
+        Runs all passes. Returns (district_cube, pincode_cube).
+        """
+        for stage in ('raw', 'clean', 'master'):
+            shutil.rmtree(os.path.join(self.spill_dir, stage), ignore_errors=True)
+        print(f"Out-of-core run: {self.n_partitions} pincode partitions, {self.max_workers} ingest workers, "
+              f"budget {self.memory_budget_mb} MB")
+
+        start = time.perf_counter()
+        members = self.ingest()
+        self.timings['ingest'] = round(time.perf_counter() - start, 2)
+
+        start = time.perf_counter()
+        self.clean(members)
+        self.timings['clean'] = round(time.perf_counter() - start, 2)
+
+        start = time.perf_counter()
+        cubes = self.merge()
+        self.timings['merge'] = round(time.perf_counter() - start, 2)
+        print(f"Out-of-core passes (s): {self.timings}")
+
+        self.pincode_index.save(os.path.join(self.spill_dir, 'pincode_index.npz'))
+        return cubes
+
+    def iter_master(self):
+        """
+        Yields the merged master_df one partition at a time (from the spill files).
+        """
+        for path in sorted(glob.glob(os.path.join(self.spill_dir, 'master', 'master', '*.arrow'))):
+            yield read_spilled(path)
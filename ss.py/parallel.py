@@ -0,0 +1,163 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# State-Sharded Parallel Executor: Rollups over Shared Memory in a Process Pool
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from merge import MERGE_KEYS, encode_keys
+from metrics import COUNT_COLS
+from rollup import DISTRICT_DAY_GRAIN, RATIO_COLS, RollupCube, aggregate_cells
+
+# Shards per worker: a few more shards than workers lets the pool even out the large
+# states (Uttar Pradesh, Maharashtra, ...) against the small ones
+SHARDS_PER_WORKER = 4
+
+
+# 1. SHARED-MEMORY COLUMNS
+def share_arrays(arrays):
+    """
+    Copies each array into its own shared-memory block.
+    Returns (blocks, spec) where spec = {name: (block_name, dtype, length)} is what workers
+    need to attach; the parent keeps `blocks` alive and unlinks them when done.
+    """
+    blocks, spec = [], {}
+    for name, values in arrays.items():
+        block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+        blocks.append(block)
+        spec[name] = (block.name, values.dtype.str, len(values))
+    return blocks, spec
+
+
+def attach_arrays(spec):
+    """
+    Worker side of share_arrays: zero-copy views onto the parent's blocks.
+    """
+    blocks, arrays = [], {}
+    for name, (block_name, dtype, length) in spec.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray((length,), dtype=np.dtype(dtype), buffer=block.buf)
+    return blocks, arrays
+
+
+def aggregate_shard(spec, start, stop, codebook, grain, counts, ratios, keys):
+    """
+    Worker: rollup cells of rows [start, stop) of the state-ordered shared columns.
+    Only the (small) cell table travels back to the parent.
+    """
+    begin = time.perf_counter()
+    blocks, arrays = attach_arrays(spec)
+    try:
+        shard = {name: values[start:stop] for name, values in arrays.items()}
+        cells = pd.DataFrame(aggregate_cells(shard.pop('__key__'), shard, codebook, grain, counts, ratios, keys), copy=False)
+        # The views must be gone before the blocks can be closed
+        del shard
+    finally:
+        del arrays
+        for block in blocks:
+            block.close()
+    return cells, {'rows': stop - start, 'cells': len(cells), 'seconds': round(time.perf_counter() - begin, 3)}
+
+
+# 2. THE EXECUTOR
+class StateShardExecutor:
+    """
+    Runs rollup aggregations of master_df in a process pool, one shard per state.
+    The frame is staged once: rows are ordered by state (a counting sort on the state codes),
+    and the packed merge key plus every count column go into shared memory, so workers read
+    their slice without pickling millions of rows. States far larger than the average shard
+    are split into row ranges. Each worker computes the ratios and cell statistics of its
+    shard; the parent combines the cells with RollupCube.combine, which adds sums and row
+    counts and takes mins and maxes, so means of ratios come out exactly as in the serial build.
+
+        with StateShardExecutor(master_df) as executor:
+            district_cube = executor.build(DISTRICT_DAY_GRAIN)
+    """
+
+    def __init__(self, df, max_workers=None, counts=COUNT_COLS, ratios=RATIO_COLS, keys=MERGE_KEYS):
+        self.max_workers = max_workers or os.cpu_count()
+        self.counts = list(counts)
+        self.ratios = list(ratios)
+        self.keys = list(keys)
+
+        (encoded,), self.codebook = encode_keys([df], keys)
+        state_codes = df[keys[1]].cat.codes.to_numpy() if isinstance(df[keys[1]].dtype, pd.CategoricalDtype) \
+            else pd.factorize(df[keys[1]])[0]
+        order = np.argsort(state_codes, kind='stable')
+        rows_per_state = np.bincount(state_codes, minlength=state_codes.max(initial=-1) + 1)
+
+        arrays = {'__key__': encoded[order]}
+        for col in self.counts:
+            arrays[col] = df[col].to_numpy()[order]
+        del encoded, order
+        self.blocks, self.spec = share_arrays(arrays)
+        del arrays
+
+        self.shards = self.plan_shards(rows_per_state)
+        self.pool = None
+        self.timings = []
+
+    def plan_shards(self, rows_per_state):
+        """
+        (start, stop) row ranges: one per state, with oversized states cut into equal pieces.
+        Largest shards come first so the pool starts on the long tasks.
+        """
+        total = int(rows_per_state.sum())
+        target = max(total // (self.max_workers * SHARDS_PER_WORKER), 1)
+        shards, offset = [], 0
+        for rows in rows_per_state:
+            rows = int(rows)
+            pieces = max(-(-rows // target), 1)
+            edges = np.linspace(offset, offset + rows, pieces + 1).astype(np.int64)
+            shards.extend((int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a)
+            offset += rows
+        return sorted(shards, key=lambda shard: shard[0] - shard[1])
+
+    def __enter__(self):
+        self.pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def build(self, grain=DISTRICT_DAY_GRAIN):
+        """
+        RollupCube of the staged frame at `grain`, computed shard by shard in the pool.
+        """
+        if self.pool is None:
+            raise RuntimeError("StateShardExecutor must be used as a context manager (with ...:)")
+        start = time.perf_counter()
+        futures = [
+            self.pool.submit(aggregate_shard, self.spec, a, b, self.codebook, list(grain), self.counts, self.ratios, self.keys)
+            for a, b in self.shards
+        ]
+        parts = []
+        for future in futures:
+            cells, timing = future.result()
+            timing['grain'] = '/'.join(grain)
+            self.timings.append(timing)
+            parts.append(RollupCube(cells, grain, self.counts, self.ratios))
+
+        cube = RollupCube.combine(parts, grain, self.counts, self.ratios)
+        print(f"Parallel rollup {'/'.join(grain)}: {len(self.shards)} shards on {self.max_workers} workers, "
+              f"{len(cube):,} cells in {time.perf_counter() - start:.2f}s")
+        return cube
+
+    def timing_report(self):
+        return pd.DataFrame(self.timings, columns=['grain', 'rows', 'cells', 'seconds'])
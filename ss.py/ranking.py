@@ -0,0 +1,94 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# Ranking API: Top-K / Bottom-K by Partial Selection with Deterministic Tie-Breaking
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+
+def select_positions(values, k, largest=True):
+    """
+    Positions of the k largest (or smallest) values in O(n) with np.partition.
+    Ties are resolved by position so the answer is always the same: among equal values
+    the earlier position ranks higher. The result follows the full ranking order
+    (value descending, then position ascending), i.e. it is exactly what head(k) / tail(k)
+    of that order would return.
+    """
+    n = len(values)
+    k = min(k, n)
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # Everything strictly beyond the k-th value is in; the k-th value itself may be tied,
+    # and at least one of its copies is always needed to reach k
+    if largest:
+        threshold = np.partition(values, n - k)[n - k]
+        chosen = np.flatnonzero(values > threshold)
+        ties = np.flatnonzero(values == threshold)
+        ties = ties[:k - len(chosen)]
+    else:
+        threshold = np.partition(values, k - 1)[k - 1]
+        chosen = np.flatnonzero(values < threshold)
+        ties = np.flatnonzero(values == threshold)
+        # The lowest ranks go to the latest positions among the tied values
+        ties = ties[len(ties) - (k - len(chosen)):]
+
+    picked = np.concatenate([chosen, ties])
+    return picked[np.lexsort((picked, -values[picked]))]
+
+
+class Ranking:
+    """
+    Ranks the entries of a Series (e.g. district means from the rollup cube) by value,
+    highest first. Only the requested extremes are ever ordered:
+    top(k) / bottom(k) partition in O(n) and sort just the k selected rows.
+    `k` may be an int or a list of ints; a list is answered from one selection of the
+    largest k and returns {k: frame}. NaN scores are left out of the ranking.
+    Frames are indexed by rank (1 = best, n = worst) with the group labels as columns.
+    """
+
+    def __init__(self, scores, name=None):
+        scores = scores.dropna()
+        self.name = name or scores.name or 'score'
+        self.labels = scores.index
+        self.values = scores.to_numpy(dtype=np.float64)
+
+    def __len__(self):
+        return len(self.values)
+
+    def frame(self, positions, ranks):
+        rows = self.labels[positions].to_frame(index=False)
+        rows[self.name] = self.values[positions]
+        rows.index = pd.Index(ranks, name='rank')
+        return rows
+
+    def top(self, k):
+        if not isinstance(k, (int, np.integer)):
+            ks = sorted(set(k))
+            best = self.top(ks[-1]) if ks else self.frame([], [])
+            return {size: best.iloc[:size] for size in ks}
+        positions = select_positions(self.values, k, largest=True)
+        return self.frame(positions, np.arange(1, len(positions) + 1))
+
+    def bottom(self, k):
+        if not isinstance(k, (int, np.integer)):
+            ks = sorted(set(k))
+            worst = self.bottom(ks[-1]) if ks else self.frame([], [])
+            return {size: worst.iloc[max(len(worst) - size, 0):] for size in ks}
+        positions = select_positions(self.values, k, largest=False)
+        n = len(self.values)
+        return self.frame(positions, np.arange(n - len(positions) + 1, n + 1))
+
+    def extremes(self, ks=(5, 10)):
+        """
+        {k: (top_k, bottom_k)} for several k values at once (one selection per side).
+        """
+        tops, bottoms = self.top(list(ks)), self.bottom(list(ks))
+        return {k: (tops[k], bottoms[k]) for k in ks}
+
+    def full(self):
+        """
+        The complete ranking (e.g. for CSV export), in the same order as top/bottom.
+        """
+        positions = np.lexsort((np.arange(len(self.values)), -self.values))
+        return self.frame(positions, np.arange(1, len(positions) + 1))
@@ -0,0 +1,312 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# Incremental Daily Refresh: Date-Partitioned State, Delta Rollups and Re-Emitted Rankings
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from cache import file_digest, mapping_digest
+from geography import PincodeIndex, normalize_stream
+from ingest import CLEANING_VERSION, STREAM_SCHEMAS, concat_chunks, deduplicate, load_streams, row_fingerprints
+from merge import MERGE_KEYS, aggregate_collisions, outer_join
+from outofcore import empty_stream
+from ranking import Ranking
+from rollup import DISTRICT_DAY_GRAIN, DISTRICT_GRAIN, HEALTH_WEIGHTS, RollupCube
+from windows import WindowedIndices
+
+MANIFEST_NAME = 'manifest.json'
+
+# Layout of the state directory; bumped when the files it holds change meaning
+STATE_VERSION = 2
+
+
+# 1. STATE FILES
+def write_frame(df, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    feather.write_feather(table, path + '.tmp', compression='uncompressed')
+    os.replace(path + '.tmp', path)
+
+
+def read_frame(path):
+    return feather.read_table(path, memory_map=False).to_pandas(split_blocks=True)
+
+
+def write_hashes(hashes, path):
+    with open(path + '.tmp', 'wb') as f:
+        np.save(f, hashes)
+    os.replace(path + '.tmp', path)
+
+
+def split_by_date(df):
+    """
+    Yields (date, rows of that date) for every date present in a stream frame.
+    """
+    codes, dates = pd.factorize(df['date'], sort=True)
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(dates) + 1))
+    for i, date in enumerate(dates):
+        yield pd.Timestamp(date), df.take(order[bounds[i]:bounds[i + 1]]).reset_index(drop=True)
+
+
+class IncrementalRefresh:
+    """
+    Keeps the pipeline's results up to date as new daily ZIPs arrive, without re-reading
+    the files that were already processed.
+
+    The state directory holds:
+      - manifest.json: the content hash of every ingested ZIP, the path, size and mtime it was
+        last seen with, the dates held per stream, and the cleaning version / mapping tables
+        the state was built with,
+      - streams/{stream}/{date}.arrow: cleaned rows of every stream, one file per date,
+      - streams/{stream}/{date}.hashes.npy: fingerprints of the raw rows behind each date file,
+      - the pincode index tallies, the district-day rollup cells and the district cells,
+      - windows.npz: daily prefix sums of the indices (windows.py), for weekly/monthly/rolling views.
+
+    refresh(sources) loads only ZIPs whose hash is new; a ZIP whose path, size and mtime are
+    unchanged since it was ingested is not even hashed again. Their rows are folded into the
+    date partitions they belong to (exact duplicates of raw rows already held are dropped), and
+    only those dates are repaired, merged and rolled up again. The delta cells replace the
+    cells of the touched dates; the district cells are updated by adding the delta when
+    only new dates arrived, and re-rolled from the day cells when an existing date was revised.
+
+    health_score min-max bounds are the min/max over the district cells, so a new extreme only
+    re-applies the linear scaling to the ~1,000 district means, never to rows. With a
+    HealthScoreEngine (`engine`), its sketches are refitted on those district means instead.
+    The first refresh on an empty state directory is a full build.
+    Dates that were not touched keep the pincode repair they got when they were merged;
+    a full rebuild (new state directory) re-applies the latest index everywhere.
+    """
+
+    def __init__(self, state_dir, mappings=(), normalizer=None, max_workers=None, engine=None):
+        self.state_dir = state_dir
+        self.normalizer = normalizer
+        self.engine = engine
+        self.max_workers = max_workers
+        self.mapping_key = mapping_digest(*mappings)
+        self.manifest = self.load_manifest()
+
+        self.pincode_index = PincodeIndex.load(self.path('pincode_index.npz')) \
+            if os.path.exists(self.path('pincode_index.npz')) else PincodeIndex()
+        self.day_cube = self.load_cube('district_day.arrow', DISTRICT_DAY_GRAIN)
+        self.district_cube = self.load_cube('district.arrow', DISTRICT_GRAIN)
+        self.windows = WindowedIndices.load(self.path('windows.npz')) \
+            if os.path.exists(self.path('windows.npz')) else WindowedIndices()
+        self.timings = {}
+
+    def path(self, *parts):
+        return os.path.join(self.state_dir, *parts)
+
+    def date_path(self, stream, date):
+        return self.path('streams', stream, f"{date:%Y-%m-%d}.arrow")
+
+    def hash_path(self, stream, date):
+        return self.path('streams', stream, f"{date:%Y-%m-%d}.hashes.npy")
+
+    def load_manifest(self):
+        empty = {'version': CLEANING_VERSION, 'state_version': STATE_VERSION, 'mappings': self.mapping_key,
+                 'files': {stream: {} for stream in STREAM_SCHEMAS},
+                 'seen': {stream: {} for stream in STREAM_SCHEMAS},
+                 'dates': {stream: [] for stream in STREAM_SCHEMAS}}
+        if not os.path.exists(self.path(MANIFEST_NAME)):
+            return empty
+        with open(self.path(MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if (manifest['version'] != CLEANING_VERSION or manifest.get('state_version') != STATE_VERSION
+                or manifest['mappings'] != self.mapping_key):
+            raise ValueError(
+                f"State in {self.state_dir} was built with other cleaning code, state layout or mapping tables; "
+                "run a full rebuild into a new state directory"
+            )
+        # States written before file stamps were kept hash their ZIPs once more, then are stamped
+        manifest.setdefault('seen', {stream: {} for stream in STREAM_SCHEMAS})
+        return manifest
+
+    def load_cube(self, name, grain):
+        if not os.path.exists(self.path(name)):
+            return None
+        return RollupCube(read_frame(self.path(name)), grain)
+
+    def save(self):
+        os.makedirs(self.state_dir, exist_ok=True)
+        self.pincode_index.save(self.path('pincode_index.npz'))
+        write_frame(self.day_cube.cells, self.path('district_day.arrow'))
+        write_frame(self.district_cube.cells, self.path('district.arrow'))
+        if self.windows.dates is not None:
+            self.windows.save(self.path('windows.npz'))
+        self.save_manifest()
+
+    def save_manifest(self):
+        os.makedirs(self.state_dir, exist_ok=True)
+        with open(self.path(MANIFEST_NAME + '.tmp'), 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(self.path(MANIFEST_NAME + '.tmp'), self.path(MANIFEST_NAME))
+
+    # 2. INGEST ONLY NEW FILES
+    def stamp(self, zip_path):
+        stat = os.stat(zip_path)
+        return os.path.abspath(zip_path), [stat.st_size, stat.st_mtime_ns]
+
+    def new_files(self, sources):
+        """
+        {stream: [(zip_path, digest), ...]} for the ZIPs that were not ingested before.
+        `sources` maps each stream to a ZIP path or a list of them.
+        A ZIP seen before with the same path, size and mtime is skipped without hashing;
+        only new or changed files are hashed. A changed file whose content was ingested
+        already (copied or touched) is re-stamped and skipped.
+        Returns (pending, restamped) where `restamped` tells whether any stamp changed.
+        """
+        pending, restamped = {}, False
+        for stream, paths in sources.items():
+            seen = self.manifest['seen'][stream]
+            for zip_path in [paths] if isinstance(paths, str) else paths:
+                key, stamp = self.stamp(zip_path)
+                if seen.get(key, {}).get('stamp') == stamp:
+                    continue
+                digest = file_digest(zip_path)
+                if digest in self.manifest['files'][stream]:
+                    seen[key] = {'stamp': stamp, 'digest': digest}
+                    restamped = True
+                else:
+                    pending.setdefault(stream, []).append((zip_path, digest))
+        return pending, restamped
+
+    def ingest(self, pending):
+        """
+        Loads, de-duplicates and folds the new ZIPs into their date partitions.
+        Returns the set of dates whose rows changed.
+        """
+        touched = set()
+        while any(pending.values()):
+            # One ZIP per stream per round, so every round shares the process pool
+            batch = {stream: files.pop(0) for stream, files in pending.items() if files}
+            frames, _ = load_streams({stream: zip_path for stream, (zip_path, _) in batch.items()}, self.max_workers)
+            for stream, (zip_path, digest) in batch.items():
+                df, _ = deduplicate(frames.pop(stream))
+                touched |= self.fold(stream, df)
+                self.manifest['files'][stream][digest] = os.path.basename(zip_path)
+                key, stamp = self.stamp(zip_path)
+                self.manifest['seen'][stream][key] = {'stamp': stamp, 'digest': digest}
+        return touched
+
+    def fold(self, stream, df):
+        """
+        Adds raw (de-duplicated, not yet normalized) rows to the date partitions of one stream.
+        The stored rows are normalized and collision-summed, so they cannot be compared with raw
+        rows; each partition keeps the fingerprints of the raw rows it holds instead, and rows
+        already held (re-delivered files) are dropped against those before any cleaning.
+        The rows that are really new are normalized, summed per key, vote in the pincode index
+        and are added to the partition.
+        """
+        touched = set()
+        held = set(self.manifest['dates'][stream])
+        for date, rows in split_by_date(df):
+            path, hash_path = self.date_path(stream, date), self.hash_path(stream, date)
+            stored = date.strftime('%Y-%m-%d') in held and os.path.exists(path)
+            known = np.load(hash_path) if stored else np.empty(0, dtype=np.uint64)
+            hashes = row_fingerprints(rows)
+            new = ~np.isin(hashes, known)
+            if not new.any():
+                continue
+            fresh = aggregate_collisions(normalize_stream(rows.loc[new].reset_index(drop=True)))
+            self.pincode_index.update(fresh)
+            rows = aggregate_collisions(concat_chunks([read_frame(path), fresh])) if stored else fresh
+            write_frame(rows, path)
+            write_hashes(np.union1d(known, hashes[new]), hash_path)
+            held.add(date.strftime('%Y-%m-%d'))
+            touched.add(date)
+        self.manifest['dates'][stream] = sorted(held)
+        return touched
+
+    # 3. DELTA ROLLUPS
+    def delta_cube(self, dates, keys=MERGE_KEYS):
+        """
+        District-day cells of the touched dates: repair, merge and roll up only their rows.
+        """
+        frames = {}
+        for stream in STREAM_SCHEMAS:
+            parts = [read_frame(self.date_path(stream, date)) for date in sorted(dates)
+                     if os.path.exists(self.date_path(stream, date))]
+            if parts:
+                df, _ = self.pincode_index.repair(concat_chunks(parts))
+                frames[stream] = aggregate_collisions(df)
+
+        reference = next(iter(frames.values()))
+        frames = [frames[stream] if stream in frames else empty_stream(stream, reference, keys) for stream in STREAM_SCHEMAS]
+        master_part = outer_join(frames, keys)
+        if self.normalizer is not None:
+            for col in (keys[1], keys[2]):
+                master_part[col] = self.normalizer.normalize(master_part[col])
+        return RollupCube.build(master_part, DISTRICT_DAY_GRAIN, keys=keys), len(master_part)
+
+    def apply_delta(self, delta, dates):
+        """
+        Replaces the day cells of `dates` with `delta` and updates the district cells
+        and the windowed-index prefix sums.
+        """
+        self.windows.update(delta, dates)
+        if self.day_cube is None:
+            self.day_cube = delta
+            self.district_cube = delta.rollup(DISTRICT_GRAIN)
+            return
+
+        revised = self.day_cube.cells['date'].isin(list(dates))
+        kept = RollupCube(self.day_cube.cells.loc[~revised], DISTRICT_DAY_GRAIN)
+        self.day_cube = RollupCube.combine([kept, delta], DISTRICT_DAY_GRAIN)
+        if revised.any():
+            # Mins and maxes cannot be subtracted, so districts are re-rolled from their day cells
+            self.district_cube = self.day_cube.rollup(DISTRICT_GRAIN)
+        else:
+            self.district_cube = RollupCube.combine([self.district_cube, delta.rollup(DISTRICT_GRAIN)], DISTRICT_GRAIN)
+
+    # 4. THE REFRESH
+    def refresh(self, sources, report_path='UIDAI_District_Health_Report.csv'):
+        """
+        Ingests the new ZIPs in `sources`, updates the rollups and re-writes the district
+        health report. Returns the full district ranking (the report's rows).
+        """
+        start = time.perf_counter()
+        pending, restamped = self.new_files(sources)
+        if not pending:
+            print("Refresh: no new files")
+            if restamped:
+                self.save_manifest()
+        else:
+            old_bounds = self.health_bounds()
+            dates = self.ingest(pending)
+            self.timings['ingest'] = round(time.perf_counter() - start, 2)
+
+            begin = time.perf_counter()
+            if dates:
+                delta, rows = self.delta_cube(dates)
+                self.apply_delta(delta, dates)
+                print(f"Refresh: {len(dates)} date(s) re-rolled from {rows:,} merged rows -> {len(delta):,} cells")
+            self.save()
+            self.timings['rollup'] = round(time.perf_counter() - begin, 2)
+            new_bounds = self.health_bounds()
+            if old_bounds is not None and new_bounds != old_bounds:
+                moved = ', '.join(f"{name} [{low:.4g}, {high:.4g}]" for name, (low, high) in new_bounds.items())
+                print(f"Health-score bounds moved to {moved}; district scores rescaled")
+
+        if self.district_cube is None:
+            raise ValueError("Nothing ingested yet: pass the source ZIPs to refresh()")
+        if self.engine is not None:
+            scores = self.engine.fit_cube(self.district_cube).score_cube(self.district_cube)
+        else:
+            scores = self.district_cube.health_mean(DISTRICT_GRAIN)
+        rankings = Ranking(scores).full()
+        rankings.to_csv(report_path, index=False)
+        self.timings['total'] = round(time.perf_counter() - start, 2)
+        print(f"Refresh done in {self.timings['total']:.2f}s: {len(rankings):,} districts written to {report_path}")
+        return rankings
+
+    def health_bounds(self):
+        if self.district_cube is None:
+            return None
+        return {name: tuple(float(v) for v in self.district_cube.bounds(name)) for name in HEALTH_WEIGHTS}
@@ -0,0 +1,211 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# Rollup Cube: Pre-aggregated District/Day and Pincode Grains Shared by Every Ranking
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+from merge import KEY_BITS, MERGE_KEYS, decode_keys, encode_keys
+from metrics import COUNT_COLS, METRICS, compute_metrics
+
+# Row-level indices whose means the rankings report
+RATIO_COLS = ['mbu_compliance', 'saturation_ratio', 'mobility_index', 'late_adopter_ratio']
+
+DISTRICT_DAY_GRAIN = ['state', 'district', 'date']
+DISTRICT_GRAIN = ['state', 'district']
+PINCODE_GRAIN = ['pincode']
+PINCODE_DAY_GRAIN = ['pincode', 'date']
+
+# DHI = 40 * scaled(mbu_compliance) + 60 * scaled(saturation_ratio)
+HEALTH_WEIGHTS = {'mbu_compliance': 40, 'saturation_ratio': 60}
+
+
+def field_mask(keep, keys=MERGE_KEYS):
+    """
+    Bit mask that keeps only the `keep` fields of an encoded (date, state, district, pincode) key.
+    """
+    names = dict(zip(MERGE_KEYS, keys))
+    mask, shift = 0, 0
+    for field, bits in reversed(list(KEY_BITS.items())):
+        if names[field] in keep:
+            mask |= ((1 << bits) - 1) << shift
+        shift += bits
+    return np.int64(mask)
+
+
+def expand_total(name):
+    """
+    Count columns that a registered total adds up (totals are linear, so cube sums answer them).
+    """
+    if name in COUNT_COLS:
+        return [name]
+    metric = METRICS[name]
+    if metric.kind != 'total':
+        raise ValueError(f"'{name}' is a ratio; use RollupCube.mean for it")
+    return [col for term in metric.terms for col in expand_total(term)]
+
+
+def aggregate_cells(encoded, counts, codebook, grain, count_cols=COUNT_COLS, ratios=RATIO_COLS, keys=MERGE_KEYS):
+    """
+    Cell statistics of rows given as packed merge keys plus their count arrays.
+    Group codes come from the key with the dropped fields masked out, sums use np.bincount
+    and min/max use one sort + reduceat. Returns a dict of cell columns.
+    """
+    group, cell_keys = pd.factorize(encoded & field_mask(grain, keys), sort=True)
+    n_cells = len(cell_keys)
+
+    decoded = decode_keys(cell_keys, codebook)
+    columns = {col: decoded[col] for col in grain}
+    for col in count_cols:
+        columns[col] = np.bincount(group, weights=counts[col], minlength=n_cells).astype(np.int64)
+    columns['n_rows'] = np.bincount(group, minlength=n_cells).astype(np.int64)
+
+    order = np.argsort(group, kind='stable')
+    starts = np.r_[0, np.cumsum(columns['n_rows'])[:-1]] if n_cells else np.zeros(0, dtype=np.int64)
+    ratio_values = compute_metrics(counts, ratios)
+    for col in ratios:
+        values = ratio_values.pop(col)
+        columns[f'{col}_sum'] = np.bincount(group, weights=values, minlength=n_cells)
+        ordered = values[order]
+        columns[f'{col}_min'] = np.minimum.reduceat(ordered, starts) if n_cells else ordered[:0]
+        columns[f'{col}_max'] = np.maximum.reduceat(ordered, starts) if n_cells else ordered[:0]
+        del ordered
+    return columns
+
+
+class RollupCube:
+    """
+    Materialized aggregates of master_df at one grain, e.g. (state, district, date) or (pincode).
+    Every cell holds only additive or mergeable statistics:
+      - the sum of each count column and the number of master_df rows (n_rows),
+      - the sum, min and max of each row-level ratio (mbu_compliance, ...).
+    Means of ratios, count totals, health scores and coarser grains (state, month, ...)
+    are all exact re-aggregations of the cells, so rankings never touch the 2.3M rows.
+    """
+
+    def __init__(self, cells, grain, counts=COUNT_COLS, ratios=RATIO_COLS):
+        self.cells = cells
+        self.grain = list(grain)
+        self.counts = list(counts)
+        self.ratios = list(ratios)
+        self.rollups = {}  # (by, freq) -> RollupCube, so repeated drill-ups are free
+
+    @classmethod
+    def build(cls, df, grain=DISTRICT_DAY_GRAIN, counts=COUNT_COLS, ratios=RATIO_COLS, keys=MERGE_KEYS):
+        """
+        One pass over the row-level frame (see aggregate_cells).
+        Ratios are evaluated by the fused metrics pass, so they need not be columns of `df`.
+        """
+        (encoded,), codebook = encode_keys([df], keys)
+        columns = aggregate_cells(encoded, {col: df[col].to_numpy() for col in counts}, codebook, grain, counts, ratios)
+        cells = pd.DataFrame(columns, copy=False).sort_values(list(grain), ignore_index=True)
+        return cls(cells, grain, counts, ratios)
+
+    @classmethod
+    def combine(cls, parts, grain=DISTRICT_DAY_GRAIN, counts=COUNT_COLS, ratios=RATIO_COLS):
+        """
+        Merges cubes built on disjoint row subsets (e.g. shards) into one exact cube:
+        sums and row counts add up, mins and maxes take the min and max.
+        """
+        frames = [part.cells for part in parts]
+        # Parts built from different frames may carry different label categories;
+        # give every categorical key the sorted union so concat keeps it categorical
+        for col in grain:
+            if frames and all(isinstance(f[col].dtype, pd.CategoricalDtype) for f in frames):
+                categories = sorted(set().union(*[f[col].cat.categories for f in frames]))
+                frames = [f.assign(**{col: f[col].cat.set_categories(categories)}) for f in frames]
+        cells = pd.concat(frames, ignore_index=True)
+        return cls(cells, grain, counts, ratios).rollup(grain)
+
+    def __len__(self):
+        return len(self.cells)
+
+    # 1. RE-AGGREGATION (DRILL-UP)
+    def rollup(self, by, freq=None):
+        """
+        Re-aggregates the cells to a coarser grain, e.g. ['state'] or ['state', 'district'].
+        `freq` (e.g. 'M' or 'W') buckets the date column into periods, so ['state', 'date']
+        with freq='M' gives state x month. Returns a RollupCube at the new grain.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        missing = [col for col in by if col not in self.grain]
+        if missing:
+            raise ValueError(f"Cannot roll up to {missing}: not part of the {self.grain} grain")
+
+        cells = self.cells
+        if freq is not None and 'date' in by:
+            cells = cells.assign(date=cells['date'].dt.to_period(freq).dt.start_time)
+
+        agg = {col: 'sum' for col in self.counts + ['n_rows']}
+        for r in self.ratios:
+            agg.update({f'{r}_sum': 'sum', f'{r}_min': 'min', f'{r}_max': 'max'})
+        rolled = cells.groupby(by, observed=True, sort=True).agg(agg).reset_index()
+        return RollupCube(rolled, by, self.counts, self.ratios)
+
+    def at(self, by=None, freq=None):
+        by = self.grain if by is None else ([by] if isinstance(by, str) else list(by))
+        if by == self.grain and freq is None:
+            return self
+        key = (tuple(by), freq)
+        if key not in self.rollups:
+            self.rollups[key] = self.rollup(by, freq)
+        return self.rollups[key]
+
+    # 2. QUERIES
+    def group_index(self):
+        if len(self.grain) > 1:
+            return pd.MultiIndex.from_frame(self.cells[self.grain])
+        return pd.Index(self.cells[self.grain[0]], name=self.grain[0])
+
+    def mean(self, names, by=None, freq=None):
+        """
+        Row-level mean of one or more ratios per group, identical to
+        master_df.groupby(by)[names].mean(). Returns a Series for one name, else a DataFrame.
+        """
+        cube = self.at(by, freq)
+        single = isinstance(names, str)
+        names = [names] if single else list(names)
+        index = cube.group_index()
+        n = cube.cells['n_rows'].to_numpy()
+        result = pd.DataFrame({name: cube.cells[f'{name}_sum'].to_numpy() / n for name in names}, index=index)
+        return result[names[0]] if single else result
+
+    def total(self, names, by=None, freq=None):
+        """
+        Sums of count columns or registered totals (total_enrol, total_activity, ...) per group.
+        """
+        cube = self.at(by, freq)
+        single = isinstance(names, str)
+        names = [names] if single else list(names)
+        index = cube.group_index()
+        # Plain array additions: a row-wise DataFrame.sum over millions of cells is far slower
+        result = pd.DataFrame(
+            {name: sum(cube.cells[col].to_numpy() for col in expand_total(name)) for name in names}, index=index
+        )
+        return result[names[0]] if single else result
+
+    def bounds(self, name):
+        """
+        Global (min, max) of a row-level ratio over every row of the cube.
+        """
+        return self.cells[f'{name}_min'].min(), self.cells[f'{name}_max'].max()
+
+    def health_mean(self, by=None, freq=None, scaling='minmax', weights=HEALTH_WEIGHTS):
+        """
+        Mean health_score per group, where health_score is the weighted sum of min-max
+        (or max-abs) scaled ratios computed on the row level. Scaling is linear with global
+        bounds, so the mean of the score is the same weighted sum applied to the ratio means.
+        """
+        means = self.mean(list(weights), by, freq)
+        score = pd.Series(0.0, index=means.index, name='health_score')
+        for name, weight in weights.items():
+            low, high = self.bounds(name)
+            if scaling == 'minmax':
+                scaled = (means[name] - low) / (high - low) if high > low else means[name] * 0.0
+            elif scaling == 'maxabs':
+                peak = max(abs(low), abs(high))
+                scaled = means[name] / peak if peak > 0 else means[name]
+            else:
+                raise ValueError(f"Unknown scaling '{scaling}'")
+            score += scaled * weight
+        return score
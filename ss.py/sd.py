@@ -1,30 +1,48 @@
 
+# Continues the dd.py session: master_df, its derived-column graph `derived` and the rollup
+# cube `district_cube` already exist. Rankings read the cube instead of grouping master_df.
+# In OUT_OF_CORE mode there is no master_df (nor `derived`), and only the cube steps run.
+from health import HealthScoreEngine
+from ranking import Ranking
+from scaling import RunningScaler
+from segmentation import SegmentationEngine
+from refresh import IncrementalRefresh
+
+
 # 1. CREATE RAW METRICS
-# We sum up the key 'health' indicators
-master_df['total_enrol'] = master_df['age_0_5'] + master_df['age_5_17'] + master_df['age_18_greater']
-master_df['total_updates'] = master_df['demo_age_5_17'] + master_df['demo_age_17_'] + \
-                             master_df['bio_age_5_17'] + master_df['bio_age_17_']
+# We sum up the key 'health' indicators (total_enrol, total_updates; reused if already computed)
 
 # 2. CALCULATE COMPONENT RATIOS
-# Youth Compliance Ratio: How many MBUs per school-age enrolment
-master_df['youth_compliance'] = master_df['bio_age_5_17'] / (master_df['age_5_17'] + 1)
-
-# Maintenance Ratio: Total Updates relative to Total Activity
-master_df['maintenance_ratio'] = master_df['total_updates'] / (master_df['total_enrol'] + master_df['total_updates'] + 1)
+# Youth Compliance Ratio: How many MBUs per school-age enrolment -> same formula as mbu_compliance
+# Maintenance Ratio: Total Updates relative to Total Activity -> same formula as saturation_ratio
 
 # 3. NORMALIZE AND CREATE THE HEALTH SCORE (0-100)
-def normalize(col):
-    return (col - col.min()) / (col.max() - col.min())
-
 # We weight Maintenance slightly higher as it shows system health
-master_df['health_score'] = (normalize(master_df['youth_compliance']) * 40) + \
-                            (normalize(master_df['maintenance_ratio']) * 60)
+# dd.py overwrote health_score with a MaxAbs-scaled variant; invalidating hands it back to
+# the graph, so master_df's row-level score is again the min-max DHI whose district means
+# the min-max fallback below ranks (district_cube.health_mean). It is rebuilt on its next access.
+if not OUT_OF_CORE:
+    derived.invalidate('health_score')
 
 # 4. RANK THE DISTRICTS
-district_health = master_df.groupby(['state', 'district'])['health_score'].mean().sort_values(ascending=False).reset_index()
+# Min-max over the raw per-row ratios lets one row (bio_age_5_17=8002 against age_5_17=0)
+# squash every other district toward zero, which is where the pile of 0.0 scores at the bottom
+# of the outputs below comes from. The report is therefore ranked, exported and refreshed with
+# the health engine (health.py): it scores the district means, scaling each component between
+# its 1st and 99th percentile taken from a streaming quantile sketch. HEALTH_NORMALIZER may also
+# be 'rank' or 'log'; None falls back to the original min-max DHI (the district means of
+# master_df's health_score), which is what the recorded outputs below were printed with.
+# Both extremes come from one partial selection each (no full sort); ties break by label order,
+# so every district appears at most once in the printout.
+HEALTH_NORMALIZER = 'quantile_clip'
+health_engine = HealthScoreEngine(normalizer=HEALTH_NORMALIZER).fit_cube(district_cube) if HEALTH_NORMALIZER else None
+district_scores = health_engine.score_cube(district_cube) if health_engine is not None \
+    else district_cube.health_mean(['state', 'district'])
+district_health = Ranking(district_scores)
+health_extremes = district_health.extremes((5,))
 
 print("Top 5 'Healthiest' Districts (High Compliance):")
-print(district_health.head(5))
+print(health_extremes[5][0])
 #           state                       district  health_score
 # 0  Chhattisgarh  ManendragarhChirmiriBharatpur     59.427732
 # 1  Chhattisgarh                        Raigarh     52.803306
@@ -33,7 +51,7 @@ print(district_health.head(5))
 # 4   Maharashtra                       Yavatmal     51.932698
 
 print("\nBottom 5 'At-Risk' Districts (Service Gaps Found):")
-print(district_health.tail(5))
+print(health_extremes[5][1])
 #               state            district  health_score
 # 1127          Delhi      North East   *           0.0
 # 1128  Uttar Pradesh           Shravasti           0.0
@@ -54,7 +72,7 @@ print(district_health.tail(5))
 
 # A. MBU COMPLIANCE BY STATE
 plt.figure(figsize=(12, 10))
-plot_data = master_df.groupby('state')['mbu_compliance'].mean().sort_values(ascending=False).reset_index()
+plot_data = district_cube.mean('mbu_compliance', 'state').sort_values(ascending=False).reset_index()
 sns.barplot(data=plot_data, x='mbu_compliance', y='state', hue='state', palette='magma', legend=False)
 plt.axvline(1.0, color='red', linestyle='--', label='Ideal Compliance')
 plt.title('National MBU Compliance Map')
@@ -62,7 +80,7 @@ plt.show()
 
 # B. MARKET MATURITY MATRIX
 plt.figure(figsize=(12, 10))
-state_mat = master_df.groupby('state')['saturation_ratio'].mean().sort_values(ascending=False).reset_index()
+state_mat = district_cube.mean('saturation_ratio', 'state').sort_values(ascending=False).reset_index()
 sns.barplot(data=state_mat, x='saturation_ratio', y='state', hue='state', palette='RdYlGn', legend=False)
 plt.axvline(0.8, color='green', label='Mature Market')
 plt.axvline(0.3, color='red', label='Emerging Market')
@@ -75,45 +93,49 @@ plt.show()
 # Phase 4: Exploratory Analysis & Strategic Visualization
 
 # 1. DERIVED RAW METRICS
-master_df['total_enrol'] = master_df['age_0_5'] + master_df['age_5_17'] + master_df['age_18_greater']
-master_df['total_updates'] = master_df['demo_age_5_17'] + master_df['demo_age_17_'] + \
-                             master_df['bio_age_5_17'] + master_df['bio_age_17_']
-master_df['total_activity'] = master_df['total_enrol'] + master_df['total_updates']
-
 # 2. BEHAVIORAL INDICES
-master_df['mbu_compliance'] = master_df['bio_age_5_17'] / (master_df['age_5_17'] + 1)
-master_df['saturation_ratio'] = master_df['total_updates'] / (master_df['total_activity'] + 1)
-master_df['mobility_index'] = master_df['demo_age_17_'] / (master_df['age_18_greater'] + master_df['demo_age_17_'] + 1)
-master_df['late_adopter_ratio'] = master_df['age_18_greater'] / (master_df['total_enrol'] + 1)
-
 # 3. CALCULATE DISTRICT HEALTH INDEX (DHI)
-scaler = MinMaxScaler()
-master_df['norm_mbu'] = scaler.fit_transform(master_df[['mbu_compliance']])
-master_df['norm_sat'] = scaler.fit_transform(master_df[['saturation_ratio']])
-master_df['health_score'] = (master_df['norm_mbu'] * 40) + (master_df['norm_sat'] * 60)
+# Already current in the graph; only columns whose inputs changed would be recomputed.
+if not OUT_OF_CORE:
+    derived.require('total_activity', 'mobility_index', 'late_adopter_ratio', 'health_score')
 
 
 
 # Phase 5: Towards Model Building (Unsupervised Clustering)
 
-from sklearn.cluster import KMeans
-
 # 1. PREPARE MODELING FEATURES
 features = ['mbu_compliance', 'saturation_ratio', 'mobility_index', 'late_adopter_ratio']
-X = master_df.groupby(['state', 'district'])[features].mean().dropna()
+X = district_cube.mean(features, ['state', 'district']).dropna()
 
 # 2. SIMPLE CLUSTERING (Identifying 3 Types of Districts)
-kmeans = KMeans(n_clusters=3, random_state=42)
-X['Cluster'] = kmeans.fit_predict(scaler.fit_transform(X))
+# Fixed at k=3 here; profiles are named from the centroids (Mature Hubs, Emerging Zones,
+# Policy Risk), so the printout does not depend on which label k-means hands out
+scaler = RunningScaler(features, method='minmax')
+X_model = scaler.fit_transform(X)
+profiles = SegmentationEngine(ks=[3], seeds=range(5), cache_dir=f"{path_base}\\cache\\segments").fit(X_model, features)
+X['District_Profile'] = profiles.profiles(profiles.predict(X_model)).to_numpy()
 
-# Cluster 0: High Update/Mature, Cluster 1: High Growth/Emerging, Cluster 2: Low Compliance/At-Risk
 print("--- Cluster Profiles ---")
-print(X.groupby('Cluster').mean())
+print(X.groupby('District_Profile').mean())
 
 # 3. EXPORT FINAL RANKINGS
-district_rankings = master_df.groupby(['state', 'district'])['health_score'].mean().sort_values(ascending=False).reset_index()
+# The export is the one place that needs every district in order
+district_rankings = Ranking(district_scores).full()
 district_rankings.to_csv('UIDAI_District_Health_Report.csv', index=False)
 
+# 4. DAILY REFRESH
+# When new daily ZIPs arrive, list them in `sources` (stream -> path or list of paths) and run
+# this step instead of the whole script: only files with an unseen content hash are read, only
+# the dates they touch are merged and rolled up again, and the report above is re-written from
+# the updated district cells (see refresh.py). The first run on an empty state directory is a full build.
+DAILY_REFRESH = False
+if DAILY_REFRESH:
+    daily = IncrementalRefresh(
+        f"{path_base}\\refresh_state", mappings=(state_mapping, district_mapping, garbage_keywords),
+        normalizer=title_normalizer, engine=health_engine,
+    )
+    district_rankings = daily.refresh(sources, 'UIDAI_District_Health_Report.csv')
+
 
 
 
@@ -0,0 +1,375 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# Segmentation Engine: Parallel k/Seed Sweep, Cached Fits, Profile Names and a Persisted Assignment Model
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import linear_sum_assignment
+
+from clustering import StreamingKMeans, squared_distances
+from parallel import attach_arrays, share_arrays
+from scaling import RunningScaler
+
+ASSIGN_CHUNK_ROWS = 1 << 16
+
+# Bump when the fitting code changes what a cached fit contains
+SEGMENTATION_VERSION = 1
+
+# What each profile looks like, as a direction in feature space: a cluster is named after the
+# profile whose direction its (standardized) centroid points along best.
+PROFILE_PROTOTYPES = {
+    'Mature Hubs': {'saturation_ratio': 1.0, 'mbu_compliance': 0.5},        # high update / maintenance share
+    'Emerging Zones': {'saturation_ratio': -1.0, 'late_adopter_ratio': 0.5},  # high growth, low maturity
+    'Policy Risk': {'mbu_compliance': -1.0},                                  # low biometric compliance
+}
+
+
+# 1. FIT SCORING
+def sampled_silhouette(X, labels, sample):
+    """
+    Mean silhouette coefficient over the `sample` rows (exact pairwise distances within the sample).
+    """
+    points, groups = X[sample], labels[sample]
+    present = np.unique(groups)
+    if len(present) < 2:
+        return np.nan
+    distances = np.sqrt(squared_distances(points, points))
+    # Mean distance from every sampled point to every cluster
+    members = (groups[:, None] == present[None, :]).astype(np.float64)
+    sizes = members.sum(axis=0)
+    totals = distances @ members
+    own = np.searchsorted(present, groups)
+    own_size = sizes[own]
+    a = np.where(own_size > 1, totals[np.arange(len(groups)), own] / np.maximum(own_size - 1, 1), 0.0)
+    others = totals / sizes[None, :]
+    others[np.arange(len(groups)), own] = np.inf
+    b = others.min(axis=1)
+    s = np.where(own_size > 1, (b - a) / np.maximum(a, b), 0.0)
+    return float(s.mean())
+
+
+def elbow(ks, inertias):
+    """
+    The k at the knee of the inertia curve: the point farthest below the straight line
+    joining the first and last (k, inertia), with both axes scaled to [0, 1].
+    """
+    ks, inertias = np.asarray(ks, dtype=np.float64), np.asarray(inertias, dtype=np.float64)
+    if len(ks) < 3:
+        return int(ks[0])
+    x = (ks - ks[0]) / (ks[-1] - ks[0])
+    y = (inertias - inertias.min()) / max(inertias.max() - inertias.min(), 1e-12)
+    line = y[0] + (y[-1] - y[0]) * x
+    return int(ks[np.argmax(line - y)])
+
+
+def fit_one(spec, k, seed, mode, sample_size, sample_seed):
+    """
+    Worker: one k-means fit on the shared feature matrix. Returns centroids and scores.
+    """
+    begin = time.perf_counter()
+    blocks, arrays = attach_arrays(spec)
+    try:
+        n = len(arrays['weights'])
+        X = arrays['X'].reshape(n, -1)
+        weights = arrays['weights']
+        model = StreamingKMeans(n_clusters=k, mode=mode, seed=seed).fit(X, weights)
+        labels = model.predict(X)
+        sample = np.random.default_rng(sample_seed).choice(n, size=min(n, sample_size), replace=False)
+        result = {'k': k, 'seed': seed, 'inertia': model.inertia, 'silhouette': sampled_silhouette(X, labels, sample),
+                  'iterations': len(model.history), 'centroids': model.centroids}
+        del X, weights, labels
+    finally:
+        del arrays
+        for block in blocks:
+            block.close()
+    result['seconds'] = round(time.perf_counter() - begin, 3)
+    return result
+
+
+# 2. PROFILE NAMES
+def profile_names(centroids, features, center, spread, prototypes=PROFILE_PROTOTYPES):
+    """
+    Name for every centroid: the optimal one-to-one matching (Hungarian algorithm) between
+    clusters and profiles, scored by how far each standardized centroid points along each
+    profile's direction. Clusters beyond the number of profiles are named 'Segment n'.
+    """
+    z = (centroids - center) / np.where(spread > 0, spread, 1.0)
+    directions = np.array([[prototype.get(name, 0.0) for name in features] for prototype in prototypes.values()])
+    affinity = z @ directions.T
+    rows, cols = linear_sum_assignment(-affinity)
+    names = [None] * len(centroids)
+    profiles = list(prototypes)
+    for row, col in zip(rows, cols):
+        names[row] = profiles[col]
+    extra = 0
+    for i in range(len(names)):
+        if names[i] is None:
+            extra += 1
+            names[i] = f"Segment {len(profiles) + extra}"
+    return names
+
+
+def named_centroids(centroids, features, X, prototypes=PROFILE_PROTOTYPES):
+    """
+    Names the centroids of a fit on X (profile_names) and puts them in profile order:
+    named profiles first, in their declared order, then the extra segments.
+    Returns (centroids, names).
+    """
+    names = profile_names(centroids, features, X.mean(axis=0), X.std(axis=0), prototypes)
+    order = sorted(range(len(names)), key=lambda i: (list(prototypes).index(names[i])
+                                                     if names[i] in prototypes else len(prototypes) + i))
+    return centroids[order], [names[i] for i in order]
+
+
+# 3. THE ENGINE
+class SegmentationEngine:
+    """
+    Picks the number of clusters instead of fixing k=3:
+      - every (k, seed) pair of the sweep is fitted in a process pool; the feature matrix is
+        staged once in shared memory (parallel.share_arrays),
+      - each fit is scored by its inertia and a silhouette on a fixed random sample,
+      - k is chosen by the best silhouette (criterion='silhouette') or the inertia elbow
+        (criterion='elbow'); for that k the seed with the lowest inertia wins.
+    Fits are cached on disk, keyed by a hash of the feature matrix, the weights and the fit
+    parameters, so re-running on unchanged data costs no fitting at all.
+    Clusters are renumbered in profile order and named by centroid semantics
+    (profile_names), so 'Policy Risk' stays 'Policy Risk' whatever label k-means gave it.
+    """
+
+    def __init__(self, ks=range(2, 9), seeds=range(5), mode='full', criterion='silhouette', sample_size=2000,
+                 sample_seed=0, max_workers=None, cache_dir=None, prototypes=PROFILE_PROTOTYPES):
+        if criterion not in ('silhouette', 'elbow'):
+            raise ValueError(f"Unknown criterion '{criterion}'")
+        self.ks = list(ks)
+        self.seeds = list(seeds)
+        self.mode = mode
+        self.criterion = criterion
+        self.sample_size = sample_size
+        self.sample_seed = sample_seed
+        self.max_workers = max_workers or os.cpu_count()
+        self.cache_dir = cache_dir
+        self.prototypes = prototypes
+        self.memo = {}
+        self.results = None
+
+    # 1. CACHE
+    def fit_key(self, digest, k, seed):
+        params = {'k': k, 'seed': seed, 'mode': self.mode, 'sample_size': self.sample_size,
+                  'sample_seed': self.sample_seed, 'version': SEGMENTATION_VERSION}
+        return hashlib.sha256(f"{digest}|{json.dumps(params, sort_keys=True)}".encode('utf-8')).hexdigest()[:24]
+
+    def cached(self, key):
+        if key in self.memo:
+            return self.memo[key]
+        path = os.path.join(self.cache_dir, f"{key}.npz") if self.cache_dir else None
+        if path and os.path.exists(path):
+            data = np.load(path)
+            self.memo[key] = {name: (data[name] if name == 'centroids' else data[name].item()) for name in data.files}
+            return self.memo[key]
+        return None
+
+    def store(self, key, result):
+        self.memo[key] = result
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = os.path.join(self.cache_dir, f"{key}.npz")
+            with open(path + '.tmp', 'wb') as f:
+                np.savez(f, **result)
+            os.replace(path + '.tmp', path)
+
+    # 2. SWEEP
+    def sweep(self, X, weights=None):
+        """
+        Fits every (k, seed) pair that is not cached yet. Returns one row per fit.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        weights = np.ones(len(X)) if weights is None else np.ascontiguousarray(weights, dtype=np.float64)
+        digest = hashlib.sha256(X.tobytes() + weights.tobytes() + str(X.shape).encode('utf-8')).hexdigest()
+
+        results, pending = [], []
+        for k in self.ks:
+            for seed in self.seeds:
+                key = self.fit_key(digest, k, seed)
+                hit = self.cached(key)
+                if hit is not None:
+                    results.append(dict(hit, cached=True))
+                else:
+                    pending.append((key, k, seed))
+
+        if pending:
+            blocks, spec = share_arrays({'X': X.ravel(), 'weights': weights})
+            try:
+                with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                    futures = {
+                        pool.submit(fit_one, spec, k, seed, self.mode, self.sample_size, self.sample_seed): key
+                        for key, k, seed in pending
+                    }
+                    for future, key in futures.items():
+                        result = future.result()
+                        self.store(key, result)
+                        results.append(dict(result, cached=False))
+            finally:
+                for block in blocks:
+                    block.close()
+                    block.unlink()
+
+        columns = ['k', 'seed', 'inertia', 'silhouette', 'iterations', 'seconds', 'cached']
+        self.fits = {(r['k'], r['seed']): r for r in results}
+        self.results = pd.DataFrame(results, columns=columns).sort_values(['k', 'seed'], ignore_index=True)
+        print(f"Segmentation sweep: {len(pending)} fits run, {len(results) - len(pending)} from cache")
+        return self.results
+
+    def choose_k(self):
+        best_per_k = self.results.loc[self.results.groupby('k')['inertia'].idxmin()]
+        if self.criterion == 'elbow':
+            return elbow(best_per_k['k'], best_per_k['inertia'])
+        return int(best_per_k.loc[best_per_k['silhouette'].idxmax(), 'k'])
+
+    # 3. FIT AND NAME
+    def fit(self, X, features, weights=None):
+        """
+        Sweeps, picks k and the best seed, then orders and names the clusters.
+        Sets k, centroids (profile order) and names.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        self.features = list(features)
+        self.sweep(X, weights)
+        self.k = self.choose_k()
+        fits = self.results[self.results['k'] == self.k]
+        best = fits.loc[fits['inertia'].idxmin()]
+        centroids = self.fits[(self.k, int(best['seed']))]['centroids']
+
+        # Renumber clusters: named profiles first in their declared order, then the extra segments
+        self.centroids, self.names = named_centroids(centroids, self.features, X, self.prototypes)
+        print(f"Segmentation: k={self.k} ({self.criterion}), profiles {self.names}")
+        return self
+
+    def predict(self, X):
+        return squared_distances(np.asarray(X, dtype=np.float64), self.centroids).argmin(axis=1)
+
+    def profiles(self, labels):
+        return pd.Series(np.asarray(self.names, dtype=object)[labels], name='District_Profile')
+
+
+# 4. THE PERSISTED MODEL
+class SegmentationModel:
+    """
+    Everything needed to place new rows in the fitted segments, without refitting:
+    the scaler state (RunningScaler), the centroids in scaled space and their profile names.
+
+    assign() scales a batch with one fused (x - offset) * scale over the whole matrix, then
+    finds the nearest centroid by one matrix product (||x||^2 - 2 x.c + ||c||^2), in chunks of
+    ASSIGN_CHUNK_ROWS so memory stays flat for millions of pincode rows. It returns the
+    District_Profile and the distance to every centroid; rows with a missing feature get no profile.
+
+        model = SegmentationModel.from_engine(segments, scaler)
+        model.save(path)
+        SegmentationModel.load(path).assign(new_districts)
+    """
+
+    def __init__(self, scaler, centroids, names):
+        self.scaler = scaler
+        self.features = list(scaler.features)
+        self.centroids = np.asarray(centroids, dtype=np.float64)
+        self.names = list(names)
+        if self.centroids.shape != (len(self.names), len(self.features)):
+            raise ValueError(f"Centroids have shape {self.centroids.shape}, "
+                             f"expected {(len(self.names), len(self.features))}")
+        offsets, scales = zip(*(scaler.params(name) for name in self.features))
+        self.offsets = np.array(offsets, dtype=np.float64)
+        self.scales = np.array(scales, dtype=np.float64)
+        self.centroid_norms = np.einsum('ij,ij->i', self.centroids, self.centroids)
+
+    @classmethod
+    def from_engine(cls, engine, scaler):
+        return cls(scaler, engine.centroids, engine.names)
+
+    @classmethod
+    def from_centroids(cls, scaler, centroids, X_scaled, prototypes=PROFILE_PROTOTYPES):
+        """
+        Model of any other fit (e.g. clustering.StreamingKMeans) in the space of `scaler`,
+        its centroids named and ordered against the scaled points it was fitted on.
+        """
+        centroids, names = named_centroids(np.asarray(centroids, dtype=np.float64), scaler.features,
+                                           np.asarray(X_scaled, dtype=np.float64), prototypes)
+        return cls(scaler, centroids, names)
+
+    def centroids_for(self, scaler):
+        """
+        The centroids moved into the space of another scaler of the same features (e.g. this
+        model's scaler merged with a new day's bounds), so they can warm-start a fit there.
+        """
+        if list(scaler.features) != self.features:
+            raise ValueError(f"Scaler features {scaler.features} do not match the model's {self.features}")
+        offsets, scales = zip(*(scaler.params(name) for name in self.features))
+        raw = self.centroids / self.scales + self.offsets
+        return (raw - np.array(offsets)) * np.array(scales)
+
+    # 1. ASSIGNMENT
+    def matrix(self, data):
+        """
+        Raw feature matrix (rows x features) of a frame, dict of arrays or 2-D array in feature order.
+        """
+        if isinstance(data, np.ndarray) and data.ndim == 2:
+            return np.asarray(data, dtype=np.float64)
+        return np.column_stack([np.asarray(data[name], dtype=np.float64) for name in self.features])
+
+    def distances(self, X):
+        """
+        Euclidean distance of every (raw, unscaled) row to every centroid.
+        """
+        scaled = X - self.offsets
+        scaled *= self.scales
+        squared = scaled @ self.centroids.T
+        squared *= -2
+        squared += np.einsum('ij,ij->i', scaled, scaled)[:, None]
+        squared += self.centroid_norms[None, :]
+        np.maximum(squared, 0, out=squared)
+        return np.sqrt(squared, out=squared)
+
+    def assign(self, data, chunk_rows=ASSIGN_CHUNK_ROWS):
+        """
+        District_Profile (categorical), Cluster and distance_<profile> columns for every row.
+        """
+        X = self.matrix(data)
+        distances = np.empty((len(X), len(self.names)))
+        for start in range(0, len(X), chunk_rows):
+            distances[start:start + chunk_rows] = self.distances(X[start:start + chunk_rows])
+        labels = distances.argmin(axis=1) if len(X) else np.empty(0, dtype=np.int64)
+        labels[np.isnan(distances).any(axis=1)] = -1
+
+        index = data.index if isinstance(data, pd.DataFrame) else None
+        result = {
+            'Cluster': labels,
+            'District_Profile': pd.Categorical.from_codes(labels, categories=self.names),
+        }
+        for i, name in enumerate(self.names):
+            result[f"distance_{name.lower().replace(' ', '_')}"] = distances[:, i]
+        return pd.DataFrame(result, index=index, copy=False)
+
+    # 2. SERIALIZATION
+    def to_dict(self):
+        return {'scaler': self.scaler.to_dict(), 'centroids': self.centroids.tolist(), 'names': self.names}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(RunningScaler.from_dict(state['scaler']), state['centroids'], state['names'])
+
+    def save(self, path):
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=1)
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def __repr__(self):
+        return f"SegmentationModel({self.features}, profiles={self.names})"
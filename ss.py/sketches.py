@@ -0,0 +1,144 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# Streaming Quantile Sketch (KLL): Approximate Quantiles and Ranks in One Pass
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+
+import numpy as np
+
+# Capacity of level h shrinks by this factor per level below the top (Karnin-Lang-Liberty)
+LEVEL_DECAY = 2 / 3
+MIN_CAPACITY = 8
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch: answers quantile(q) and rank(x) to within about 1% of the true
+    normalized rank for k=200, using O(k) memory however many values are fed.
+
+    Values are kept in levels; an item on level h stands for 2**h input values. When a
+    level overflows, its items are sorted in blocks of the level's capacity and every
+    other item (random offset per block) is promoted to the next level. update() does
+    this for a whole array at once: the blocks are one (n_blocks, capacity) array sorted
+    along axis 1, so feeding 2.3M values sorts only capacity-sized blocks, never the full column.
+
+    Sketches are mergeable (shards, partitions, daily batches) and serializable.
+    """
+
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.rng = np.random.default_rng(seed)
+        self.levels = [np.empty(0, dtype=np.float64)]
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.sorted = None  # (items, cumulative weights), kept until the next update
+
+    def __len__(self):
+        return self.n
+
+    # 1. UPDATES
+    def capacity(self, level):
+        depth = len(self.levels) - 1 - level
+        capacity = max(MIN_CAPACITY, int(np.ceil(self.k * LEVEL_DECAY ** depth)))
+        return capacity + capacity % 2
+
+    def update(self, values):
+        """
+        Adds an array of values (NaNs are skipped).
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        self.n += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.compress()
+        return self
+
+    def compress(self):
+        self.sorted = None
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            capacity = self.capacity(level)
+            if len(items) > capacity:
+                n_blocks = len(items) // capacity
+                blocks = np.sort(items[:n_blocks * capacity].reshape(n_blocks, capacity), axis=1)
+                offsets = self.rng.integers(0, 2, n_blocks)
+                # Every other item of each sorted block, starting at its random offset
+                promoted = blocks.reshape(n_blocks, capacity // 2, 2)[np.arange(n_blocks), :, offsets].ravel()
+                self.levels[level] = items[n_blocks * capacity:]
+                grew = level + 1 == len(self.levels)
+                if grew:
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                # A new top level shrinks every capacity below it, so start over
+                level = 0 if grew else level + 1
+            else:
+                level += 1
+
+    def merge(self, other):
+        """
+        Folds another sketch (same k) into this one.
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.compress()
+        return self
+
+    # 2. QUERIES
+    def weighted_items(self):
+        """
+        Retained items in ascending order with their cumulative weights (cached between updates,
+        so repeated queries cost one binary search).
+        """
+        if self.sorted is None:
+            items = np.concatenate(self.levels)
+            weights = np.concatenate([np.full(len(items_h), 2 ** h, dtype=np.int64) for h, items_h in enumerate(self.levels)])
+            order = np.argsort(items, kind='stable')
+            self.sorted = items[order], np.cumsum(weights[order])
+        return self.sorted
+
+    def quantile(self, q):
+        """
+        Approximate q-quantile (q scalar or array in [0, 1]); 0 and 1 give the exact min and max.
+        """
+        if self.n == 0:
+            raise ValueError("quantile of an empty sketch")
+        items, cumulative = self.weighted_items()
+        q = np.asarray(q, dtype=np.float64)
+        pos = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+        result = items[np.minimum(pos, len(items) - 1)]
+        result = np.where(q <= 0, self.min, np.where(q >= 1, self.max, result))
+        return float(result) if result.ndim == 0 else result
+
+    def rank(self, values):
+        """
+        Approximate normalized rank (fraction of fed values <= x) of each value.
+        """
+        if self.n == 0:
+            raise ValueError("rank of an empty sketch")
+        items, cumulative = self.weighted_items()
+        pos = np.searchsorted(items, np.asarray(values, dtype=np.float64), side='right')
+        return np.where(pos > 0, cumulative[np.maximum(pos - 1, 0)], 0) / cumulative[-1]
+
+    # 3. SERIALIZATION
+    def to_dict(self):
+        return {'k': self.k, 'n': self.n, 'min': self.min, 'max': self.max,
+                'levels': [items.tolist() for items in self.levels]}
+
+    @classmethod
+    def from_dict(cls, state, seed=0):
+        sketch = cls(state['k'], seed)
+        sketch.n, sketch.min, sketch.max = state['n'], state['min'], state['max']
+        sketch.levels = [np.asarray(items, dtype=np.float64) for items in state['levels']]
+        return sketch
+
+    def __repr__(self):
+        return f"KLLSketch(k={self.k}, n={self.n:,}, retained={sum(len(items) for items in self.levels)})"
@@ -0,0 +1,389 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# Summary Statistics Service: Mergeable Per-Column / Per-State Sketches and Correlation Moments
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+from sketches import KLLSketch
+
+DESCRIBE_PERCENTILES = (0.25, 0.5, 0.75)
+
+
+class ColumnSummary:
+    """
+    Running statistics of one column: exact count, mean and variance (Chan et al. merge of
+    per-chunk means and squared deviations) plus exact min/max and a KLL sketch for percentiles.
+    """
+
+    def __init__(self, k=200):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.sketch = KLLSketch(k)
+
+    def combine(self, n, mean, m2):
+        if n == 0:
+            return
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.n = total
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        mean = values.mean()
+        self.combine(len(values), mean, float(np.square(values - mean).sum()))
+        self.sketch.update(values)
+        return self
+
+    def merge(self, other):
+        self.combine(other.n, other.mean, other.m2)
+        self.sketch.merge(other.sketch)
+        return self
+
+    def to_dict(self):
+        return {'n': self.n, 'mean': self.mean, 'm2': self.m2, 'sketch': self.sketch.to_dict()}
+
+    @classmethod
+    def from_dict(cls, state):
+        summary = cls(state['sketch']['k'])
+        summary.n, summary.mean, summary.m2 = state['n'], state['mean'], state['m2']
+        summary.sketch = KLLSketch.from_dict(state['sketch'])
+        return summary
+
+    @property
+    def std(self):
+        # Sample standard deviation (ddof=1), as in DataFrame.describe()
+        return float(np.sqrt(self.m2 / (self.n - 1))) if self.n > 1 else np.nan
+
+    def describe(self, percentiles=DESCRIBE_PERCENTILES):
+        stats = {'count': float(self.n), 'mean': self.mean if self.n else np.nan, 'std': self.std,
+                 'min': self.sketch.min if self.n else np.nan}
+        if self.n:
+            stats.update({f"{p:.0%}": value for p, value in zip(percentiles, self.sketch.quantile(list(percentiles)))})
+        else:
+            stats.update({f"{p:.0%}": np.nan for p in percentiles})
+        stats['max'] = self.sketch.max if self.n else np.nan
+        return stats
+
+
+class SummaryStats:
+    """
+    describe()-style summaries, percentiles and clipping bounds of the numeric columns of a
+    dataset, nationally and per `by` group (state by default), without keeping any rows.
+
+    update() is called on every chunk, partition or daily delta as it is ingested, and summaries
+    built elsewhere are folded in with merge(). Counts, means, standard deviations, min and
+    max are exact; percentiles come from KLL sketches (about 1% rank error at k=200). Queries
+    read only the sketches, so they cost microseconds instead of a sort of millions of values.
+
+        summary = SummaryStats().update(df_enrol)
+        summary.describe()                       # like df_enrol.describe()
+        summary.quantile('age_0_5', 0.99, state='Bihar')
+    """
+
+    def __init__(self, columns=None, by='state', k=200):
+        self.columns = list(columns) if columns is not None else None
+        self.by = by
+        self.k = k
+        self.national = {}
+        self.groups = {}  # group label -> {column: ColumnSummary}
+
+    def numeric_columns(self, data):
+        if self.columns is not None:
+            return self.columns
+        if isinstance(data, pd.DataFrame):
+            return [col for col in data.columns
+                    if pd.api.types.is_numeric_dtype(data[col]) and not pd.api.types.is_bool_dtype(data[col])]
+        return [col for col in data if col != self.by]
+
+    def column(self, store, col):
+        if col not in store:
+            store[col] = ColumnSummary(self.k)
+        return store[col]
+
+    # 1. FEEDING
+    def update(self, data, columns=None, groups=None):
+        """
+        Folds a chunk (DataFrame or dict of arrays) into the summaries.
+        Group labels come from data[self.by], or from `groups` when the chunk lacks that column.
+        """
+        columns = list(columns) if columns is not None else self.numeric_columns(data)
+        arrays = {col: np.asarray(data[col]) for col in columns}
+        for col, values in arrays.items():
+            self.column(self.national, col).update(values)
+
+        labels = groups if groups is not None else (data[self.by] if self.by is not None and self.by in data else None)
+        if labels is None:
+            return self
+        codes, uniques = pd.factorize(pd.Series(labels), sort=False)
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        for i, label in enumerate(uniques):
+            rows = order[bounds[i]:bounds[i + 1]]
+            store = self.groups.setdefault(label, {})
+            for col, values in arrays.items():
+                self.column(store, col).update(values[rows])
+        return self
+
+    def merge(self, other):
+        for col, summary in other.national.items():
+            self.column(self.national, col).merge(summary)
+        for label, store in other.groups.items():
+            mine = self.groups.setdefault(label, {})
+            for col, summary in store.items():
+                self.column(mine, col).merge(summary)
+        return self
+
+    def to_dict(self):
+        return {
+            'columns': self.columns, 'by': self.by, 'k': self.k,
+            'national': {col: summary.to_dict() for col, summary in self.national.items()},
+            'groups': [[str(label), {col: summary.to_dict() for col, summary in store.items()}]
+                       for label, store in self.groups.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        stats = cls(state['columns'], state['by'], state['k'])
+        stats.national = {col: ColumnSummary.from_dict(summary) for col, summary in state['national'].items()}
+        stats.groups = {label: {col: ColumnSummary.from_dict(summary) for col, summary in store.items()}
+                        for label, store in state['groups']}
+        return stats
+
+    # 2. QUERIES
+    def summary(self, col, group=None):
+        store = self.national if group is None else self.groups.get(group, {})
+        if col not in store:
+            raise KeyError(f"No statistics for '{col}'" + (f" in group '{group}'" if group is not None else ''))
+        return store[col]
+
+    def quantile(self, col, q, state=None):
+        return self.summary(col, state).sketch.quantile(q)
+
+    def clip_bounds(self, col, lower=0.01, upper=0.99, state=None):
+        """
+        (low, high) percentiles, e.g. for plot limits or winsorizing.
+        """
+        low, high = self.quantile(col, [lower, upper], state)
+        return float(low), float(high)
+
+    def describe(self, columns=None, state=None, percentiles=DESCRIBE_PERCENTILES):
+        """
+        Same layout as DataFrame.describe() (count, mean, std, min, percentiles, max).
+        """
+        store = self.national if state is None else self.groups.get(state, {})
+        columns = list(store) if columns is None else list(columns)
+        return pd.DataFrame({col: self.summary(col, state).describe(percentiles) for col in columns})
+
+
+# CORRELATION MOMENTS
+class Moments:
+    """
+    Row count, mean vector and co-moment matrix sum((x - mean)(x - mean)^T) of p columns.
+    Partial moments merge exactly (Chan et al.), and centering keeps float64 sums accurate
+    even for large-valued columns such as pincode.
+    """
+
+    def __init__(self, p):
+        self.n = 0
+        self.mean = np.zeros(p)
+        self.comoment = np.zeros((p, p))
+
+    def combine(self, n, mean, comoment):
+        if n == 0:
+            return self
+        total = self.n + n
+        delta = mean - self.mean
+        self.comoment += comoment + np.outer(delta, delta) * (self.n * n / total)
+        self.mean += delta * (n / total)
+        self.n = total
+        return self
+
+    def merge(self, other):
+        return self.combine(other.n, other.mean, other.comoment)
+
+    def to_dict(self):
+        return {'n': self.n, 'mean': self.mean.tolist(), 'comoment': self.comoment.tolist()}
+
+    @classmethod
+    def from_dict(cls, state):
+        moments = cls(len(state['mean']))
+        moments.n = state['n']
+        moments.mean = np.asarray(state['mean'], dtype=np.float64)
+        moments.comoment = np.asarray(state['comoment'], dtype=np.float64)
+        return moments
+
+
+class CorrelationAccumulator:
+    """
+    Pearson correlation (and covariance) matrices of a fixed set of numeric columns,
+    nationally and per `by` group, from running float64 moments instead of the rows.
+
+    update() is fed every chunk, shard or daily delta once; merge() folds in accumulators
+    built elsewhere. corr() then answers any subset of the columns, for the whole country
+    or one state, from a p x p matrix. with_linear() adds a column that is a weighted sum of
+    tracked ones (e.g. a health score built from scaled ratios), whose moments follow exactly
+    from the tracked ones, so it never has to be materialized.
+    Rows with a NaN in any tracked column are skipped.
+    """
+
+    def __init__(self, columns=None, by='state', block_rows=1 << 16):
+        self.columns = list(columns) if columns is not None else None
+        self.by = by
+        self.block_rows = block_rows
+        self.national = None
+        self.groups = {}  # group label -> Moments
+
+    def moments(self, label=None):
+        if label is None:
+            if self.national is None:
+                self.national = Moments(len(self.columns))
+            return self.national
+        if label not in self.groups:
+            self.groups[label] = Moments(len(self.columns))
+        return self.groups[label]
+
+    # 1. FEEDING
+    def update(self, data, groups=None):
+        """
+        Folds a chunk (DataFrame or dict of arrays) in, block by block, so only a
+        block_rows x p float64 matrix is ever materialized.
+        """
+        if self.columns is None:
+            self.columns = [col for col in data.columns
+                            if pd.api.types.is_numeric_dtype(data[col]) and not pd.api.types.is_bool_dtype(data[col])]
+        arrays = [np.asarray(data[col]) for col in self.columns]
+        labels = groups if groups is not None else (data[self.by] if self.by is not None and self.by in data else None)
+        if labels is not None:
+            codes, uniques = pd.factorize(pd.Series(labels), sort=False)
+
+        n = len(arrays[0]) if arrays else 0
+        for start in range(0, n, self.block_rows):
+            block = np.column_stack([values[start:start + self.block_rows] for values in arrays]).astype(np.float64)
+            valid = ~np.isnan(block).any(axis=1)
+            if not valid.all():
+                block = block[valid]
+            self.add_block(block)
+            if labels is not None:
+                block_codes = codes[start:start + self.block_rows]
+                self.add_grouped(block, block_codes if valid.all() else block_codes[valid], uniques)
+        return self
+
+    def add_block(self, block):
+        if not len(block):
+            return
+        mean = block.mean(axis=0)
+        centered = block - mean
+        self.moments().combine(len(block), mean, centered.T @ centered)
+
+    def add_grouped(self, block, codes, uniques):
+        """
+        Per-group moments of one block: group sums by bincount, then one centered
+        cross-product per column pair, also by bincount.
+        """
+        keep = codes >= 0
+        block, codes = block[keep], codes[keep]
+        if not len(block):
+            return
+        n_groups = len(uniques)
+        counts = np.bincount(codes, minlength=n_groups)
+        p = block.shape[1]
+        sums = np.column_stack([np.bincount(codes, weights=block[:, i], minlength=n_groups) for i in range(p)])
+        means = sums / np.maximum(counts, 1)[:, None]
+        centered = block - means[codes]
+        comoments = np.zeros((n_groups, p, p))
+        for i in range(p):
+            for j in range(i, p):
+                comoments[:, i, j] = np.bincount(codes, weights=centered[:, i] * centered[:, j], minlength=n_groups)
+                comoments[:, j, i] = comoments[:, i, j]
+        for g in np.flatnonzero(counts):
+            self.moments(uniques[g]).combine(int(counts[g]), means[g], comoments[g])
+
+    def merge(self, other):
+        if self.columns is None:
+            self.columns = list(other.columns)
+        if other.columns != self.columns:
+            raise ValueError("Only accumulators over the same columns can be merged")
+        if other.national is not None:
+            self.moments().merge(other.national)
+        for label, moments in other.groups.items():
+            self.moments(label).merge(moments)
+        return self
+
+    def to_dict(self):
+        return {
+            'columns': self.columns, 'by': self.by, 'block_rows': self.block_rows,
+            'national': self.national.to_dict() if self.national is not None else None,
+            'groups': [[str(label), moments.to_dict()] for label, moments in self.groups.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        accumulator = cls(state['columns'], state['by'], state['block_rows'])
+        if state['national'] is not None:
+            accumulator.national = Moments.from_dict(state['national'])
+        accumulator.groups = {label: Moments.from_dict(moments) for label, moments in state['groups']}
+        return accumulator
+
+    # 2. DERIVED COLUMNS
+    def with_linear(self, name, weights, offset=0.0):
+        """
+        Copy of the accumulator with an extra column name = offset + sum(weight * column).
+        """
+        w = np.array([weights.get(col, 0.0) for col in self.columns], dtype=np.float64)
+        result = CorrelationAccumulator(self.columns + [name], self.by, self.block_rows)
+
+        def extend(moments):
+            extended = Moments(len(w) + 1)
+            extended.n = moments.n
+            extended.mean = np.r_[moments.mean, moments.mean @ w + offset]
+            cross = moments.comoment @ w
+            extended.comoment = np.block([[moments.comoment, cross[:, None]], [cross[None, :], np.array([[w @ cross]])]])
+            return extended
+
+        if self.national is not None:
+            result.national = extend(self.national)
+        result.groups = {label: extend(moments) for label, moments in self.groups.items()}
+        return result
+
+    # 3. QUERIES
+    def select(self, columns, state):
+        moments = self.national if state is None else self.groups.get(state)
+        if moments is None or moments.n == 0:
+            raise KeyError("No rows accumulated" + (f" for '{state}'" if state is not None else ''))
+        columns = self.columns if columns is None else list(columns)
+        idx = [self.columns.index(col) for col in columns]
+        return columns, moments, moments.comoment[np.ix_(idx, idx)]
+
+    def cov(self, columns=None, state=None):
+        """
+        Sample covariance matrix (ddof=1), like DataFrame.cov().
+        """
+        columns, moments, comoment = self.select(columns, state)
+        return pd.DataFrame(comoment / max(moments.n - 1, 1), index=columns, columns=columns)
+
+    def corr(self, columns=None, state=None):
+        """
+        Pearson correlation matrix, like DataFrame.corr() (NaN for constant columns).
+        """
+        columns, _, comoment = self.select(columns, state)
+        scale = np.sqrt(np.diag(comoment))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            matrix = comoment / np.outer(scale, scale)
+        matrix = np.where(np.outer(scale, scale) > 0, matrix, np.nan)
+        np.fill_diagonal(matrix, np.where(scale > 0, 1.0, np.nan))
+        return pd.DataFrame(np.clip(matrix, -1.0, 1.0), index=columns, columns=columns)
+
+
+def summarize_stream(stream, df):
+    """
+    JSON-ready summary statistics and correlation moments of one cleaned stream, so they can
+    be stored next to its StreamCache entry and read back on a cache hit instead of recomputed.
+    """
+    return {'stats': SummaryStats().update(df).to_dict(), 'corr': CorrelationAccumulator().update(df).to_dict()}
@@ -0,0 +1,237 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# Tensor Store: Memory-Mapped [date, district, metric] Counts (Dense) and Pincode Series (Sparse)
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from metrics import COUNT_COLS
+from rollup import DISTRICT_DAY_GRAIN, PINCODE_DAY_GRAIN, expand_total
+
+TENSOR_METRICS = COUNT_COLS + ['total_enrol', 'total_updates', 'total_activity']
+
+UINT32_MAX = np.iinfo(np.uint32).max
+
+
+def write_array(path, values):
+    with open(path + '.tmp', 'wb') as f:
+        np.save(f, values)
+    os.replace(path + '.tmp', path)
+
+
+def write_axes(directory, axes):
+    path = os.path.join(directory, 'axes.json')
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(axes, f, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+
+
+def read_axes(directory):
+    with open(os.path.join(directory, 'axes.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def metric_columns(cells, metrics):
+    """
+    uint32 [cell, metric] matrix of count columns and registered totals.
+    """
+    values = np.empty((len(cells), len(metrics)), dtype=np.uint32)
+    for j, name in enumerate(metrics):
+        column = sum(cells[col].to_numpy().astype(np.int64) for col in expand_total(name))
+        if len(column) and column.max() > UINT32_MAX:
+            raise ValueError(f"'{name}' exceeds the uint32 range of the tensor store")
+        values[:, j] = column
+    return values
+
+
+def calendar(cells):
+    """
+    Every calendar day from the first to the last date of the cells, and each cell's day offset.
+    """
+    dates = cells['date'].to_numpy().astype('datetime64[D]')
+    first = dates.min()
+    days = (dates - first).astype(np.int64)
+    return pd.date_range(pd.Timestamp(first), periods=int(days.max()) + 1, freq='D', name='date'), days
+
+
+# 1. DENSE DISTRICT TENSOR
+class DenseTensorStore:
+    """
+    Daily counts of every district as one uint32 array [date, district, metric], written once
+    from the district-day rollup cube and memory-mapped from disk afterwards.
+
+    Dates run over every calendar day (a day without rows is 0), districts are sorted by
+    (state, district) so each state is a contiguous run of columns, and metrics are the count
+    columns plus the registered totals. Temporal views are then array slices instead of a
+    groupby or pivot_table over master_df:
+      - district_series(): one column of the tensor,
+      - by_state(): state x date sums by one np.add.reduceat over the district axis,
+      - rolling(): N-day window sums from a cumulative sum along the date axis,
+      - trends(): least-squares daily slope of every district from one matrix-vector product.
+    A store of 1,000 districts x 300 days x 10 metrics is 12 MB.
+    """
+
+    def __init__(self, values, dates, districts, metrics):
+        self.values = values  # [date, district, metric] uint32, usually a read-only memmap
+        self.dates = pd.DatetimeIndex(dates, name='date')
+        self.districts = districts
+        self.metrics = list(metrics)
+        state_codes, self.states = pd.factorize(districts.get_level_values('state'))
+        self.state_starts = np.flatnonzero(np.r_[True, state_codes[1:] != state_codes[:-1]])
+        self.prefix = {}  # metric -> [date + 1, district] cumulative sums, built on first rolling()
+
+    @classmethod
+    def build(cls, cube, directory, metrics=TENSOR_METRICS):
+        cube = cube.at(DISTRICT_DAY_GRAIN)
+        cells = cube.cells
+        dates, days = calendar(cells)
+        district_codes, districts = pd.MultiIndex.from_frame(cells[['state', 'district']]).factorize(sort=True)
+        values = np.zeros((len(dates), len(districts), len(metrics)), dtype=np.uint32)
+        values.reshape(-1, len(metrics))[days * len(districts) + district_codes] = metric_columns(cells, metrics)
+
+        os.makedirs(directory, exist_ok=True)
+        write_array(os.path.join(directory, 'values.npy'), values)
+        write_axes(directory, {
+            'first_date': str(dates[0].date()), 'n_dates': len(dates), 'metrics': list(metrics),
+            'districts': [[str(state), str(district)] for state, district in districts],
+        })
+        print(f"Tensor store: {values.shape} {values.dtype} ({values.nbytes / 1e6:,.1f} MB) -> {directory}")
+        return cls.open(directory)
+
+    @classmethod
+    def open(cls, directory):
+        axes = read_axes(directory)
+        values = np.load(os.path.join(directory, 'values.npy'), mmap_mode='r')
+        dates = pd.date_range(axes['first_date'], periods=axes['n_dates'], freq='D', name='date')
+        districts = pd.MultiIndex.from_tuples([tuple(pair) for pair in axes['districts']], names=['state', 'district'])
+        return cls(values, dates, districts, axes['metrics'])
+
+    # 1. SLICES
+    def date_range(self, start=None, stop=None):
+        """
+        Slice of the date axis from `start` to `stop` (both inclusive, None = open end).
+        """
+        first = 0 if start is None else self.dates.searchsorted(pd.Timestamp(start), side='left')
+        last = len(self.dates) if stop is None else self.dates.searchsorted(pd.Timestamp(stop), side='right')
+        return slice(first, last)
+
+    def metric(self, name, start=None, stop=None):
+        """
+        [date, district] view of one metric (no copy).
+        """
+        return self.values[self.date_range(start, stop), :, self.metrics.index(name)]
+
+    def district_series(self, name, state, district, start=None, stop=None):
+        window = self.date_range(start, stop)
+        column = self.districts.get_loc((state, district))
+        return pd.Series(self.values[window, column, self.metrics.index(name)].astype(np.int64),
+                         index=self.dates[window], name=name)
+
+    # 2. AGGREGATES
+    def by_state(self, name, start=None, stop=None):
+        """
+        State x date totals of one metric (the temporal heatmap), like a pivot_table with aggfunc='sum'.
+        """
+        window = self.date_range(start, stop)
+        sums = np.add.reduceat(self.metric(name, start, stop), self.state_starts, axis=1, dtype=np.int64)
+        return pd.DataFrame(sums.T, index=pd.Index(self.states, name='state'), columns=self.dates[window])
+
+    def rolling(self, name, window):
+        """
+        `window`-day sums of one metric for every district ([date, district] DataFrame); the first
+        window - 1 days, which have no full window yet, are NaN as in pandas' rolling().
+        """
+        if name not in self.prefix:
+            prefix = np.zeros((len(self.dates) + 1, len(self.districts)), dtype=np.int64)
+            np.cumsum(self.metric(name), axis=0, dtype=np.int64, out=prefix[1:])
+            self.prefix[name] = prefix
+        prefix = self.prefix[name]
+        sums = np.full((len(self.dates), len(self.districts)), np.nan)
+        sums[window - 1:] = prefix[window:] - prefix[:-window]
+        return pd.DataFrame(sums, index=self.dates, columns=self.districts)
+
+    def trends(self, name, start=None, stop=None):
+        """
+        Least-squares slope (change in daily count per day) of one metric for every district.
+        """
+        counts = self.metric(name, start, stop).astype(np.float64)
+        t = np.arange(len(counts), dtype=np.float64)
+        t -= t.mean()
+        denominator = t @ t
+        slopes = (t @ counts) / denominator if denominator > 0 else np.zeros(len(self.districts))
+        return pd.Series(slopes, index=self.districts, name=f"{name}_trend")
+
+
+# 2. SPARSE PINCODE TENSOR
+class SparseTensorStore:
+    """
+    The pincode counterpart of DenseTensorStore. Most pincodes report on a fraction of the days,
+    so the series are stored compressed (CSR): `offsets` gives each pincode's run of
+    (day, values[metric]) entries, sorted by day. Every array is memory-mapped on open.
+    series() is one slice of the run, dense() lays out a selection of pincodes as a
+    [date, pincode] array, and daily_totals() is one bincount over the day offsets.
+    """
+
+    def __init__(self, pincodes, offsets, days, values, dates, metrics):
+        self.pincodes = pd.Index(pincodes, name='pincode')
+        self.offsets = offsets
+        self.days = days
+        self.values = values  # [entry, metric] uint32
+        self.dates = pd.DatetimeIndex(dates, name='date')
+        self.metrics = list(metrics)
+
+    @classmethod
+    def build(cls, cube, directory, metrics=TENSOR_METRICS):
+        cube = cube.at(PINCODE_DAY_GRAIN)
+        cells = cube.cells  # sorted by (pincode, date)
+        dates, days = calendar(cells)
+        pincode_codes, pincodes = pd.factorize(cells['pincode'], sort=True)
+        offsets = np.r_[0, np.cumsum(np.bincount(pincode_codes, minlength=len(pincodes)))].astype(np.int64)
+
+        os.makedirs(directory, exist_ok=True)
+        write_array(os.path.join(directory, 'pincodes.npy'), np.asarray(pincodes))
+        write_array(os.path.join(directory, 'offsets.npy'), offsets)
+        write_array(os.path.join(directory, 'days.npy'), days.astype(np.uint16 if len(dates) <= 1 << 16 else np.uint32))
+        write_array(os.path.join(directory, 'values.npy'), metric_columns(cells, metrics))
+        write_axes(directory, {'first_date': str(dates[0].date()), 'n_dates': len(dates), 'metrics': list(metrics)})
+        print(f"Sparse tensor store: {len(pincodes):,} pincodes, {len(cells):,} pincode-days "
+              f"({len(cells) / max(len(pincodes) * len(dates), 1):.1%} dense) -> {directory}")
+        return cls.open(directory)
+
+    @classmethod
+    def open(cls, directory):
+        axes = read_axes(directory)
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r')
+                  for name in ('pincodes', 'offsets', 'days', 'values')}
+        dates = pd.date_range(axes['first_date'], periods=axes['n_dates'], freq='D', name='date')
+        return cls(arrays['pincodes'], arrays['offsets'], arrays['days'], arrays['values'], dates, axes['metrics'])
+
+    def series(self, name, pincode):
+        i = self.pincodes.get_loc(pincode)
+        run = slice(self.offsets[i], self.offsets[i + 1])
+        counts = np.zeros(len(self.dates), dtype=np.int64)
+        counts[self.days[run]] = self.values[run, self.metrics.index(name)]
+        return pd.Series(counts, index=self.dates, name=name)
+
+    def dense(self, name, pincodes=None):
+        """
+        [date, pincode] int64 DataFrame of one metric for the given pincodes (all by default).
+        """
+        codes = np.arange(len(self.pincodes)) if pincodes is None else self.pincodes.get_indexer(pincodes)
+        if (codes < 0).any():
+            raise KeyError(f"Unknown pincodes: {list(np.asarray(pincodes)[codes < 0])}")
+        starts, stops = self.offsets[codes], self.offsets[codes + 1]
+        lengths = stops - starts
+        # Entry positions of every selected run, and the output column each one lands in
+        entries = np.repeat(starts - np.r_[0, np.cumsum(lengths)[:-1]], lengths) + np.arange(lengths.sum())
+        columns = np.repeat(np.arange(len(codes)), lengths)
+        counts = np.zeros((len(self.dates), len(codes)), dtype=np.int64)
+        counts[self.days[entries], columns] = self.values[entries, self.metrics.index(name)]
+        return pd.DataFrame(counts, index=self.dates, columns=self.pincodes[codes])
+
+    def daily_totals(self, name):
+        totals = np.bincount(self.days, weights=self.values[:, self.metrics.index(name)], minlength=len(self.dates))
+        return pd.Series(totals.astype(np.int64), index=self.dates, name=name)
@@ -0,0 +1,195 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# Windowed Indices: Weekly / Monthly / Rolling Index Means from Daily Prefix Sums of the Rollup Cells
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from rollup import DISTRICT_DAY_GRAIN, HEALTH_WEIGHTS, RATIO_COLS
+from scaling import RunningScaler
+
+
+def district_index(cells):
+    """
+    (state, district) labels of cells as plain strings, so cubes with different categories line up.
+    """
+    return pd.MultiIndex.from_arrays([cells['state'].astype(str).to_numpy(), cells['district'].astype(str).to_numpy()],
+                                     names=['state', 'district'])
+
+
+class WindowedIndices:
+    """
+    Every behavioral index (mbu_compliance, saturation_ratio, mobility_index, late_adopter_ratio)
+    and the health_score as a mean over any window of days, per district or per state.
+
+    The mean of a ratio over a window is sum(ratio_sum) / sum(n_rows) of the window's
+    district-day cells, so all that is kept is a cumulative sum along the date axis of a
+    [date, district] grid per column (prefix[t] = total of days before t). Any window is then
+    prefix[stop] - prefix[start]: calendar weeks and months, N-day rolling windows and the
+    latest N days all cost one subtraction per district, however long the history is.
+    health_score is the weighted sum of scaled ratio means (as in RollupCube.health_mean), with
+    a RunningScaler ('maxabs' by default, like health_score in master_df) over the row bounds.
+
+    update() folds in a district-day cube: a full build, or the delta of a daily refresh.
+    New days are appended to the prefix sums. For a revised day, the old daily value is read
+    back as prefix[t + 1] - prefix[t] and only the prefix rows from that day on are corrected.
+    Either way the history is never rescanned. The scaler bounds only widen, because mins and
+    maxes cannot be subtracted. The state round-trips through save() / load().
+
+        windows = WindowedIndices().update(district_cube)
+        windows.calendar('M', by='state')      # monthly index means per state
+        windows.rolling(7)                     # 7-day rolling means per district
+    """
+
+    def __init__(self, ratios=RATIO_COLS, weights=HEALTH_WEIGHTS, scaling='maxabs'):
+        self.ratios = list(ratios)
+        self.weights = dict(weights)
+        self.columns = [f'{name}_sum' for name in self.ratios] + ['n_rows']
+        self.scaler = RunningScaler(self.ratios, method=scaling)
+        self.dates = None
+        self.districts = None
+        self.prefix = {}  # column -> [date + 1, district] float64 running sums
+
+    # 1. FOLDING IN DAY CELLS
+    def grow(self, dates, districts):
+        """
+        Extends the calendar to cover `dates` and the district axis to cover `districts`.
+        Days before the first one are prepended (their prefix is 0), days after the last one
+        repeat the final prefix row, and new districts get an all-zero prefix column.
+        """
+        if self.dates is None:
+            self.dates = pd.date_range(dates.min(), dates.max(), freq='D', name='date')
+            self.districts = districts
+            self.prefix = {col: np.zeros((len(self.dates) + 1, len(districts))) for col in self.columns}
+            return
+        first, last = min(self.dates[0], dates.min()), max(self.dates[-1], dates.max())
+        before = (self.dates[0] - first).days
+        after = (last - self.dates[-1]).days
+        merged = self.districts.union(districts, sort=True) if not districts.isin(self.districts).all() else self.districts
+        place = merged.get_indexer(self.districts)
+        for col, prefix in self.prefix.items():
+            grown = np.zeros((before + len(prefix) + after, len(merged)))
+            grown[before:before + len(prefix), place] = prefix
+            grown[before + len(prefix):, place] = prefix[-1]
+            self.prefix[col] = grown
+        self.dates = pd.date_range(first, last, freq='D', name='date')
+        self.districts = merged
+
+    def update(self, cube, dates=None):
+        """
+        Replaces the daily values of `dates` (default: every date in the cube) with the cube's cells.
+        """
+        cube = cube.at(DISTRICT_DAY_GRAIN)
+        cells = cube.cells
+        if not len(cells):
+            return self
+        cell_dates = pd.DatetimeIndex(cells['date'])
+        extra = pd.to_datetime(list(dates)) if dates is not None else cell_dates[:0]
+        touched = cell_dates.union(extra).unique().sort_values()
+        cell_districts = district_index(cells)
+        districts = cell_districts.unique().sort_values()
+        self.grow(touched, districts)
+        self.scaler.merge(RunningScaler.from_cube(cube, self.ratios, self.scaler.method))
+
+        # Daily [touched date, district] values of the cells; a district absent on a touched date is 0
+        rows = self.dates.get_indexer(touched)
+        row_of = pd.Series(np.arange(len(touched)), index=touched)
+        cell_rows = row_of.reindex(cell_dates).to_numpy()
+        cell_columns = self.districts.get_indexer(cell_districts)
+        first = rows.min()
+        for col, prefix in self.prefix.items():
+            fresh = np.zeros((len(touched), len(self.districts)))
+            fresh[cell_rows, cell_columns] = cells[col].to_numpy()
+            # Change of each touched day, accumulated forward from the first touched day
+            change = np.zeros((len(self.dates) - first, len(self.districts)))
+            change[rows - first] = fresh - (prefix[rows + 1] - prefix[rows])
+            prefix[first + 1:] += np.cumsum(change, axis=0)
+        return self
+
+    # 2. WINDOWS
+    def window_sums(self, starts, stops, by=None):
+        """
+        Column sums over days [start, stop) for every window, as {column: [window, group]}.
+        by='state' adds up the districts of each state (contiguous, as districts are sorted).
+        """
+        sums = {col: prefix[stops] - prefix[starts] for col, prefix in self.prefix.items()}
+        if by is None:
+            return sums, self.districts
+        if by != 'state':
+            raise ValueError(f"Windows can be grouped by district (by=None) or 'state', not {by!r}")
+        state_codes, states = pd.factorize(self.districts.get_level_values('state'))
+        bounds = np.flatnonzero(np.r_[True, state_codes[1:] != state_codes[:-1]])
+        return {col: np.add.reduceat(values, bounds, axis=1) for col, values in sums.items()}, pd.Index(states, name='state')
+
+    def means(self, starts, stops, labels, by=None):
+        """
+        Long frame of index means and row counts: one row per (window label, district or state).
+        Windows without rows have NaN means.
+        """
+        sums, groups = self.window_sums(np.asarray(starts), np.asarray(stops), by)
+        n = sums['n_rows']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            means = {name: np.where(n > 0, sums[f'{name}_sum'] / n, np.nan) for name in self.ratios}
+        health = np.zeros_like(n)
+        for name, weight in self.weights.items():
+            offset, scale = self.scaler.params(name)
+            health += (means[name] - offset) * scale * weight
+        means['health_score'] = health
+
+        labels = pd.DatetimeIndex(labels)
+        index = pd.MultiIndex.from_arrays(
+            [labels.repeat(len(groups))] + [np.tile(groups.get_level_values(level), len(labels)) for level in range(groups.nlevels)],
+            names=['date'] + list(groups.names),
+        )
+        columns = {name: values.ravel() for name, values in means.items()}
+        columns['n_rows'] = n.ravel().astype(np.int64)
+        return pd.DataFrame(columns, index=index)
+
+    def calendar(self, freq='W', by=None):
+        """
+        Means per calendar period ('W' = week, 'M' = month, 'Q', ...), labelled by the period's first day.
+        """
+        periods = self.dates.to_period(freq)
+        bounds = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+        starts, stops = bounds, np.r_[bounds[1:], len(self.dates)]
+        return self.means(starts, stops, periods[bounds].start_time, by)
+
+    def rolling(self, days, by=None):
+        """
+        Trailing `days`-day means, labelled by the window's last day (first full window onwards).
+        """
+        stops = np.arange(days, len(self.dates) + 1)
+        return self.means(stops - days, stops, self.dates[stops - 1], by)
+
+    def latest(self, days, by=None):
+        """
+        Means over the last `days` days only: one window, one subtraction.
+        """
+        stop = len(self.dates)
+        return self.means([max(stop - days, 0)], [stop], self.dates[[stop - 1]], by).droplevel('date')
+
+    # 3. PERSISTENCE
+    def save(self, path):
+        state = {f'prefix__{col}': prefix for col, prefix in self.prefix.items()}
+        state.update({
+            'first_date': np.array(str(self.dates[0].date())), 'n_dates': np.array(len(self.dates)),
+            'states': np.asarray(self.districts.get_level_values('state'), dtype=str),
+            'district_names': np.asarray(self.districts.get_level_values('district'), dtype=str),
+            'scaler_low': self.scaler.low, 'scaler_high': self.scaler.high, 'scaler_count': self.scaler.count,
+        })
+        with open(path + '.tmp', 'wb') as f:
+            np.savez(f, **state)
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, path, ratios=RATIO_COLS, weights=HEALTH_WEIGHTS, scaling='maxabs'):
+        windows = cls(ratios, weights, scaling)
+        data = np.load(path)
+        windows.dates = pd.date_range(str(data['first_date']), periods=int(data['n_dates']), freq='D', name='date')
+        windows.districts = pd.MultiIndex.from_arrays([data['states'], data['district_names']], names=['state', 'district'])
+        windows.prefix = {col: data[f'prefix__{col}'] for col in windows.columns}
+        windows.scaler.low, windows.scaler.high = data['scaler_low'], data['scaler_high']
+        windows.scaler.count = data['scaler_count']
+        return windows
@@ -0,0 +1,8 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# Test Setup: the Pipeline Modules Live Flat in ss.py/ and Are Imported by Name, as dd.py Does
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ss.py'))
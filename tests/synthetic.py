@@ -0,0 +1,103 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# Synthetic Data: Small Raw Streams with the Label Variants, Duplicates and Shared Pincodes of the Real Files
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from geography import PincodeIndex
+from ingest import KEY_DTYPES, STREAM_SCHEMAS, apply_schema, clean_stream
+from merge import aggregate_collisions
+
+STREAMS = list(STREAM_SCHEMAS)
+
+# (state, district, pincode): spelling variants of one state, a pincode shared by two districts,
+# a district named after its state, and a locality where a district should be
+GEOGRAPHY = [
+    ('Odisha', 'Khordha', 751001), ('ODISHA', 'Khordha', 751002), ('Orissa', 'Cuttack', 753001),
+    ('West Bengal', 'Howrah', 711405), ('West Bengal', 'Domjur', 711405), ('WESTBENGAL', 'Kolkata', 700001),
+    ('Karnataka', 'Bengaluru Urban', 560043), ('Bihar', 'Darbhanga', 846004), ('Darbhanga', 'Darbhanga', 846004),
+    ('Bihar', 'Near Meera Hospital', 846004), ('Bihar', 'Patna', 800001), ('Maharashtra', 'Nagpur', 440001),
+]
+
+
+def raw_stream(stream, n_rows=600, n_days=40, seed=0, first_date='2025-03-01'):
+    """
+    Raw (untyped) rows of one stream as they appear in the CSVs: dd-mm-YYYY date strings,
+    Poisson counts, and 5% of the rows repeated verbatim.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(first_date, periods=n_days, freq='D')
+    place = rng.integers(0, len(GEOGRAPHY), n_rows)
+    df = pd.DataFrame({
+        'date': dates[rng.integers(0, n_days, n_rows)].strftime('%d-%m-%Y'),
+        'state': [GEOGRAPHY[i][0] for i in place],
+        'district': [GEOGRAPHY[i][1] for i in place],
+        'pincode': [GEOGRAPHY[i][2] for i in place],
+    })
+    for col in STREAM_SCHEMAS[stream]:
+        df[col] = rng.poisson(rng.uniform(0, 20, n_rows))
+    return pd.concat([df, df.sample(n_rows // 20, random_state=seed)], ignore_index=True)
+
+
+def raw_streams(seed=0, **kwargs):
+    return {stream: raw_stream(stream, seed=seed + i, **kwargs) for i, stream in enumerate(STREAMS)}
+
+
+def typed_stream(stream, df):
+    """
+    A raw frame typed the way read_member types a parsed CSV member.
+    """
+    return apply_schema(df.astype({'state': KEY_DTYPES['state'], 'district': KEY_DTYPES['district']}), stream)
+
+
+def merge_ready(frames):
+    """
+    Typed frames taken through dd.py's pre-merge steps: clean_stream, pincode repair with
+    an index tallied over every stream, and the second collision fold.
+    """
+    cleaned = {stream: clean_stream(stream, typed_stream(stream, df))[0] for stream, df in frames.items()}
+    index = PincodeIndex()
+    for df in cleaned.values():
+        index.update(df)
+    return [aggregate_collisions(index.repair(df)[0]) for df in cleaned.values()]
+
+
+def write_zip(path, stream, df, n_members=3):
+    """
+    Writes `df` as a ZIP of `n_members` CSV members, like the api_data_aadhar_*.zip downloads.
+    """
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as z:
+        for i, rows in enumerate(np.array_split(np.arange(len(df)), n_members)):
+            z.writestr(f'{stream}/part_{i}.csv', df.iloc[rows].to_csv(index=False))
+    return str(path)
+
+
+def write_sources(directory, frames, n_members=3):
+    return {stream: write_zip(directory / f'{stream}.zip', stream, df, n_members) for stream, df in frames.items()}
+
+
+def canonical(df, keys):
+    """
+    Rows in a fixed order with labels as plain strings, so frames built differently compare equal.
+    """
+    df = df.astype({col: str for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)})
+    return df.sort_values(list(keys)).reset_index(drop=True)
+
+
+def assert_cells_equal(left, right):
+    """
+    Cells of two rollup cubes agree: counts exactly, ratio sums up to float rounding.
+    """
+    assert left.grain == right.grain
+    left, right = canonical(left.cells, left.grain), canonical(right.cells, right.grain)
+    assert list(left.columns) == list(right.columns)
+    assert left.shape == right.shape
+    for col in left.columns:
+        a, b = left[col].to_numpy(), right[col].to_numpy()
+        if a.dtype.kind == 'f':
+            np.testing.assert_allclose(a, b, rtol=1e-12, err_msg=col)
+        else:
+            np.testing.assert_array_equal(a, b, err_msg=col)
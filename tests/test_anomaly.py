@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from anomaly import MAD_SCALE, AnomalyDetector, benchmark_median_mad, rolling_median_mad, sliding_median_mad
+from merge import outer_join
+from metrics import COUNT_COLS
+from rollup import PINCODE_DAY_GRAIN, RollupCube
+from tests.synthetic import merge_ready, raw_streams
+
+METRICS = ['total_activity', 'age_0_5']
+EVENT_COLUMNS = ['pincode', 'date', 'metric', 'value', 'median', 'scale', 'score', 'kind']
+
+
+@pytest.fixture(scope='module')
+def master():
+    master = outer_join(merge_ready(raw_streams(seed=50, n_rows=2000, n_days=45)))
+    dates = master['date'].drop_duplicates().sort_values().to_numpy()
+    pincodes = master['pincode'].unique()
+    # A spike on top of the Poisson noise, and a steady series that goes silent for a day
+    spike = (master['pincode'] == pincodes[0]) & (master['date'] == dates[30])
+    master.loc[spike, COUNT_COLS] = master.loc[spike, COUNT_COLS] * 40 + 50
+    master.loc[master['pincode'] == pincodes[1], COUNT_COLS] = 10
+    master = master[~((master['pincode'] == pincodes[1]) & (master['date'] == dates[35]))]
+    return master.reset_index(drop=True)
+
+
+def brute_force(master, detector):
+    """
+    The detector's rule evaluated one pincode, metric and day at a time with pandas and np.median.
+    """
+    df = master.assign(total_activity=master[COUNT_COLS].sum(axis=1).astype(np.int64))
+    dates = np.sort(df['date'].unique())
+    rows = []
+    for metric in detector.metrics:
+        panel = df.pivot_table(index='date', columns='pincode', values=metric, aggfunc='sum')
+        panel = panel.reindex(dates).fillna(0).astype(np.float32)
+        for pincode in panel.columns:
+            series = panel[pincode].to_numpy()
+            for day in range(detector.window, len(series)):
+                history = series[day - detector.window:day]
+                if np.count_nonzero(history) < detector.min_active:
+                    continue
+                median = np.median(history)
+                scale = np.maximum(np.median(np.abs(history - median)) * np.float32(MAD_SCALE), np.float32(detector.min_scale))
+                score = (series[day] - median) / scale
+                if score > detector.threshold or (score < -detector.threshold and series[day] < median * detector.dropout_ratio):
+                    rows.append((pincode, pd.Timestamp(dates[day]), metric, float(score)))
+    return pd.DataFrame(rows, columns=['pincode', 'date', 'metric', 'score'])
+
+
+def canonical_events(events):
+    return events[['pincode', 'date', 'metric', 'score']].astype({'metric': str}).sort_values(
+        ['pincode', 'date', 'metric'], ignore_index=True)
+
+
+@pytest.mark.parametrize('block_columns', [3, 1 << 12])
+def test_flags_match_brute_force(master, block_columns):
+    detector = AnomalyDetector(METRICS, window=10, threshold=4.0, block_columns=block_columns)
+    events = detector.scan(RollupCube.build(master, PINCODE_DAY_GRAIN)).events
+    expected = brute_force(master, detector)
+    assert {'spike', 'dropout'} <= set(events['kind'])
+    pd.testing.assert_frame_equal(canonical_events(events), canonical_events(expected), check_dtype=False, rtol=1e-6)
+    assert (events['kind'] == np.where(events['score'] > 0, 'spike', 'dropout')).all()
+
+
+def test_scan_without_candidates_gives_empty_events(master):
+    # No series has 1,000 active days, so no column is even scored
+    detector = AnomalyDetector(METRICS, window=10, min_active=1_000).scan(RollupCube.build(master, PINCODE_DAY_GRAIN))
+    assert detector.events.empty
+    assert list(detector.events.columns) == EVENT_COLUMNS
+    assert detector.events['date'].dtype.kind == 'M'
+    assert detector.daily_summary().empty
+    assert detector.top().empty
+
+
+def test_scan_needs_more_dates_than_the_window(master):
+    with pytest.raises(ValueError, match='more than 60 dates'):
+        AnomalyDetector(METRICS, window=60).scan(RollupCube.build(master, PINCODE_DAY_GRAIN))
+
+
+@pytest.mark.parametrize('window', [1, 2, 7, 14, 15])
+def test_median_network_matches_np_median(window):
+    rng = np.random.default_rng(window)
+    # Sparse small counts: many ties and zero runs, as in pincode-day series
+    series = rng.poisson(3, (60, 500)).astype(np.float32)
+    series[rng.random(series.shape) < 0.4] = 0
+    for ours, reference in zip(rolling_median_mad(series, window), sliding_median_mad(series, window)):
+        assert ours.dtype == np.float32
+        np.testing.assert_array_equal(ours, reference)
+
+
+def test_benchmark_median_mad(master):
+    report = benchmark_median_mad(RollupCube.build(master, PINCODE_DAY_GRAIN), METRICS, window=10)
+    assert report['identical'] and report['days'] == master['date'].nunique()
@@ -0,0 +1,38 @@
+import os
+
+import pandas as pd
+
+from cache import StreamCache
+from ingest import CLEANING_VERSION, clean_stream
+from tests.synthetic import raw_streams, write_sources
+
+
+def test_hit_reads_back_the_cleaned_frames(tmp_path):
+    sources = write_sources(tmp_path, raw_streams(seed=3))
+    cache = StreamCache(str(tmp_path / 'cache'))
+    frames, timings, meta = cache.load_streams(sources, clean_stream, CLEANING_VERSION, max_workers=1)
+    assert set(timings['stream']) == set(sources)
+
+    cached, timings, cached_meta = cache.load_streams(sources, clean_stream, CLEANING_VERSION, max_workers=1)
+    assert timings is None
+    assert cached_meta == meta
+    for stream, df in frames.items():
+        pd.testing.assert_frame_equal(cached[stream].astype({'state': str, 'district': str}),
+                                      df.astype({'state': str, 'district': str}))
+
+
+def test_new_version_or_mappings_replace_the_entry(tmp_path):
+    sources = write_sources(tmp_path, raw_streams(seed=4))
+    source = {'enrolment': sources['enrolment']}
+    cache = StreamCache(str(tmp_path / 'cache'))
+    cache.load_streams(source, clean_stream, CLEANING_VERSION, max_workers=1)
+    first = os.listdir(tmp_path / 'cache')
+
+    _, timings, _ = cache.load_streams(source, clean_stream, CLEANING_VERSION, mappings=({'A': 'B'},), max_workers=1)
+    assert timings is not None
+    second = os.listdir(tmp_path / 'cache')
+    assert len(second) == 1 and second != first
+
+    _, timings, _ = cache.load_streams(source, clean_stream, CLEANING_VERSION + 1, mappings=({'A': 'B'},), max_workers=1)
+    assert timings is not None
+    assert len(os.listdir(tmp_path / 'cache')) == 1
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from sklearn.cluster import KMeans
+
+from clustering import StreamingKMeans, squared_distances
+
+CENTERS = np.array([[0.0, 0.0, 0.0], [5.0, 5.0, 0.0], [0.0, 6.0, 6.0], [7.0, 0.0, 5.0]])
+
+
+def blobs(n_per_center, seed=0, shift=0.0):
+    rng = np.random.default_rng(seed)
+    X = np.concatenate([center + shift + rng.normal(0, 0.4, (n_per_center, 3)) for center in CENTERS])
+    return X, np.repeat(np.arange(len(CENTERS)), n_per_center)
+
+
+def matched(centroids):
+    """
+    Centroids re-ordered to follow CENTERS (nearest first).
+    """
+    return centroids[squared_distances(CENTERS, centroids).argmin(axis=1)]
+
+
+def test_squared_distances():
+    rng = np.random.default_rng(1)
+    X, C = rng.normal(size=(50, 4)), rng.normal(size=(6, 4))
+    np.testing.assert_allclose(squared_distances(X, C), ((X[:, None, :] - C[None, :, :]) ** 2).sum(axis=2), atol=1e-12)
+
+
+def test_full_mode_matches_sklearn():
+    X, truth = blobs(200)
+    weights = np.random.default_rng(2).integers(1, 20, len(X)).astype(np.float64)
+    model = StreamingKMeans(4, mode='full').fit(X, weights)
+    reference = KMeans(4, n_init=10, random_state=0).fit(X, sample_weight=weights)
+    assert model.inertia == pytest.approx(reference.inertia_, rel=1e-9)
+    np.testing.assert_allclose(matched(model.centroids), matched(reference.cluster_centers_), atol=1e-9)
+    # Every blob is one cluster
+    labels = model.predict(X)
+    assert all(len(set(labels[truth == c])) == 1 for c in range(4))
+    assert model.report()['shift'].iloc[-1] <= 1e-4 * np.mean(np.var(X, axis=0))
+
+
+def test_minibatch_mode_close_to_full():
+    X, _ = blobs(5_000, seed=3)
+    full = StreamingKMeans(4, mode='full').fit(X)
+    mini = StreamingKMeans(4, mode='minibatch', batch_size=512).fit(X)
+    assert len(mini.history) < mini.max_iter
+    assert mini.inertia <= 1.02 * full.inertia
+    np.testing.assert_allclose(matched(mini.centroids), matched(full.centroids), atol=0.05)
+
+
+def test_warm_start_from_yesterday():
+    today, _ = blobs(2_000, seed=4, shift=0.1)
+    yesterday = StreamingKMeans(4, mode='full').fit(blobs(2_000, seed=5)[0]).centroids
+    cold = StreamingKMeans(4, mode='full').fit(today)
+    warm = StreamingKMeans(4, mode='full', init=yesterday).fit(today)
+    # Starting next to the answer: fewer iterations, same clusters
+    assert len(warm.history) <= len(cold.history)
+    assert warm.inertia == pytest.approx(cold.inertia, rel=1e-9)
+    np.testing.assert_allclose(matched(warm.centroids), matched(cold.centroids), atol=1e-9)
+
+    step = StreamingKMeans(4, init=yesterday).partial_fit(today[:500])
+    assert len(step.history) == 1 and step.score(today) < StreamingKMeans(4, init=yesterday).score(today)
+    with pytest.raises(ValueError, match='Warm-start'):
+        StreamingKMeans(3, init=yesterday).fit(today)
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from derived import DerivedFrame, Node
+from merge import outer_join
+from metrics import compute_metrics
+from tests.synthetic import merge_ready, raw_streams
+
+
+@pytest.fixture
+def master():
+    return outer_join(merge_ready(raw_streams(seed=60)))
+
+
+def expected_health(df):
+    ratios = compute_metrics(df, ['mbu_compliance', 'saturation_ratio'])
+    scaled = {name: (values - values.min()) / (values.max() - values.min()) for name, values in ratios.items()}
+    return 40 * scaled['mbu_compliance'] + 60 * scaled['saturation_ratio']
+
+
+def test_require_computes_once(master):
+    derived = DerivedFrame(master)
+    np.testing.assert_allclose(derived['health_score'].to_numpy(), expected_health(master), rtol=1e-12)
+    derived.require('health_score', 'mbu_compliance')
+    assert derived.evaluations['health_score'] == 1
+    assert derived.evaluations['mbu_compliance'] == 1
+    # Only what health_score needs was materialized
+    assert 'mobility_index' not in master.columns
+
+
+def test_replacing_an_input_recomputes_its_dependents(master):
+    derived = DerivedFrame(master)
+    derived.require('health_score')
+    derived['age_5_17'] = (master['age_5_17'] * 2).astype(master['age_5_17'].dtype)
+    np.testing.assert_allclose(derived['health_score'].to_numpy(), expected_health(derived.df), rtol=1e-12)
+    assert derived.evaluations['health_score'] == 2
+    # total_updates does not read age_5_17, so it was left alone
+    assert derived.evaluations['total_updates'] == 1
+
+
+def test_direct_writes_need_invalidate(master):
+    derived = DerivedFrame(master)
+    derived.require('health_score')
+    derived.df['bio_age_5_17'] = derived.df['bio_age_5_17'] // 2
+    # A write straight into the frame is not seen until it is invalidated
+    derived.require('health_score')
+    assert derived.evaluations['health_score'] == 1
+    derived.invalidate('bio_age_5_17')
+    np.testing.assert_allclose(derived['health_score'].to_numpy(), expected_health(derived.df), rtol=1e-12)
+    assert derived.evaluations['health_score'] == 2
+    # saturation_ratio reads the bio counts only through total_updates, which changed too
+    assert derived.evaluations['total_updates'] == 2
+
+
+def test_override_is_kept_until_invalidated(master):
+    derived = DerivedFrame(master)
+    derived['health_score'] = np.arange(len(master), dtype=np.float64)
+    derived['age_0_5'] = master['age_0_5'] + 1
+    np.testing.assert_array_equal(derived['health_score'].to_numpy(), np.arange(len(master)))
+    assert 'health_score' not in derived.evaluations
+    derived.invalidate('health_score')
+    assert 'health_score' not in derived.df.columns
+    np.testing.assert_allclose(derived['health_score'].to_numpy(), expected_health(derived.df), rtol=1e-12)
+
+
+def test_column_already_in_the_frame_is_an_override(master):
+    master['health_score'] = -1.0
+    derived = DerivedFrame(master)
+    assert (derived['health_score'] == -1.0).all()
+    derived.invalidate('health_score')
+    np.testing.assert_allclose(derived['health_score'].to_numpy(), expected_health(derived.df), rtol=1e-12)
+
+
+def test_rebind_treats_existing_columns_as_overrides(master):
+    derived = DerivedFrame(master)
+    derived.require('health_score')
+    fresh = master.drop(columns=list(derived.cache)).assign(health_score=-1.0)
+    derived.rebind(fresh)
+    assert (derived['health_score'] == -1.0).all()
+    np.testing.assert_allclose(derived['mbu_compliance'].to_numpy(),
+                               compute_metrics(fresh, ['mbu_compliance'])['mbu_compliance'], equal_nan=True)
+
+
+def test_unknown_names_and_cycles(master):
+    with pytest.raises(KeyError, match='no_such_column'):
+        DerivedFrame(master).require('no_such_column')
+    nodes = {'a': Node('a', ['b'], np.negative), 'b': Node('b', ['a'], np.negative)}
+    with pytest.raises(ValueError, match='Cycle'):
+        DerivedFrame(master, nodes).require('a')
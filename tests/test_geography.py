@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from geography import (LabelNormalizer, PincodeIndex, district_mapping, district_normalizer, garbage_keywords, normalize_stream,
+                       state_mapping, state_normalizer)
+from tests.synthetic import GEOGRAPHY, raw_stream, typed_stream
+
+
+def row_by_row(values, mapping, keywords=(), garbage='Other'):
+    """
+    The original per-row cleaning: strip + title case, mapping, garbage keywords.
+    """
+    def clean(label):
+        text = str(label).strip().title()
+        text = mapping.get(text, text)
+        return garbage if any(keyword in text for keyword in keywords) else text
+    return [None if pd.isna(label) else clean(label) for label in values]
+
+
+def test_normalize_matches_row_by_row_cleaning():
+    states = pd.Series([state for state, _, _ in GEOGRAPHY] + ['  bihar ', None, 'Orissa'], name='state', index=np.arange(15) * 2)
+    districts = pd.Series([district for _, district, _ in GEOGRAPHY] + ['Patna', 'Howrah', None], name='district')
+    for values, normalizer, expected in (
+        (states, state_normalizer, row_by_row(states, state_mapping)),
+        (districts, district_normalizer, row_by_row(districts, district_mapping, garbage_keywords)),
+    ):
+        result = normalizer.normalize(values)
+        assert isinstance(result.dtype, pd.CategoricalDtype)
+        assert result.name == values.name and result.index.equals(values.index)
+        assert [None if pd.isna(v) else v for v in result] == expected
+
+
+def test_variants_collapse_into_one_category():
+    result = state_normalizer.normalize(pd.Series(['ODISHA', 'Odisha', 'Orissa', 'West Bengal', 'WESTBENGAL', 'odisha ']))
+    assert result.nunique() == 2
+    assert list(result.cat.categories) == sorted(result.cat.categories)
+    assert result[0] == result[1] == result[2] == result[5]
+
+
+def test_garbage_labels_and_memo():
+    normalizer = LabelNormalizer({'Bombay': 'Mumbai'}, ['Near'], garbage_label='Unknown')
+    result = normalizer.normalize(pd.Series(['bombay', 'Near Meera Hospital', 'Pune']).astype('category'))
+    assert list(result) == ['Mumbai', 'Unknown', 'Pune']
+    assert normalizer.memo['bombay'] == 'Mumbai'
+
+
+def test_normalize_stream_cleans_both_label_columns():
+    df = typed_stream('enrolment', raw_stream('enrolment', n_rows=100))
+    normalized = normalize_stream(df)
+    assert list(normalized['state']) == row_by_row(df['state'], state_mapping)
+    assert list(normalized['district']) == row_by_row(df['district'], district_mapping, garbage_keywords)
+    pd.testing.assert_frame_equal(normalized.drop(columns=['state', 'district']), df.drop(columns=['state', 'district']))
+
+
+def labelled(rows):
+    """
+    Frame of (state, district, pincode, copies) rows, each repeated `copies` times.
+    """
+    records = [(state, district, pincode) for state, district, pincode, copies in rows for _ in range(copies)]
+    df = pd.DataFrame(records, columns=['state', 'district', 'pincode'])
+    return df.astype({'state': 'category', 'district': 'category', 'pincode': np.uint32})
+
+
+def majority(index, pincode):
+    state, district, found = index.lookup([pincode])
+    return (index.states[state[0]], index.districts[district[0]]) if found[0] else None
+
+
+@pytest.fixture
+def index():
+    return PincodeIndex().update(labelled([
+        ('Bihar', 'Darbhanga', 846004, 5), ('Darbhanga', 'Darbhanga', 846004, 3), ('Bihar', 'Other', 846004, 9),
+        ('West Bengal', 'Howrah', 711405, 4), ('West Bengal', 'Domjur', 711405, 2), ('Bihar', 'Patna', 800001, 1),
+    ]))
+
+
+def test_majority_vote_ignores_unresolved_labels(index):
+    assert majority(index, 846004) == ('Bihar', 'Darbhanga')
+    assert majority(index, 711405) == ('West Bengal', 'Howrah')
+    assert majority(index, 800001) == ('Bihar', 'Patna')
+    assert majority(index, 110001) is None
+
+
+def test_update_in_parts_equals_one_update():
+    df = normalize_stream(typed_stream('enrolment', raw_stream('enrolment', n_rows=300)))
+    whole = PincodeIndex().update(df)
+    parts = PincodeIndex().update(df.iloc[:100]).update(df.iloc[100:])
+    for pincode in df['pincode'].unique():
+        assert majority(parts, pincode) == majority(whole, pincode)
+
+
+def test_repair_relabels_unresolved_and_non_winning_states(index):
+    df = labelled([('Bihar', 'Other', 846004, 1), ('Darbhanga', 'Darbhanga', 846004, 1),
+                   ('West Bengal', 'Domjur', 711405, 1), ('Bihar', 'Unknown', 110001, 1)])
+    repaired, fixed = index.repair(df)
+    assert fixed == 2
+    assert list(zip(repaired['state'], repaired['district'])) == [
+        ('Bihar', 'Darbhanga'), ('Bihar', 'Darbhanga'),
+        # A valid minority label is kept, and a pincode the index never saw cannot be repaired
+        ('West Bengal', 'Domjur'), ('Bihar', 'Unknown'),
+    ]
+    assert index.repair(repaired.iloc[2:3])[1] == 0
+
+
+def test_save_load_round_trip(index, tmp_path):
+    path = str(tmp_path / 'pincode_index.npz')
+    index.save(path)
+    loaded = PincodeIndex.load(path)
+    for pincode in (846004, 711405, 800001, 110001):
+        assert majority(loaded, pincode) == majority(index, pincode)
+    # Loaded tallies keep counting where they left off
+    loaded.update(labelled([('West Bengal', 'Domjur', 711405, 3)]))
+    assert majority(loaded, 711405) == ('West Bengal', 'Domjur')
+
+
+def test_ties_go_to_the_alphabetically_first_pair():
+    tied = [('West Bengal', 'Howrah', 711405, 2), ('West Bengal', 'Domjur', 711405, 2),
+            ('Odisha', 'Khordha', 751001, 3), ('Orissa', 'Khordha', 751001, 3)]
+    # Whichever label is registered first, the tie resolves the same way
+    for rows in (tied, tied[::-1]):
+        index = PincodeIndex()
+        for row in rows:
+            index.update(labelled([row]))
+        assert majority(index, 711405) == ('West Bengal', 'Domjur')
+        assert majority(index, 751001) == ('Odisha', 'Khordha')
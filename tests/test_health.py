@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from health import NORMALIZERS, HealthScoreEngine
+from merge import outer_join
+from rollup import DISTRICT_DAY_GRAIN, RollupCube
+from tests.synthetic import merge_ready, raw_streams
+
+
+@pytest.fixture(scope='module')
+def cube():
+    return RollupCube.build(outer_join(merge_ready(raw_streams(seed=17))), DISTRICT_DAY_GRAIN)
+
+
+def scaled(values):
+    return (values - values.min()) / (values.max() - values.min())
+
+
+def test_minmax_engine_scales_district_means(cube):
+    means = cube.mean(['mbu_compliance', 'saturation_ratio'], ['state', 'district'])
+    scores = HealthScoreEngine('minmax').fit_cube(cube).score_cube(cube)
+    expected = 40 * scaled(means['mbu_compliance']) + 60 * scaled(means['saturation_ratio'])
+    pd.testing.assert_series_equal(scores, expected.rename('health_score'), rtol=1e-12)
+
+
+@pytest.mark.parametrize('normalizer', sorted(NORMALIZERS))
+def test_scores_stay_in_range(cube, normalizer):
+    scores = HealthScoreEngine(normalizer).fit_cube(cube).score_cube(cube)
+    assert scores.notna().all()
+    assert scores.min() >= 0 and scores.max() <= 100
+
+
+def test_quantile_clip_resists_one_extreme_district():
+    rng = np.random.default_rng(0)
+    data = {'mbu_compliance': rng.uniform(0, 1, 1_000), 'saturation_ratio': rng.uniform(0, 1, 1_000)}
+    data['saturation_ratio'][0] = 1_000.0
+    engine = HealthScoreEngine('quantile_clip').partial_fit(data)
+    clipped = engine.score(data)
+    minmax = HealthScoreEngine('minmax').partial_fit(data).score(data)
+    # Min-max squashes the other 999 districts into the bottom of the saturation range
+    assert np.ptp(minmax[1:]) < 45 and np.ptp(clipped[1:]) > 95
+    # The outlier itself is clipped to the top of the range
+    assert engine.normalizers()['saturation_ratio'](data['saturation_ratio'])[0] == 1.0
+
+
+def test_merged_engines_equal_one_fit():
+    rng = np.random.default_rng(1)
+    data = {'mbu_compliance': rng.normal(0.5, 0.1, 4_000), 'saturation_ratio': rng.gamma(2.0, 1.0, 4_000)}
+    whole = HealthScoreEngine('rank').partial_fit(data)
+    merged = HealthScoreEngine('rank').partial_fit({name: values[:1_500] for name, values in data.items()})
+    merged.merge(HealthScoreEngine('rank').partial_fit({name: values[1_500:] for name, values in data.items()}))
+    # k=200 sketches of 4,000 values: rank scores agree to within two sketch errors of 2 points each
+    assert np.abs(merged.score(data) - whole.score(data)).max() < 4
+
+
+def test_unknown_normalizer():
+    with pytest.raises(ValueError, match='Unknown normalizer'):
+        HealthScoreEngine('zscore')
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ingest import (apply_schema, clean_stream, concat_chunks, deduplicate, iter_zip_chunks, load_streams, parse_dates,
+                    read_all_from_zip)
+from tests.synthetic import raw_stream, raw_streams, typed_stream, write_sources, write_zip
+
+
+def as_labels(df):
+    return df.astype({'state': str, 'district': str})
+
+
+def test_load_streams_matches_a_serial_read(tmp_path):
+    frames = raw_streams(seed=1, n_rows=100)
+    sources = write_sources(tmp_path, frames, n_members=4)
+    loaded, report = load_streams(sources, max_workers=2)
+    for stream, df in frames.items():
+        # Members are put back in archive order, whatever order the workers finished in
+        pd.testing.assert_frame_equal(as_labels(loaded[stream]), as_labels(typed_stream(stream, df)))
+        rows = report[report['stream'] == stream]
+        assert list(rows['position']) == [0, 1, 2, 3]
+        assert list(rows['start_row']) == list(np.r_[0, np.cumsum(rows['rows'])[:-1]])
+
+
+@pytest.mark.parametrize('max_pending', [None, 1])
+def test_iter_zip_chunks_yields_every_member(tmp_path, max_pending):
+    sources = write_sources(tmp_path, raw_streams(seed=2, n_rows=50), n_members=3)
+    chunks = iter_zip_chunks(sources, max_workers=1, max_pending=max_pending)
+    seen = sorted((stream, position) for stream, position, _, _ in chunks)
+    assert seen == [(stream, position) for stream in sorted(sources) for position in range(3)]
+
+
+def test_read_all_from_zip(tmp_path):
+    df = raw_stream('enrolment', n_rows=80)
+    path = write_zip(tmp_path / 'e.zip', 'enrolment', df)
+    pd.testing.assert_frame_equal(read_all_from_zip(path, max_workers=1), df)
+    typed = read_all_from_zip(path, 'enrolment', max_workers=1)
+    pd.testing.assert_frame_equal(as_labels(typed), as_labels(typed_stream('enrolment', df)))
+
+
+def test_apply_schema_dtypes():
+    typed = apply_schema(raw_stream('enrolment', n_rows=40), 'enrolment')
+    assert typed['date'].dtype.kind == 'M'
+    assert typed['age_0_5'].dtype == np.uint16 and typed['pincode'].dtype == np.uint32
+
+
+def test_apply_schema_range_check():
+    df = raw_stream('enrolment', n_rows=40)
+    df.loc[0, 'age_0_5'] = 70000
+    with pytest.raises(OverflowError, match='age_0_5'):
+        apply_schema(df, 'enrolment')
+
+
+def test_parse_dates_parses_each_distinct_value():
+    values = pd.Series(['02-03-2025', '31-12-2025', '02-03-2025'])
+    expected = pd.to_datetime(['2025-03-02', '2025-12-31', '2025-03-02'])
+    pd.testing.assert_index_equal(pd.DatetimeIndex(parse_dates(values)), expected)
+    with pytest.raises(ValueError):
+        parse_dates(pd.Series(['2025-03-02']))
+
+
+def test_parse_dates_keeps_missing_values_missing():
+    parsed = parse_dates(pd.Series(['02-03-2025', None, '31-12-2025', np.nan, '02-03-2025']))
+    expected = pd.to_datetime(['2025-03-02', None, '2025-12-31', None, '2025-03-02'])
+    pd.testing.assert_index_equal(pd.DatetimeIndex(parsed), expected)
+
+
+@pytest.mark.parametrize('values', [[], [None, None]])
+def test_parse_dates_without_any_date(values):
+    parsed = parse_dates(pd.Series(values, dtype=object))
+    assert len(parsed) == len(values)
+    assert pd.isna(parsed).all()
+
+
+def test_apply_schema_drops_rows_without_a_date():
+    df = raw_stream('enrolment', n_rows=40).astype({'date': object})
+    df.loc[[3, 7], 'date'] = None
+    typed = apply_schema(df.copy(), 'enrolment')
+    assert len(typed) == len(df) - 2
+    assert typed['date'].notna().all()
+
+
+def test_concat_chunks_matches_pd_concat():
+    df = raw_stream('biometric', n_rows=90).astype({'state': 'category', 'district': 'category'})
+    parts = [df.iloc[:30], df.iloc[30:70], df.iloc[70:]]
+    # Each chunk carries only the labels it holds, as a freshly parsed member does
+    chunks = [part.astype({'state': str, 'district': str}).astype({'state': 'category', 'district': 'category'})
+              .reset_index(drop=True) for part in parts]
+    combined = concat_chunks(chunks)
+    expected = df.astype({'state': str, 'district': str})
+    pd.testing.assert_frame_equal(combined.astype({'state': str, 'district': str}), expected)
+    assert isinstance(combined['state'].dtype, pd.CategoricalDtype)
+
+
+def test_concat_chunks_leaves_inputs_untouched():
+    df = typed_stream('biometric', raw_stream('biometric', n_rows=90))
+    chunks = [df.iloc[:30].reset_index(drop=True), df.iloc[30:].reset_index(drop=True)]
+    before = [chunk.copy() for chunk in chunks]
+    combined = concat_chunks(chunks)
+    for chunk, copy in zip(chunks, before):
+        pd.testing.assert_frame_equal(chunk, copy)
+    pd.testing.assert_frame_equal(combined, df)
+
+
+def test_concat_chunks_consume_releases_columns():
+    df = typed_stream('biometric', raw_stream('biometric', n_rows=90))
+    chunks = [df.iloc[:30].reset_index(drop=True), df.iloc[30:].reset_index(drop=True)]
+    pd.testing.assert_frame_equal(concat_chunks(chunks, consume=True), df)
+    assert all(chunk.columns.empty for chunk in chunks)
+
+
+def test_deduplicate_counts_per_member():
+    df = typed_stream('demographic', raw_stream('demographic', n_rows=100))
+    unique, per_member = deduplicate(df, [60, len(df) - 60])
+    pd.testing.assert_frame_equal(unique, df.drop_duplicates(ignore_index=True))
+    assert per_member[0] == df.iloc[:60].duplicated().sum()
+    assert per_member.sum() == df.duplicated().sum()
+
+
+def test_clean_stream_reports_duplicates_by_member(tmp_path):
+    df = raw_stream('biometric', n_rows=120)
+    loaded, report = load_streams({'biometric': write_zip(tmp_path / 'b.zip', 'biometric', df)}, max_workers=1)
+    clean, meta = clean_stream('biometric', loaded['biometric'], report)
+    assert meta['raw_rows'] == len(df)
+    assert meta['duplicates'] == df.duplicated().sum()
+    assert list(meta['duplicates_by_member']) == list(report['member'])
+    # Rows whose labels now coincide are summed, so every key is unique and no count is lost
+    assert len(clean) == len(df) - meta['duplicates'] - meta['collisions_merged']
+    assert not clean.duplicated(['date', 'state', 'district', 'pincode']).any()
+    unique = df.drop_duplicates()
+    assert clean['bio_age_17_'].sum() == unique['bio_age_17_'].sum()
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from merge import MERGE_KEYS, aggregate_collisions, legacy_merge, outer_join
+from tests.synthetic import STREAMS, canonical, raw_streams, typed_stream
+
+
+def assert_same_rows(joined, legacy):
+    joined, legacy = canonical(joined, MERGE_KEYS), canonical(legacy, MERGE_KEYS)
+    assert list(joined.columns) == list(legacy.columns)
+    assert joined.shape == legacy.shape
+    for col in joined.columns:
+        np.testing.assert_array_equal(joined[col].to_numpy(), legacy[col].to_numpy(), err_msg=col)
+
+
+def unique_keys(seed):
+    frames = [typed_stream(stream, df) for stream, df in raw_streams(seed=seed).items()]
+    return [df.drop_duplicates(MERGE_KEYS, ignore_index=True) for df in frames]
+
+
+def test_outer_join_matches_legacy_merge():
+    frames = unique_keys(1)
+    assert_same_rows(outer_join(frames), legacy_merge(frames))
+
+
+def test_outer_join_matches_legacy_merge_with_repeated_keys():
+    # Raw typed frames still hold duplicates, so keys repeat inside a stream and
+    # the merge must produce the same cartesian product as pd.merge
+    frames = [typed_stream(stream, df) for stream, df in raw_streams(seed=2, n_rows=200, n_days=5).items()]
+    assert any(df.duplicated(MERGE_KEYS).any() for df in frames)
+    assert_same_rows(outer_join(frames), legacy_merge(frames))
+
+
+def test_outer_join_keeps_integer_counts():
+    joined = outer_join(unique_keys(3))
+    for col in joined.columns.difference(MERGE_KEYS):
+        assert joined[col].dtype == np.uint32, col
+
+
+def test_outer_join_of_disjoint_frames_fills_zeros():
+    left = pd.DataFrame({'date': pd.to_datetime(['2025-03-01']), 'state': ['A'], 'district': ['X'],
+                         'pincode': np.array([100001], dtype=np.uint32), 'a': np.array([5], dtype=np.uint16)})
+    right = left.assign(pincode=np.array([100002], dtype=np.uint32)).rename(columns={'a': 'b'})
+    joined = canonical(outer_join([left, right]), MERGE_KEYS)
+    np.testing.assert_array_equal(joined['a'], [5, 0])
+    np.testing.assert_array_equal(joined['b'], [0, 5])
+
+
+@pytest.mark.parametrize('stream', STREAMS)
+def test_aggregate_collisions_sums_repeated_keys(stream):
+    df = typed_stream(stream, raw_streams(seed=4)[stream])
+    folded = aggregate_collisions(df)
+    expected = df.groupby(MERGE_KEYS, observed=True).sum().reset_index()
+    assert not folded.duplicated(MERGE_KEYS).any()
+    assert_same_rows(folded, expected)
+
+
+def test_aggregate_collisions_overflow():
+    df = typed_stream('enrolment', raw_streams(seed=5)['enrolment']).iloc[[0, 0]].reset_index(drop=True)
+    df['age_0_5'] = np.array([2 ** 31, 2 ** 31], dtype=np.uint32)
+    with pytest.raises(OverflowError, match='age_0_5'):
+        aggregate_collisions(df)
+
+
+def test_aggregate_collisions_dtype_does_not_depend_on_collisions():
+    df = typed_stream('enrolment', raw_streams(seed=5)['enrolment'])
+    unique = df.drop_duplicates(MERGE_KEYS, ignore_index=True)
+    assert len(aggregate_collisions(unique)) == len(unique)
+    for folded in (aggregate_collisions(df), aggregate_collisions(unique)):
+        assert all(folded[col].dtype == np.uint32 for col in folded.columns.difference(MERGE_KEYS))
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from merge import outer_join
+from metrics import COUNT_COLS, METRICS, Metric, compute_metrics, register, resolve
+from tests.synthetic import merge_ready, raw_streams
+
+
+@pytest.fixture(scope='module')
+def master():
+    return outer_join(merge_ready(raw_streams(seed=9)))
+
+
+def pandas_metrics(df):
+    """
+    The column arithmetic the fused pass replaces.
+    """
+    counts = df[COUNT_COLS].astype(np.int64)
+    total_enrol = counts['age_0_5'] + counts['age_5_17'] + counts['age_18_greater']
+    total_updates = counts['demo_age_5_17'] + counts['demo_age_17_'] + counts['bio_age_5_17'] + counts['bio_age_17_']
+    total_activity = total_enrol + total_updates
+    return {
+        'total_enrol': total_enrol, 'total_updates': total_updates, 'total_activity': total_activity,
+        'mbu_compliance': counts['bio_age_5_17'] / (counts['age_5_17'] + 1),
+        'saturation_ratio': total_updates / (total_activity + 1),
+        'mobility_index': counts['demo_age_17_'] / (counts['age_18_greater'] + counts['demo_age_17_'] + 1),
+        'late_adopter_ratio': counts['age_18_greater'] / (total_enrol + 1),
+    }
+
+
+@pytest.mark.parametrize('block_rows', [7, 1 << 16])
+def test_fused_pass_matches_pandas(master, block_rows):
+    results = compute_metrics(master, block_rows=block_rows)
+    for name, expected in pandas_metrics(master).items():
+        np.testing.assert_allclose(results[name], expected.to_numpy(), rtol=1e-15, err_msg=name)
+    assert results['total_activity'].dtype == np.uint32
+
+
+def test_float32_ratios_and_preallocated_output(master):
+    out = {'mbu_compliance': np.empty(len(master), dtype=np.float32)}
+    results = compute_metrics(master, ['mbu_compliance'], dtype='float32', out=out)
+    assert results['mbu_compliance'] is out['mbu_compliance']
+    np.testing.assert_allclose(results['mbu_compliance'], pandas_metrics(master)['mbu_compliance'], rtol=1e-6)
+
+
+def test_resolve_adds_dependencies_in_registry_order():
+    names = [metric.name for metric in resolve(['saturation_ratio'])]
+    assert names == ['total_enrol', 'total_updates', 'total_activity', 'saturation_ratio']
+    with pytest.raises(KeyError):
+        resolve(['no_such_metric'])
+
+
+def test_register_rejects_unknown_inputs():
+    with pytest.raises(ValueError, match='unknown inputs'):
+        register(Metric('broken', 'total', terms=['not_a_column']))
+    assert 'broken' not in METRICS
+
+
+def test_total_overflow_is_reported():
+    counts = pd.DataFrame({col: np.full(2, 2 ** 31, dtype=np.int64) for col in COUNT_COLS})
+    with pytest.raises(OverflowError, match='total_enrol'):
+        compute_metrics(counts, ['total_enrol'])
@@ -0,0 +1,95 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import outofcore
+
+from geography import title_normalizer
+from merge import MERGE_KEYS, outer_join
+from outofcore import WORKING_SET_PER_CSV_BYTE, OutOfCoreRun, csv_bytes, plan_partitions
+from rollup import DISTRICT_DAY_GRAIN, PINCODE_DAY_GRAIN, PINCODE_GRAIN, RollupCube
+from tests.synthetic import assert_cells_equal, canonical, merge_ready, raw_streams, write_sources
+
+
+@pytest.fixture(scope='module')
+def frames():
+    return raw_streams(seed=20)
+
+
+@pytest.fixture(scope='module')
+def master(frames):
+    """
+    The in-memory path of dd.py: clean, repair, fold, merge, normalize the labels.
+    """
+    master = outer_join(merge_ready(frames))
+    for col in ('state', 'district'):
+        master[col] = title_normalizer.normalize(master[col])
+    return master
+
+
+@pytest.fixture(scope='module')
+def out_of_core(frames, tmp_path_factory):
+    directory = tmp_path_factory.mktemp('outofcore')
+    run = OutOfCoreRun(write_sources(directory, frames), str(directory / 'spill'), n_partitions=3,
+                       max_workers=1, normalizer=title_normalizer)
+    run.cubes = run.run()
+    return run
+
+
+def test_cubes_equal_in_memory(out_of_core, master):
+    district_cube, pincode_cube = out_of_core.cubes
+    assert_cells_equal(district_cube, RollupCube.build(master, DISTRICT_DAY_GRAIN))
+    assert_cells_equal(pincode_cube, RollupCube.build(master, PINCODE_GRAIN))
+
+
+def test_pincode_day_cube_from_partitions_equals_in_memory(out_of_core, master):
+    combined = RollupCube.combine(
+        [RollupCube.build(part, PINCODE_DAY_GRAIN) for part in out_of_core.iter_master()], PINCODE_DAY_GRAIN
+    )
+    assert_cells_equal(combined, RollupCube.build(master, PINCODE_DAY_GRAIN))
+
+
+def test_partitions_hold_the_in_memory_rows(out_of_core, master):
+    parts = list(out_of_core.iter_master())
+    assert len(parts) == 3
+    # All rows of a pincode share a partition
+    pincodes = [set(part['pincode']) for part in parts]
+    assert sum(len(p) for p in pincodes) == len(set().union(*pincodes))
+    rows = canonical(pd.concat([canonical(part, MERGE_KEYS) for part in parts]), MERGE_KEYS)
+    expected = canonical(master, MERGE_KEYS)
+    assert rows.shape == expected.shape
+    for col in expected.columns:
+        np.testing.assert_array_equal(rows[col].to_numpy(), expected[col].to_numpy(), err_msg=col)
+
+
+def test_duplicate_counts_equal_clean_stream(out_of_core, frames):
+    for stream, df in frames.items():
+        meta = out_of_core.stream_meta[stream]
+        assert meta['raw_rows'] == len(df)
+        assert meta['duplicates'] == int(df.duplicated().sum())
+        assert sum(meta['duplicates_by_member'].values()) == meta['duplicates']
+
+
+def test_planned_workers_and_the_spilled_member_fit_half_the_budget(frames, tmp_path):
+    sources = write_sources(tmp_path, frames)
+    largest = max(size for path in sources.values() for size in csv_bytes(path)) * WORKING_SET_PER_CSV_BYTE
+    for members in (2, 3, 5):
+        budget_mb = 2 * members * largest / 1e6
+        _, max_workers = plan_partitions(sources, budget_mb)
+        assert max_workers == min(os.cpu_count(), members - 1)
+        assert (max_workers + 1) * largest <= budget_mb * 1e6 / 2
+
+
+def test_ingest_keeps_one_pending_member_per_worker(frames, tmp_path, monkeypatch):
+    calls = []
+
+    def record(sources, max_workers=None, max_pending=None):
+        calls.append((max_workers, max_pending))
+        return iter(())
+
+    monkeypatch.setattr(outofcore, 'iter_zip_chunks', record)
+    run = OutOfCoreRun(write_sources(tmp_path, frames), str(tmp_path / 'spill'), n_partitions=2, max_workers=3)
+    run.ingest()
+    assert calls == [(3, 3)]
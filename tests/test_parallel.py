@@ -0,0 +1,42 @@
+from multiprocessing import shared_memory
+
+import pytest
+
+from merge import outer_join
+from parallel import StateShardExecutor
+from rollup import DISTRICT_DAY_GRAIN, PINCODE_GRAIN, RollupCube
+from tests.synthetic import assert_cells_equal, merge_ready, raw_streams
+
+
+@pytest.fixture(scope='module')
+def master():
+    return outer_join(merge_ready(raw_streams(seed=13)))
+
+
+@pytest.mark.parametrize('max_workers', [1, 3])
+def test_sharded_cube_equals_serial_build(master, max_workers):
+    with StateShardExecutor(master, max_workers=max_workers) as executor:
+        # Small frame, many workers: the large states are split into several row ranges
+        assert len(executor.shards) >= master['state'].nunique()
+        for grain in (DISTRICT_DAY_GRAIN, PINCODE_GRAIN):
+            assert_cells_equal(executor.build(grain), RollupCube.build(master, grain))
+    assert len(executor.timing_report()) == 2 * len(executor.shards)
+
+
+def test_shared_memory_is_unlinked(master):
+    with StateShardExecutor(master, max_workers=2) as executor:
+        names = [block_name for block_name, _, _ in executor.spec.values()]
+        executor.build(PINCODE_GRAIN)
+    assert executor.blocks == [] and executor.pool is None
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+
+def test_build_outside_context_raises(master):
+    executor = StateShardExecutor(master, max_workers=1)
+    try:
+        with pytest.raises(RuntimeError, match='context manager'):
+            executor.build()
+    finally:
+        executor.close()
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ranking import Ranking, select_positions
+
+
+def full_order(values):
+    # Reference ranking: value descending, ties by position ascending
+    return np.lexsort((np.arange(len(values)), -values))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_select_positions_matches_full_sort_with_ties(seed):
+    rng = np.random.default_rng(seed)
+    values = rng.integers(0, 6, 40).astype(np.float64)  # few distinct values, so many ties
+    order = full_order(values)
+    for k in [0, 1, 3, 7, 20, 39, 40, 55]:
+        np.testing.assert_array_equal(select_positions(values, k, largest=True), order[:k])
+        np.testing.assert_array_equal(select_positions(values, k, largest=False), order[len(values) - min(k, 40):])
+
+
+@pytest.fixture
+def ranking():
+    rng = np.random.default_rng(7)
+    index = pd.MultiIndex.from_arrays(
+        [np.repeat(['Bihar', 'Odisha', 'Kerala'], 7), [f'd{i:02d}' for i in range(21)]], names=['state', 'district'])
+    scores = pd.Series(rng.integers(0, 4, 21).astype(np.float64), index=index, name='health_score')
+    scores.iloc[[2, 11]] = np.nan
+    return Ranking(scores)
+
+
+def test_top_and_bottom_match_full_ranking(ranking):
+    full = ranking.full()
+    assert len(full) == 19 and list(full.index) == list(range(1, 20))
+    for k in [1, 5, 10, 19]:
+        pd.testing.assert_frame_equal(ranking.top(k), full.iloc[:k])
+        pd.testing.assert_frame_equal(ranking.bottom(k), full.iloc[19 - k:])
+
+
+@pytest.mark.parametrize('ks', [(5, 10), (10, 15), (19, 25)])
+def test_extremes_have_no_duplicated_rows(ranking, ks):
+    # k >= n/2: the top and bottom sides overlap, but neither side repeats a row
+    full = ranking.full()
+    for k, (top, bottom) in ranking.extremes(ks).items():
+        for side in (top, bottom):
+            assert not side.duplicated(['state', 'district']).any()
+            assert not side.index.duplicated().any()
+        assert len(top) == len(bottom) == min(k, 19)
+        pd.testing.assert_frame_equal(top, full.iloc[:k])
+        pd.testing.assert_frame_equal(bottom, full.iloc[max(19 - k, 0):])
@@ -0,0 +1,123 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+import refresh as refresh_module
+from geography import district_mapping, garbage_keywords, state_mapping, title_normalizer
+from merge import outer_join
+from refresh import IncrementalRefresh
+from rollup import DISTRICT_DAY_GRAIN, DISTRICT_GRAIN, RollupCube
+from tests.synthetic import assert_cells_equal, merge_ready, raw_streams, write_zip
+from windows import WindowedIndices
+
+MAPPINGS = (state_mapping, district_mapping, garbage_keywords)
+
+
+@pytest.fixture(scope='module')
+def frames():
+    return raw_streams(seed=70, n_days=30)
+
+
+def full_build(frames):
+    """
+    District-day cube of a full in-memory run over the given raw rows.
+    """
+    master = outer_join(merge_ready(frames))
+    for col in ('state', 'district'):
+        master[col] = title_normalizer.normalize(master[col])
+    return RollupCube.build(master, DISTRICT_DAY_GRAIN)
+
+
+def split(frames, cutoff):
+    before, after = {}, {}
+    for stream, df in frames.items():
+        dates = pd.to_datetime(df['date'], format='%d-%m-%Y')
+        before[stream], after[stream] = df[dates < cutoff], df[dates >= cutoff]
+    return before, after
+
+
+def refresh(state_dir, directory, deliveries):
+    """
+    Runs a refresh over every delivery so far; each delivery is {stream: raw rows}, one ZIP per stream.
+    ZIPs of earlier deliveries are not re-written, so their content hash stays the same.
+    """
+    sources = {stream: [] for stream in deliveries[0]}
+    for i, delivery in enumerate(deliveries):
+        for stream, df in delivery.items():
+            path = directory / f'{stream}_{i}.zip'
+            sources[stream].append(str(path) if path.exists() else write_zip(path, stream, df, n_members=2))
+    run = IncrementalRefresh(str(state_dir), MAPPINGS, title_normalizer, max_workers=1)
+    run.refresh(sources, str(directory / 'report.csv'))
+    return run
+
+
+def days_of(cube, keep):
+    return RollupCube(cube.cells.loc[keep(cube.cells['date'])].reset_index(drop=True), DISTRICT_DAY_GRAIN)
+
+
+def test_new_days_equal_full_build(frames, tmp_path):
+    cutoff = pd.Timestamp('2025-03-16')
+    before, after = split(frames, cutoff)
+    first = refresh(tmp_path / 'state', tmp_path, [before])
+    assert_cells_equal(first.day_cube, full_build(before))
+    run = refresh(tmp_path / 'state', tmp_path, [before, after])
+
+    # New days are repaired with the latest pincode index, as in a full build; earlier days
+    # keep the repair they got when they were merged (846004 changes majority in between)
+    assert_cells_equal(days_of(run.day_cube, lambda d: d >= cutoff), days_of(full_build(frames), lambda d: d >= cutoff))
+    assert_cells_equal(days_of(run.day_cube, lambda d: d < cutoff), first.day_cube)
+    assert_cells_equal(run.district_cube, run.day_cube.rollup(DISTRICT_GRAIN))
+
+    # A fresh instance reads the same state back, windows included
+    reloaded = IncrementalRefresh(str(tmp_path / 'state'), MAPPINGS, title_normalizer)
+    assert_cells_equal(reloaded.day_cube, run.day_cube)
+    assert_cells_equal(reloaded.district_cube, run.district_cube)
+    full = WindowedIndices().update(run.day_cube)
+    pd.testing.assert_frame_equal(reloaded.windows.calendar('W'), full.calendar('W'), rtol=1e-10)
+
+
+def test_redelivered_rows_are_not_counted_twice(frames, tmp_path):
+    before, after = split(frames, '2025-03-16')
+    # The same raw rows again in a new file, plus one row of a later day and one of an earlier day
+    redelivery = {stream: pd.concat([df.head(len(df) // 2), after[stream].head(1), after[stream].tail(1)])
+                  for stream, df in before.items()}
+    refresh(tmp_path / 'state', tmp_path, [before])
+    run = refresh(tmp_path / 'state', tmp_path, [before, redelivery])
+
+    expected = {stream: pd.concat([df, after[stream].head(1), after[stream].tail(1)]) for stream, df in before.items()}
+    assert_cells_equal(run.day_cube, full_build(expected))
+
+
+def test_unchanged_sources_change_nothing(frames, tmp_path, capsys):
+    first = refresh(tmp_path / 'state', tmp_path, [frames])
+    again = refresh(tmp_path / 'state', tmp_path, [frames])
+    assert 'no new files' in capsys.readouterr().out
+    assert_cells_equal(again.day_cube, first.day_cube)
+
+
+def test_known_files_are_not_hashed_again(frames, tmp_path, monkeypatch):
+    before, after = split(frames, '2025-03-16')
+    refresh(tmp_path / 'state', tmp_path, [before])
+
+    hashed = []
+    digest = refresh_module.file_digest
+    monkeypatch.setattr(refresh_module, 'file_digest', lambda path: hashed.append(os.path.basename(path)) or digest(path))
+    refresh(tmp_path / 'state', tmp_path, [before, after])
+    assert sorted(hashed) == sorted(f'{stream}_1.zip' for stream in after)
+
+    # A copied (same content, new stamp) file is hashed once, recognized and re-stamped
+    hashed.clear()
+    shutil.copy(tmp_path / 'enrolment_0.zip', tmp_path / 'copy.zip')
+    run = IncrementalRefresh(str(tmp_path / 'state'), MAPPINGS, title_normalizer, max_workers=1)
+    sources = {'enrolment': [str(tmp_path / 'enrolment_0.zip'), str(tmp_path / 'copy.zip')]}
+    assert run.new_files(sources) == ({}, True)
+    assert run.new_files(sources) == ({}, False)
+    assert hashed == ['copy.zip']
+
+
+def test_state_from_other_mappings_is_rejected(frames, tmp_path):
+    refresh(tmp_path / 'state', tmp_path, [frames])
+    with pytest.raises(ValueError, match='full rebuild'):
+        IncrementalRefresh(str(tmp_path / 'state'), (state_mapping, {}, garbage_keywords))
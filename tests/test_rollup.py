@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from merge import outer_join
+from metrics import compute_metrics
+from rollup import DISTRICT_DAY_GRAIN, PINCODE_DAY_GRAIN, PINCODE_GRAIN, RATIO_COLS, RollupCube
+from tests.synthetic import assert_cells_equal, merge_ready, raw_streams
+
+
+@pytest.fixture(scope='module')
+def master():
+    return outer_join(merge_ready(raw_streams(seed=10)))
+
+
+def test_build_matches_groupby_sums(master):
+    cube = RollupCube.build(master, DISTRICT_DAY_GRAIN)
+    expected = master.groupby(DISTRICT_DAY_GRAIN, observed=True).agg(
+        age_0_5=('age_0_5', 'sum'), bio_age_17_=('bio_age_17_', 'sum'), n_rows=('pincode', 'size'))
+    cells = cube.cells.set_index(DISTRICT_DAY_GRAIN).sort_index()
+    expected = expected.sort_index()
+    assert len(cube) == len(expected)
+    for col in expected.columns:
+        np.testing.assert_array_equal(cells[col].to_numpy(), expected[col].to_numpy(), err_msg=col)
+
+
+@pytest.mark.parametrize('grain', [DISTRICT_DAY_GRAIN, PINCODE_GRAIN, PINCODE_DAY_GRAIN])
+def test_combine_of_row_shards_equals_full_build(master, grain):
+    shards = np.array_split(np.random.default_rng(0).permutation(len(master)), 4)
+    parts = [RollupCube.build(master.take(rows).reset_index(drop=True), grain) for rows in shards]
+    assert_cells_equal(RollupCube.combine(parts, grain), RollupCube.build(master, grain))
+
+
+def test_combine_with_different_label_categories(master):
+    # Shards re-typed on their own carry only the labels they hold, as spilled partitions do
+    first = master['state'].astype(str) < 'M'
+    parts = [
+        RollupCube.build(part.astype({'state': 'category', 'district': 'category'}), DISTRICT_DAY_GRAIN)
+        for part in (master[first].astype({'state': str, 'district': str}),
+                     master[~first].astype({'state': str, 'district': str}))
+    ]
+    combined = RollupCube.combine(parts, DISTRICT_DAY_GRAIN)
+    assert isinstance(combined.cells['state'].dtype, pd.CategoricalDtype)
+    assert_cells_equal(combined, RollupCube.build(master, DISTRICT_DAY_GRAIN))
+
+
+def test_mean_matches_row_level_groupby(master):
+    cube = RollupCube.build(master, DISTRICT_DAY_GRAIN)
+    rows = master.assign(**compute_metrics(master, RATIO_COLS))
+    expected = rows.groupby(['state', 'district'], observed=True)[RATIO_COLS].mean()
+    np.testing.assert_allclose(cube.mean(RATIO_COLS, ['state', 'district']).to_numpy(), expected.to_numpy(), rtol=1e-12)
+
+    rows['date'] = rows['date'].dt.to_period('M').dt.start_time
+    expected = rows.groupby(['state', 'date'], observed=True)['mbu_compliance'].mean()
+    np.testing.assert_allclose(cube.mean('mbu_compliance', ['state', 'date'], freq='M').to_numpy(), expected.to_numpy(), rtol=1e-12)
+
+
+def test_total_matches_row_level_groupby(master):
+    cube = RollupCube.build(master, PINCODE_GRAIN)
+    rows = master.assign(**compute_metrics(master, ['total_enrol']))
+    expected = rows.groupby('pincode')['total_enrol'].sum()
+    np.testing.assert_allclose(cube.total('total_enrol').to_numpy(), expected.to_numpy())
+    with pytest.raises(ValueError, match='ratio'):
+        cube.total('mbu_compliance')
+
+
+def test_bounds_match_row_level_min_max(master):
+    cube = RollupCube.build(master, PINCODE_GRAIN)
+    ratios = compute_metrics(master, RATIO_COLS)
+    for name in RATIO_COLS:
+        assert cube.bounds(name) == pytest.approx((np.nanmin(ratios[name]), np.nanmax(ratios[name])))
+
+
+def test_health_mean_matches_row_level_scores(master):
+    cube = RollupCube.build(master, DISTRICT_DAY_GRAIN)
+    ratios = compute_metrics(master, ['mbu_compliance', 'saturation_ratio'])
+    score = sum(weight * (ratios[name] - ratios[name].min()) / (ratios[name].max() - ratios[name].min())
+                for name, weight in (('mbu_compliance', 40), ('saturation_ratio', 60)))
+    expected = master.assign(health_score=score).groupby('state', observed=True)['health_score'].mean()
+    np.testing.assert_allclose(cube.health_mean('state').to_numpy(), expected.to_numpy(), rtol=1e-12)
@@ -0,0 +1,71 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import MaxAbsScaler, MinMaxScaler
+
+from merge import outer_join
+from metrics import compute_metrics
+from rollup import PINCODE_GRAIN, RollupCube
+from scaling import RunningScaler
+from tests.synthetic import merge_ready, raw_streams
+
+FEATURES = ['a', 'b', 'c']
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(16)
+    df = pd.DataFrame({'a': rng.normal(3, 2, 500), 'b': rng.exponential(5, 500) - 2, 'c': np.full(500, 7.0)})
+    df.loc[rng.integers(0, 500, 20), 'b'] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('method, reference', [('minmax', MinMaxScaler), ('maxabs', MaxAbsScaler)])
+def test_transform_matches_sklearn(frame, method, reference):
+    scaled = RunningScaler(FEATURES, method).fit_transform(frame, dtype='float64')
+    expected = reference().fit_transform(frame[FEATURES])
+    np.testing.assert_allclose(scaled.to_numpy(), expected, rtol=1e-12, atol=1e-15)
+
+
+def test_merge_equals_fit_on_concatenated_rows(frame):
+    whole = RunningScaler(FEATURES).fit(frame)
+    parts = [RunningScaler(FEATURES).fit(frame.iloc[rows]) for rows in np.array_split(np.arange(len(frame)), 4)]
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+    assert merged.to_dict() == whole.to_dict()
+    with pytest.raises(ValueError, match='same features'):
+        merged.merge(RunningScaler(FEATURES, method='maxabs'))
+
+
+def test_from_cube_bounds_match_row_level_min_max():
+    master = outer_join(merge_ready(raw_streams(seed=16)))
+    names = ['mbu_compliance', 'saturation_ratio']
+    scaler = RunningScaler.from_cube(RollupCube.build(master, PINCODE_GRAIN), names)
+    rows = RunningScaler(names).fit(compute_metrics(master, names))
+    np.testing.assert_allclose(scaler.low, rows.low, rtol=1e-15)
+    np.testing.assert_allclose(scaler.high, rows.high, rtol=1e-15)
+    assert scaler.count.tolist() == [len(master)] * 2
+
+
+def test_json_round_trip(frame, tmp_path):
+    scaler = RunningScaler(FEATURES, method='maxabs').fit(frame)
+    path = str(tmp_path / 'scaler.json')
+    scaler.save(path)
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f) == scaler.to_dict()
+    loaded = RunningScaler.load(path)
+    for name in FEATURES:
+        np.testing.assert_array_equal(loaded.transform(frame[name].to_numpy(), name, out=np.empty(500)),
+                                      scaler.transform(frame[name].to_numpy(), name, out=np.empty(500)))
+
+
+def test_transform_in_place_and_unfitted_feature(frame):
+    values = frame['a'].to_numpy().copy()
+    scaler = RunningScaler('a').fit(frame)
+    assert scaler.transform(values, 'a') is values
+    assert values.min() == 0.0 and values.max() == 1.0
+    with pytest.raises(ValueError, match='not seen'):
+        RunningScaler('a').transform(values, 'a')
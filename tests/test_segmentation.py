@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import silhouette_score
+
+from scaling import RunningScaler
+from segmentation import PROFILE_PROTOTYPES, SegmentationEngine, SegmentationModel, elbow, profile_names, sampled_silhouette
+
+FEATURES = ['mbu_compliance', 'saturation_ratio', 'mobility_index', 'late_adopter_ratio']
+
+
+def blobs(centers, n=150, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.concatenate([center + rng.normal(0, 0.3, (n, len(center))) for center in centers])
+
+
+def points(n=500, seed=90):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({name: rng.gamma(2.0, 0.5, n) for name in FEATURES})
+
+
+def test_sampled_silhouette_matches_sklearn():
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(300, 3))
+    labels = (X[:, 0] > 0).astype(int) + (X[:, 1] > 1).astype(int)
+    everything = np.arange(len(X))
+    assert sampled_silhouette(X, labels, everything) == pytest.approx(silhouette_score(X, labels), rel=1e-9)
+    assert np.isnan(sampled_silhouette(X, np.zeros(len(X), dtype=int), everything))
+
+
+def test_elbow():
+    assert elbow([2, 3, 4, 5, 6, 7], [100, 60, 20, 17, 15, 14]) == 4
+    assert elbow([2, 3], [10, 5]) == 2
+
+
+def test_profile_names_follow_centroid_directions():
+    center, spread = np.zeros(4), np.ones(4)
+    centroids = np.array([[-2.0, 0, 0, 0], [0, 2.0, 1.0, 0], [0, -2.0, 0, 1.0], [0.1, 0.1, 0.1, 0.1]])
+    assert profile_names(centroids, FEATURES, center, spread) == [
+        'Policy Risk', 'Mature Hubs', 'Emerging Zones', f'Segment {len(PROFILE_PROTOTYPES) + 1}']
+
+
+def test_engine_picks_k_and_caches_fits(tmp_path):
+    X = blobs([[0, 0, 0, 0], [4, 0, 0, 0], [0, 4, 0, 0], [0, 0, 4, 4]])
+    engine = SegmentationEngine(ks=range(2, 7), seeds=range(2), max_workers=2, cache_dir=str(tmp_path))
+    engine.fit(X, FEATURES)
+    assert engine.k == 4
+    assert not engine.results['cached'].any()
+    labels = engine.predict(X)
+    assert all(len(set(labels[i * 150:(i + 1) * 150])) == 1 for i in range(4))
+
+    again = SegmentationEngine(ks=range(2, 7), seeds=range(2), max_workers=2, cache_dir=str(tmp_path)).fit(X, FEATURES)
+    assert again.results['cached'].all()
+    np.testing.assert_array_equal(again.centroids, engine.centroids)
+    assert again.names == engine.names
+
+
+def test_model_assigns_nearest_scaled_centroid(tmp_path):
+    X = points()
+    scaler = RunningScaler(FEATURES, method='maxabs').fit(X)
+    X_scaled = scaler.transform_frame(X, dtype='float64').to_numpy()
+    centroids = X_scaled[[0, 1, 2]]
+    model = SegmentationModel(scaler, centroids, list(PROFILE_PROTOTYPES))
+
+    nearest = np.linalg.norm(X_scaled[:, None, :] - centroids[None, :, :], axis=2).argmin(axis=1)
+    assigned = model.assign(X, chunk_rows=64)
+    np.testing.assert_array_equal(assigned['Cluster'], nearest)
+    assert list(assigned['District_Profile'].cat.categories) == model.names
+    np.testing.assert_allclose(assigned['distance_mature_hubs'], np.linalg.norm(X_scaled - centroids[0], axis=1), atol=1e-12)
+
+    path = str(tmp_path / 'model.json')
+    model.save(path)
+    pd.testing.assert_frame_equal(SegmentationModel.load(path).assign(X), assigned)
+    with pytest.raises(ValueError, match='shape'):
+        SegmentationModel(scaler, centroids[:, :2], model.names)
+
+
+def test_from_centroids_names_and_assigns_nearest(tmp_path):
+    X = points()
+    scaler = RunningScaler(FEATURES, method='maxabs').fit(X)
+    X_scaled = scaler.transform_frame(X, dtype='float64').to_numpy()
+    # Centroids pointing along each profile, given in a shuffled order
+    center, spread = X_scaled.mean(axis=0), X_scaled.std(axis=0)
+    centroids = np.array([center + spread * np.array([PROFILE_PROTOTYPES[name].get(f, 0.0) for f in FEATURES])
+                          for name in ('Policy Risk', 'Mature Hubs', 'Emerging Zones')])
+
+    model = SegmentationModel.from_centroids(scaler, centroids, X_scaled)
+    assert model.names == list(PROFILE_PROTOTYPES)
+    np.testing.assert_allclose(model.centroids, centroids[[1, 2, 0]])
+
+    nearest = np.linalg.norm(X_scaled[:, None, :] - model.centroids[None, :, :], axis=2).argmin(axis=1)
+    assigned = model.assign(X)
+    np.testing.assert_array_equal(assigned['Cluster'], nearest)
+    assert list(assigned['District_Profile'].cat.categories) == model.names
+
+    path = str(tmp_path / 'model.json')
+    model.save(path)
+    pd.testing.assert_frame_equal(SegmentationModel.load(path).assign(X), assigned)
+
+
+def test_rows_with_missing_features_get_no_profile():
+    X = points(20)
+    model = SegmentationModel(RunningScaler(FEATURES).fit(X), np.eye(3, len(FEATURES)), list(PROFILE_PROTOTYPES))
+    X.loc[[2, 5], 'mobility_index'] = np.nan
+    assigned = model.assign(X, chunk_rows=7)
+    assert (assigned['Cluster'].to_numpy()[[2, 5]] == -1).all()
+    assert assigned['District_Profile'].isna().sum() == 2
+
+
+def test_centroids_for_a_merged_scaler_keep_their_raw_position():
+    yesterday, today = points(seed=1), points(seed=2) * 1.5
+    scaler = RunningScaler(FEATURES, method='maxabs').fit(yesterday)
+    X_scaled = scaler.transform_frame(yesterday, dtype='float64').to_numpy()
+    model = SegmentationModel.from_centroids(scaler, X_scaled[[0, 1, 2]], X_scaled)
+
+    merged = RunningScaler(FEATURES, method='maxabs').fit(today).merge(model.scaler)
+    moved = model.centroids_for(merged)
+    # Back in raw units both are the same points: the rows the centroids were taken from
+    peak = np.maximum(yesterday.abs().max(), today.abs().max()).to_numpy()
+    np.testing.assert_allclose(moved * peak, model.centroids / model.scales, rtol=1e-12)
+    np.testing.assert_allclose(np.sort(moved * peak, axis=0), np.sort(yesterday.to_numpy()[:3], axis=0), rtol=1e-12)
+    with pytest.raises(ValueError, match='do not match'):
+        model.centroids_for(RunningScaler(FEATURES[:2]).fit(today))
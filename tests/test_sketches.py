@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from sketches import KLLSketch
+
+# Normalized rank error allowed for k=200 (the sketch targets about 1%)
+EPSILON = 0.02
+QS = np.linspace(0, 1, 41)
+
+
+def exact_rank(data, values):
+    return np.searchsorted(np.sort(data), values, side='right') / len(data)
+
+
+def quantile_error(data, estimates, qs):
+    """
+    How far each q lies outside the range of ranks its estimate covers (a repeated value covers many).
+    """
+    ordered = np.sort(data)
+    below = np.searchsorted(ordered, estimates, side='left') / len(data)
+    upto = np.searchsorted(ordered, estimates, side='right') / len(data)
+    return np.maximum(np.maximum(below - qs, qs - upto), 0.0)
+
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(17)
+    # Long right tail plus a block of repeated values, like district-level ratios
+    return np.concatenate([rng.lognormal(0, 1.5, 150_000), np.full(20_000, 0.5)])
+
+
+def fed(values, batches=1, k=200, seed=0):
+    sketch = KLLSketch(k, seed)
+    for part in np.array_split(values, batches):
+        sketch.update(part)
+    return sketch
+
+
+@pytest.mark.parametrize('batches', [1, 37])
+def test_quantile_rank_error(data, batches):
+    sketch = fed(data, batches)
+    assert len(sketch) == len(data)
+    assert sum(len(items) for items in sketch.levels) < 2_000
+    # The rank of each returned quantile is within EPSILON of q
+    estimates = sketch.quantile(QS)
+    assert quantile_error(data, estimates, QS).max() < EPSILON
+    assert estimates[0] == data.min() and estimates[-1] == data.max()
+    assert abs(sketch.quantile(0.5) - np.quantile(data, 0.5)) < np.quantile(data, 0.5 + EPSILON) - np.quantile(data, 0.5 - EPSILON)
+
+
+def test_rank_error(data):
+    sketch = fed(data, 10)
+    probes = np.quantile(data, QS)
+    assert np.abs(sketch.rank(probes) - exact_rank(data, probes)).max() < EPSILON
+    assert sketch.rank(data.min() - 1) == 0.0 and sketch.rank(data.max()) == 1.0
+
+
+def test_merged_sketches_agree_with_sketch_of_concatenated_data(data):
+    rng = np.random.default_rng(3)
+    shuffled = rng.permutation(data)
+    merged = fed(shuffled[:1])
+    for seed, part in enumerate(np.array_split(shuffled[1:], 6), start=1):
+        merged.merge(fed(part, seed=seed))
+    whole = fed(shuffled)
+    assert len(merged) == len(whole) and (merged.min, merged.max) == (whole.min, whole.max)
+    assert quantile_error(data, merged.quantile(QS), QS).max() < EPSILON
+    assert np.abs(merged.rank(whole.quantile(QS)) - whole.rank(whole.quantile(QS))).max() < 2 * EPSILON
+
+
+def test_nans_are_skipped_and_state_round_trips(data):
+    sketch = fed(np.r_[data[:5_000], np.nan, np.nan])
+    assert len(sketch) == 5_000
+    restored = KLLSketch.from_dict(sketch.to_dict())
+    np.testing.assert_array_equal(restored.quantile(QS), sketch.quantile(QS))
+    with pytest.raises(ValueError, match='empty'):
+        KLLSketch().quantile(0.5)
+
+
+def test_empty_sketch_has_no_rank():
+    # Also after an update that held only NaNs
+    for sketch in (KLLSketch(), KLLSketch().update([np.nan])):
+        with pytest.raises(ValueError, match='empty'):
+            sketch.rank([0.0, 1.0])
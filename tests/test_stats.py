@@ -0,0 +1,101 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cache import StreamCache
+from ingest import CLEANING_VERSION, clean_stream
+from stats import CorrelationAccumulator, SummaryStats, summarize_stream
+from tests.synthetic import raw_stream, typed_stream, write_zip
+
+EXACT = ['count', 'mean', 'std', 'min', 'max']
+
+
+@pytest.fixture(scope='module')
+def df():
+    return typed_stream('enrolment', raw_stream('enrolment', n_rows=3000, seed=80))
+
+
+def chunks(df, n=4):
+    return [df.iloc[rows] for rows in np.array_split(np.arange(len(df)), n)]
+
+
+def round_trip(state):
+    return json.loads(json.dumps(state))
+
+
+def test_describe_matches_pandas(df):
+    stats = SummaryStats().update(df)
+    columns = ['age_0_5', 'age_5_17', 'age_18_greater']
+    expected = df[columns].astype(np.float64).describe()
+    np.testing.assert_allclose(stats.describe(columns).loc[EXACT], expected.loc[EXACT], rtol=1e-12)
+    # Percentiles from the sketch are within a couple of percent of rank
+    for col in columns:
+        values = df[col].to_numpy()
+        assert np.quantile(values, 0.48) <= stats.quantile(col, 0.5) <= np.quantile(values, 0.52)
+
+
+def test_merged_chunks_equal_one_pass(df):
+    merged = SummaryStats()
+    for chunk in chunks(df):
+        merged.merge(SummaryStats().update(chunk))
+    whole = SummaryStats().update(df)
+    np.testing.assert_allclose(merged.describe().loc[EXACT], whole.describe().loc[EXACT], rtol=1e-12)
+    for state in df['state'].unique():
+        np.testing.assert_allclose(merged.describe(state=state).loc[EXACT], whole.describe(state=state).loc[EXACT], rtol=1e-12)
+
+
+def test_clip_bounds_are_sketch_percentiles(df):
+    stats = SummaryStats().update(df)
+    low, high = stats.clip_bounds('age_5_17')
+    values = df['age_5_17'].to_numpy()
+    assert np.quantile(values, 0.0) <= low <= np.quantile(values, 0.03)
+    assert np.quantile(values, 0.97) <= high <= np.quantile(values, 1.0)
+
+
+def test_summary_stats_round_trip(df):
+    stats = SummaryStats().update(df)
+    restored = SummaryStats.from_dict(round_trip(stats.to_dict()))
+    pd.testing.assert_frame_equal(restored.describe(), stats.describe())
+    state = str(df['state'].iloc[0])
+    pd.testing.assert_frame_equal(restored.describe(state=state), stats.describe(state=state))
+    # A restored summary keeps accepting chunks
+    restored.update(df)
+    assert restored.summary('age_0_5').n == 2 * len(df)
+
+
+def test_correlation_matches_pandas_and_round_trips(df):
+    merged = CorrelationAccumulator()
+    for chunk in chunks(df):
+        merged.merge(CorrelationAccumulator().update(chunk))
+    columns = merged.columns
+    np.testing.assert_allclose(merged.corr(), df[columns].astype(np.float64).corr(), rtol=1e-9)
+    state = df['state'].iloc[0]
+    rows = df[df['state'] == state]
+    np.testing.assert_allclose(merged.cov(state=state), rows[columns].astype(np.float64).cov(), rtol=1e-9)
+
+    restored = CorrelationAccumulator.from_dict(round_trip(merged.to_dict()))
+    pd.testing.assert_frame_equal(restored.corr(), merged.corr())
+
+
+def test_cache_keeps_summaries_with_their_entries(tmp_path):
+    zip_path = write_zip(tmp_path / 'enrolment.zip', 'enrolment', raw_stream('enrolment', seed=81))
+    cache = StreamCache(str(tmp_path / 'cache'))
+    frames, _, meta = cache.load_streams({'enrolment': zip_path}, clean_stream, CLEANING_VERSION,
+                                         max_workers=1, summarize=summarize_stream)
+    expected = summarize_stream('enrolment', frames['enrolment'])
+    assert meta['enrolment']['summary'] == round_trip(expected)
+
+    def not_again(stream, df):
+        raise AssertionError('summary recomputed on a cache hit')
+
+    _, timings, meta = cache.load_streams({'enrolment': zip_path}, clean_stream, CLEANING_VERSION,
+                                          max_workers=1, summarize=not_again)
+    assert timings is None
+    assert meta['enrolment']['summary'] == round_trip(expected)
+
+    # A new cleaning version is a new key: the old entry and its summary are evicted together
+    cache.load_streams({'enrolment': zip_path}, clean_stream, CLEANING_VERSION + 1, max_workers=1, summarize=summarize_stream)
+    assert len(os.listdir(tmp_path / 'cache')) == 2
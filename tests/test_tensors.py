@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from merge import outer_join
+from metrics import COUNT_COLS
+from rollup import DISTRICT_DAY_GRAIN, PINCODE_DAY_GRAIN, RollupCube
+from tensors import DenseTensorStore, SparseTensorStore
+from tests.synthetic import merge_ready, raw_streams
+
+
+@pytest.fixture(scope='module')
+def master():
+    master = outer_join(merge_ready(raw_streams(seed=40, n_days=30)))
+    master['total_activity'] = master[COUNT_COLS].sum(axis=1).astype(np.int64)
+    return master
+
+
+@pytest.fixture(scope='module')
+def sparse(master, tmp_path_factory):
+    return SparseTensorStore.build(RollupCube.build(master, PINCODE_DAY_GRAIN), str(tmp_path_factory.mktemp('sparse')))
+
+
+@pytest.fixture(scope='module')
+def dense(master, tmp_path_factory):
+    return DenseTensorStore.build(RollupCube.build(master, DISTRICT_DAY_GRAIN), str(tmp_path_factory.mktemp('dense')))
+
+
+def pivot(master, columns, name):
+    dates = pd.date_range(master['date'].min(), master['date'].max(), freq='D', name='date')
+    table = master.pivot_table(index='date', columns=columns, values=name, aggfunc='sum', observed=True)
+    return table.reindex(dates).fillna(0).astype(np.int64)
+
+
+def test_sparse_dense_equals_pivot(sparse, master):
+    expected = pivot(master, 'pincode', 'age_0_5')
+    result = sparse.dense('age_0_5')
+    np.testing.assert_array_equal(result.index, expected.index)
+    np.testing.assert_array_equal(result.columns, expected.columns)
+    np.testing.assert_array_equal(result.to_numpy(), expected.to_numpy())
+
+
+def test_sparse_dense_selection_keeps_requested_order(sparse, master):
+    expected = pivot(master, 'pincode', 'total_activity')
+    chosen = list(expected.columns[::-2])
+    result = sparse.dense('total_activity', chosen)
+    assert list(result.columns) == chosen
+    np.testing.assert_array_equal(result.to_numpy(), expected[chosen].to_numpy())
+    for pincode in chosen[:3]:
+        np.testing.assert_array_equal(sparse.series('total_activity', pincode).to_numpy(), expected[pincode].to_numpy())
+
+
+def test_sparse_dense_unknown_pincode(sparse):
+    with pytest.raises(KeyError, match='999999'):
+        sparse.dense('age_0_5', [sparse.pincodes[0], 999999])
+
+
+def test_sparse_daily_totals(sparse, master):
+    expected = pivot(master, 'pincode', 'total_activity').sum(axis=1)
+    np.testing.assert_array_equal(sparse.daily_totals('total_activity').to_numpy(), expected.to_numpy())
+
+
+def test_dense_by_state_equals_pivot(dense, master):
+    expected = pivot(master, 'state', 'age_5_17').T
+    result = dense.by_state('age_5_17')
+    assert [str(s) for s in result.index] == [str(s) for s in expected.index]
+    np.testing.assert_array_equal(result.to_numpy(), expected.to_numpy())
+
+
+def test_dense_rolling_and_trends(dense, master):
+    daily = pivot(master, ['state', 'district'], 'total_activity')
+    np.testing.assert_array_equal(dense.rolling('total_activity', 7).to_numpy(), daily.rolling(7).sum().to_numpy())
+    slopes = np.polyfit(np.arange(len(daily)), daily.to_numpy(), 1)[0]
+    np.testing.assert_allclose(dense.trends('total_activity').to_numpy(), slopes, atol=1e-9)
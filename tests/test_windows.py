@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from merge import outer_join
+from metrics import COUNT_COLS
+from rollup import DISTRICT_DAY_GRAIN, RATIO_COLS, RollupCube
+from tests.synthetic import merge_ready, raw_streams
+from windows import WindowedIndices
+
+INDEX_COLS = RATIO_COLS + ['n_rows']
+
+
+@pytest.fixture(scope='module')
+def master():
+    master = outer_join(merge_ready(raw_streams(seed=30, n_days=60)))
+    master['state'] = master['state'].astype(str)
+    master['district'] = master['district'].astype(str)
+    return master
+
+
+def cube_of(df):
+    return RollupCube.build(df, DISTRICT_DAY_GRAIN)
+
+
+def assert_windows_equal(left, right, columns=INDEX_COLS):
+    for freq in ('W', 'M'):
+        pd.testing.assert_frame_equal(left.calendar(freq)[columns], right.calendar(freq)[columns], rtol=1e-10)
+    pd.testing.assert_frame_equal(left.rolling(7, by='state')[columns], right.rolling(7, by='state')[columns], rtol=1e-10)
+
+
+def test_calendar_means_equal_cube_means(master):
+    cube = cube_of(master)
+    monthly = WindowedIndices().update(cube).calendar('M')
+    monthly = monthly[monthly['n_rows'] > 0].reorder_levels(['state', 'district', 'date']).sort_index()
+    expected = cube.mean(RATIO_COLS, ['state', 'district', 'date'], freq='M')
+    np.testing.assert_allclose(monthly[RATIO_COLS].to_numpy(), expected.to_numpy(), rtol=1e-12)
+
+
+def test_rolling_sums_equal_pandas_rolling(master):
+    cube = cube_of(master)
+    windows = WindowedIndices().update(cube)
+    rolled = windows.rolling(7)['n_rows'].unstack(['state', 'district'])
+    daily = cube.cells.pivot_table(index='date', columns=['state', 'district'], values='n_rows', aggfunc='sum',
+                                   observed=True).reindex(windows.dates).fillna(0)
+    expected = daily.rolling(7).sum().dropna()
+    np.testing.assert_array_equal(rolled.to_numpy(), expected[rolled.columns].to_numpy())
+
+
+def test_appended_days_equal_full_build(master):
+    cutoff = master['date'].sort_values().iloc[len(master) // 2]
+    # The later half lacks some districts and starts a new month; the earlier half is folded in last
+    incremental = WindowedIndices().update(cube_of(master[master['date'] >= cutoff]))
+    incremental.update(cube_of(master[master['date'] < cutoff]))
+    full = WindowedIndices().update(cube_of(master))
+    assert_windows_equal(incremental, full, INDEX_COLS + ['health_score'])
+
+
+def test_revised_days_equal_rebuild(master):
+    windows = WindowedIndices().update(cube_of(master))
+    days = master['date'].drop_duplicates().sort_values()
+    revised_day, emptied_day = days.iloc[10], days.iloc[20]
+
+    revised = master[master['date'] != emptied_day].reset_index(drop=True)
+    on_day = revised['date'] == revised_day
+    revised.loc[on_day, COUNT_COLS] = revised.loc[on_day, COUNT_COLS] * 3 + 1
+    # emptied_day has no cells left, so it is named explicitly and every district on it falls to 0
+    windows.update(cube_of(revised[revised['date'] == revised_day]), dates=[revised_day, emptied_day])
+    assert_windows_equal(windows, WindowedIndices().update(cube_of(revised)))
+
+
+def test_save_load_round_trip(master, tmp_path):
+    windows = WindowedIndices().update(cube_of(master))
+    path = str(tmp_path / 'windows.npz')
+    windows.save(path)
+    assert_windows_equal(WindowedIndices.load(path), windows, INDEX_COLS + ['health_score'])